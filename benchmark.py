@@ -0,0 +1,261 @@
+"""Times the import, query, model, schema and plot paths on synthetic data."""
+
+import json
+import os
+import statistics
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Callable
+
+import duckdb
+
+from db import DB
+from gui.plotter import plot_result
+
+COLUMN_TYPES = {
+    "int": "(hash(range, {seed}, {i}) % 1000000)::BIGINT",
+    "float": "(hash(range, {seed}, {i}) % 1000000) / 100.0",
+    "text": "'value_' || (hash(range, {seed}, {i}) % 1000)::VARCHAR",
+    "date": "DATE '2000-01-01' + (hash(range, {seed}, {i}) % 10000)::INTEGER",
+}
+
+
+@dataclass
+class DataSpec:
+    rows: int = 100_000
+    columns: int = 8
+    types: list[str] = field(default_factory=lambda: list(COLUMN_TYPES))
+    files: int = 4
+    seed: int = 0
+
+
+def generate_csvs(directory: Path, spec: DataSpec) -> list[Path]:
+    """Writes ``spec.files`` CSV files with ``spec.rows`` rows each, cycling
+    through ``spec.types`` for the types of the columns."""
+    directory.mkdir(parents=True, exist_ok=True)
+    conn = duckdb.connect()
+    paths = []
+    for file in range(spec.files):
+        columns = ", ".join(
+            COLUMN_TYPES[spec.types[i % len(spec.types)]].format(
+                seed=spec.seed + file, i=i
+            )
+            + f" AS c{i}_{spec.types[i % len(spec.types)]}"
+            for i in range(spec.columns)
+        )
+        path = directory / f"bench_{file}.csv"
+        conn.sql(
+            f"COPY (SELECT {columns} FROM range({spec.rows})) TO '{path}' (HEADER)"
+        )
+        paths.append(path)
+    return paths
+
+
+@dataclass
+class Timing:
+    runs: list[float]
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.runs)
+
+    def to_json(self) -> dict:
+        return {"median": self.median, "min": min(self.runs), "runs": self.runs}
+
+
+def measure(
+    run: Callable[[], None],
+    repeat: int,
+    setup: Callable[[], None] = lambda: None,
+) -> Timing:
+    runs = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        run()
+        runs.append(time.perf_counter() - start)
+    return Timing(runs)
+
+
+class Benchmarks:
+    """The timed paths, each run on a fresh database over the same files."""
+
+    VIEWPORT_ROWS = 40
+    SCROLL_STEPS = 50
+    SCHEMA_TABLES = 200
+
+    def __init__(self, data_dir: Path, spec: DataSpec, repeat: int):
+        self.data_dir = data_dir
+        self.spec = spec
+        self.repeat = repeat
+        self.db = self._new_db()
+
+    def all(self) -> dict[str, Timing]:
+        return {
+            "import": self.import_data_dir(),
+            "query": self.query(),
+            "model_scroll": self.model_scroll(),
+            "schema_refresh": self.schema_refresh(),
+            "plot": self.plot(),
+        }
+
+    def import_data_dir(self) -> Timing:
+        def setup():
+            self.db = self._new_db()
+
+        return measure(
+            lambda: self.db.create_tables_from_data_dir(self.data_dir),
+            self.repeat,
+            setup,
+        )
+
+    def query(self) -> Timing:
+        """``DB.sql`` and converting the whole result to a DataFrame."""
+        self._imported_db()
+
+        def run():
+            self.db.sql("SELECT * FROM bench_0 WHERE c0_int >= 0")
+            self.db.result_model.result
+
+        return measure(run, self.repeat)
+
+    def model_scroll(self) -> Timing:
+        """Formats every cell of a viewport scrolled down in even steps."""
+        self._imported_db()
+        model = self.db.result_model
+
+        def setup():
+            self.db.sql("SELECT * FROM bench_0")
+
+        def run():
+            step = max(self.spec.rows // self.SCROLL_STEPS, 1)
+            for top in range(0, self.spec.rows, step):
+                while model.rowCount() < top + self.VIEWPORT_ROWS:
+                    if not model.canFetchMore():
+                        break
+                    model.fetchMore()
+                for row in range(top, min(top + self.VIEWPORT_ROWS, model.rowCount())):
+                    for column in range(model.columnCount()):
+                        model.data(model.index(row, column))
+
+        return measure(run, self.repeat, setup)
+
+    def schema_refresh(self) -> Timing:
+        """Refreshing the schema of many tables when none changed."""
+        self.db = self._new_db()
+        cursor = self.db.cursor()
+        for i in range(self.SCHEMA_TABLES):
+            cursor.sql(f"CREATE TABLE t{i} AS SELECT 1 AS a, 'b' AS b, 2.0 AS c")
+        self.db.schema_tracker.refresh()
+
+        return measure(self.db.schema_tracker.refresh, self.repeat)
+
+    def plot(self) -> Timing:
+        """Copying the result for plotting and drawing every plot type."""
+        self._imported_db()
+        self.db.sql("SELECT * FROM bench_0")
+
+        def run():
+            plotter = plot_result(self.db.plot_source())
+            for index in range(plotter.combobox.count()):
+                plotter.combobox.setCurrentIndex(index)
+            plotter.source.close()
+            plotter.deleteLater()
+
+        return measure(run, self.repeat)
+
+    def _new_db(self) -> DB:
+        """A database that runs every query, instead of serving repeated
+        ones from the result cache."""
+        db = DB.from_connection()
+        db.result_cache.max_bytes = 0
+        return db
+
+    def _imported_db(self):
+        self.db = self._new_db()
+        self.db.create_tables_from_data_dir(self.data_dir)
+
+
+def compare(
+    results: dict[str, dict], baseline: dict[str, dict], tolerance: float
+) -> list[str]:
+    """Names of the benchmarks slower than their baseline by more than
+    ``tolerance``, comparing medians."""
+    print(f"{'benchmark':<16}{'baseline':>12}{'current':>12}{'ratio':>8}")
+    regressions = []
+    for name, timing in results.items():
+        if name not in baseline:
+            continue
+        ratio = timing["median"] / baseline[name]["median"]
+        print(
+            f"{name:<16}{baseline[name]['median']:>11.4f}s"
+            f"{timing['median']:>11.4f}s{ratio:>7.2f}x"
+        )
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def run(spec: DataSpec, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp) / "data"
+        generate_csvs(data_dir, spec)
+        timings = Benchmarks(data_dir, spec, repeat).all()
+    return {
+        "spec": asdict(spec),
+        "duckdb": duckdb.__version__,
+        "results": {name: timing.to_json() for name, timing in timings.items()},
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Data Pond benchmarks")
+    parser.add_argument("--rows", type=int, default=DataSpec.rows)
+    parser.add_argument("--columns", type=int, default=DataSpec.columns)
+    parser.add_argument(
+        "--types",
+        nargs="+",
+        choices=list(COLUMN_TYPES),
+        default=list(COLUMN_TYPES),
+        help="Column types, cycled through for the generated columns",
+    )
+    parser.add_argument("--files", type=int, default=DataSpec.files)
+    parser.add_argument("--seed", type=int, default=DataSpec.seed)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    parser.add_argument("--compare", type=Path, help="Baseline JSON to compare to")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Slowdown over the baseline reported as a regression",
+    )
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from qtpy.QtWidgets import QApplication
+
+    app = QApplication(sys.argv)
+
+    spec = DataSpec(args.rows, args.columns, args.types, args.files, args.seed)
+    report = run(spec, args.repeat)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        if baseline["spec"] != report["spec"]:
+            print("Warning: the baseline was run on different data", file=sys.stderr)
+        if regressions := compare(
+            report["results"], baseline["results"], args.tolerance
+        ):
+            print(f"Slower than baseline: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        for name, result in report["results"].items():
+            print(f"{name:<16}{result['median']:>11.4f}s")
@@ -0,0 +1,155 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import duckdb
+from qtpy.QtCore import QObject, QThreadPool, Signal, Slot
+
+from db import SchemaTracker, Table
+
+UNORDERED_TYPES = ("STRUCT", "MAP", "UNION")
+
+
+@dataclass
+class ColumnStats:
+    approx_distinct: int
+    null_fraction: float
+    min: Optional[str]
+    max: Optional[str]
+
+
+@dataclass
+class TableStats:
+    """Statistics of each column, computed over ``rows`` rows of the table,
+    which are only a sample of it if ``sampled``."""
+
+    columns: dict[str, ColumnStats]
+    rows: int
+    sampled: bool
+
+
+def table_stats(
+    cursor: duckdb.DuckDBPyConnection, table: Table, sample_rows: int
+) -> TableStats:
+    """Computes the statistics of all columns in a single scan.
+
+    Tables larger than ``sample_rows`` are reservoir sampled. Views can't
+    tell their size without reading their files, so only their first
+    ``sample_rows`` rows are read.
+    """
+    reservoir = not table.is_view and _estimated_size(cursor, table) > sample_rows
+    if table.is_view:
+        source = f'(SELECT * FROM "{table.name}" LIMIT {sample_rows})'
+    elif reservoir:
+        source = (
+            f'(SELECT * FROM "{table.name}" '
+            f"USING SAMPLE reservoir({sample_rows} ROWS) REPEATABLE (0))"
+        )
+    else:
+        source = f'"{table.name}"'
+
+    aggregates = ["count(*)"]
+    for column, data_type in table.columns:
+        aggregates += [f'approx_count_distinct("{column}")', f'count("{column}")']
+        if _is_ordered(data_type):
+            aggregates += [f'min("{column}")::VARCHAR', f'max("{column}")::VARCHAR']
+        else:
+            aggregates += ["NULL", "NULL"]
+
+    rows, *values = cursor.sql(
+        f"SELECT {', '.join(aggregates)} FROM {source}"
+    ).fetchone()
+    columns = {}
+    for i, (column, _) in enumerate(table.columns):
+        distinct, non_null, low, high = values[4 * i : 4 * i + 4]
+        null_fraction = 1 - non_null / rows if rows else 0.0
+        columns[column] = ColumnStats(distinct, null_fraction, low, high)
+    return TableStats(
+        columns, rows, reservoir or (table.is_view and rows == sample_rows)
+    )
+
+
+class ColumnStatsLoader(QObject):
+    """Computes table statistics in the background when they are asked for,
+    and keeps them until the schema tracker reports their table changed."""
+
+    SAMPLE_ROWS = 100_000
+
+    stats_ready = Signal(str, object)
+    error_occurred = Signal(duckdb.Error)
+
+    def __init__(self, conn: duckdb.DuckDBPyConnection, schema_tracker: SchemaTracker):
+        super().__init__()
+        self._conn = conn
+        self._stats: dict[str, TableStats] = {}
+        self._pending: dict[str, Table] = {}
+        schema_tracker.table_changed.connect(self.forget)
+        schema_tracker.table_dropped.connect(self.forget)
+
+    def stats(self, name: str) -> Optional[TableStats]:
+        return self._stats.get(name)
+
+    def request(self, table: Table):
+        if (stats := self._stats.get(table.name)) is not None:
+            self.stats_ready.emit(table.name, stats)
+        elif table.name not in self._pending:
+            self._pending[table.name] = table
+            job = ColumnStatsJob(self._conn, table, self.SAMPLE_ROWS)
+            job.finished.connect(self._job_finished)
+            job.error_occurred.connect(self._job_failed)
+            job.start()
+
+    @Slot(Table)
+    def forget(self, table: Table):
+        self._stats.pop(table.name, None)
+        self._pending.pop(table.name, None)
+
+    @Slot(Table, object)
+    def _job_finished(self, table: Table, stats: TableStats):
+        # A table that changed while its statistics were computed is left
+        # to be requested again.
+        if self._pending.get(table.name) is table:
+            del self._pending[table.name]
+            self._stats[table.name] = stats
+            self.stats_ready.emit(table.name, stats)
+
+    @Slot(Table, duckdb.Error)
+    def _job_failed(self, table: Table, e: duckdb.Error):
+        if self._pending.get(table.name) is table:
+            del self._pending[table.name]
+        self.error_occurred.emit(e)
+
+
+class ColumnStatsJob(QObject):
+    finished = Signal(Table, object)
+    error_occurred = Signal(Table, duckdb.Error)
+
+    def __init__(self, conn: duckdb.DuckDBPyConnection, table: Table, sample_rows):
+        super().__init__()
+        self.table = table
+        self._cursor = conn.cursor()
+        self._sample_rows = sample_rows
+
+    def start(self):
+        QThreadPool.globalInstance().start(self.run)
+
+    def run(self):
+        try:
+            self.finished.emit(
+                self.table, table_stats(self._cursor, self.table, self._sample_rows)
+            )
+        except duckdb.Error as e:
+            self.error_occurred.emit(self.table, e)
+        finally:
+            self._cursor.close()
+
+
+def _estimated_size(cursor: duckdb.DuckDBPyConnection, table: Table) -> int:
+    (size,) = cursor.sql(
+        "SELECT coalesce(max(estimated_size), 0) FROM duckdb_tables() "
+        f"WHERE table_name = '{table.name}'"
+    ).fetchone()
+    return size
+
+
+def _is_ordered(data_type: str) -> bool:
+    return not data_type.startswith(UNORDERED_TYPES) and not data_type.endswith("]")
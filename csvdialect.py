@@ -0,0 +1,270 @@
+import fnmatch
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+from argparse import ArgumentTypeError, BooleanOptionalAction, Namespace
+from dataclasses import asdict, dataclass, field, fields, replace
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+
+from sqlutil import quote_literal
+
+# Per-file and per-directory options, read from the data directory.
+OPTIONS_FILE = "csv_options.json"
+
+
+@dataclass
+class CsvOptions:
+    """Options for reading CSV files, detected by DuckDB where None."""
+
+    sample_size: Optional[int] = None
+    delimiter: Optional[str] = None
+    header: Optional[bool] = None
+    types: dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, options: dict) -> "CsvOptions":
+        known = {f.name for f in fields(cls)}
+        if unknown := set(options) - known:
+            raise ValueError(f"Unknown CSV options: {', '.join(sorted(unknown))}")
+        return cls(**options)
+
+    @classmethod
+    def from_args(cls, args: Namespace) -> "CsvOptions":
+        return cls(
+            args.csv_sample_size, args.csv_delimiter, args.csv_header, args.csv_types
+        )
+
+    def merged(self, other: "CsvOptions") -> "CsvOptions":
+        """These options, overridden by those set in ``other``."""
+        return replace(
+            self,
+            sample_size=other.sample_size or self.sample_size,
+            delimiter=other.delimiter or self.delimiter,
+            header=self.header if other.header is None else other.header,
+            types={**self.types, **other.types},
+        )
+
+    def key(self) -> str:
+        return json.dumps(asdict(self), sort_keys=True)
+
+    def arguments(self) -> list[str]:
+        """The named arguments of ``read_csv`` setting these options."""
+        arguments = []
+        if self.sample_size is not None:
+            arguments.append(f"sample_size = {self.sample_size}")
+        if self.delimiter is not None:
+            arguments.append(f"delim = {quote_literal(self.delimiter)}")
+        if self.header is not None:
+            arguments.append(f"header = {str(self.header).lower()}")
+        if self.types:
+            arguments.append(f"types = {_struct(self.types)}")
+        return arguments
+
+
+def parse_types(text: str) -> dict[str, str]:
+    """Column types given as ``name=TYPE,name=TYPE``."""
+    types = {}
+    # Commas inside parentheses belong to types like DECIMAL(18,2).
+    items = (item.strip() for item in re.split(r",(?![^(]*\))", text))
+    for item in filter(None, items):
+        name, _, data_type = item.partition("=")
+        if not name.strip() or not data_type.strip():
+            raise ValueError(f"Expected name=TYPE, got {item!r}")
+        types[name.strip()] = data_type.strip()
+    return types
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        "--csv-delimiter", help="Delimiter of CSV files, instead of detecting it"
+    )
+    parser.add_argument(
+        "--csv-header",
+        action=BooleanOptionalAction,
+        help="Whether CSV files start with a header, instead of detecting it",
+    )
+    parser.add_argument(
+        "--csv-sample-size",
+        type=int,
+        help="Rows of each CSV file sampled to detect its dialect and types",
+    )
+    parser.add_argument(
+        "--csv-types",
+        type=_types,
+        default={},
+        metavar="NAME=TYPE,...",
+        help="Types of CSV columns, e.g. 'id=VARCHAR,amount=DECIMAL(18,2)'",
+    )
+
+
+def _types(text: str) -> dict[str, str]:
+    try:
+        return parse_types(text)
+    except ValueError as e:
+        raise ArgumentTypeError(str(e))
+
+
+def directory_options(directory: Path) -> list[tuple[str, CsvOptions]]:
+    """The options in ``directory``'s options file, by the file name
+    pattern they apply to. ``"*"`` applies to every file."""
+    try:
+        entries = json.loads((directory / OPTIONS_FILE).read_text())
+    except FileNotFoundError:
+        return []
+    return [(pattern, CsvOptions.from_dict(o)) for pattern, o in entries.items()]
+
+
+def options_for(path: Path, defaults: CsvOptions) -> CsvOptions:
+    """The options to read ``path`` with: ``defaults``, overridden by the
+    entries of its directory's options file matching its name, later
+    entries winning."""
+    options = defaults
+    for pattern, file_options in directory_options(path.parent):
+        if fnmatch.fnmatch(path.name, pattern):
+            options = options.merged(file_options)
+    return options
+
+
+@dataclass(frozen=True)
+class Dialect:
+    """The format and schema of a CSV file, as sniffed by DuckDB."""
+
+    delimiter: str
+    quote: str
+    escape: str
+    new_line: str
+    comment: str
+    skip: int
+    header: bool
+    columns: tuple[tuple[str, str], ...]
+    date_format: Optional[str] = None
+    timestamp_format: Optional[str] = None
+
+    @classmethod
+    def sniff(
+        cls, conn: duckdb.DuckDBPyConnection, path: Path, options: CsvOptions
+    ) -> "Dialect":
+        arguments = "".join(f", {a}" for a in options.arguments())
+        row = conn.sql(
+            "SELECT Delimiter, Quote, Escape, NewLineDelimiter, Comment, "
+            "SkipRows, HasHeader, Columns, DateFormat, TimestampFormat "
+            f"FROM sniff_csv({quote_literal(str(path))}{arguments})"
+        ).fetchone()
+        *dialect, columns, date_format, timestamp_format = row
+        columns = tuple((c["name"], c["type"]) for c in columns)
+        return cls(*dialect, columns, date_format, timestamp_format)
+
+    @classmethod
+    def from_dict(cls, dialect: dict) -> "Dialect":
+        columns = tuple(tuple(column) for column in dialect.pop("columns"))
+        return cls(columns=columns, **dialect)
+
+    def arguments(self) -> list[str]:
+        """The named arguments of ``read_csv`` reading files of this
+        dialect without sniffing them."""
+        arguments = [
+            "auto_detect = false",
+            f"delim = {quote_literal(self.delimiter)}",
+            f"quote = {quote_literal(self.quote)}",
+            f"escape = {quote_literal(self.escape)}",
+            f"new_line = {quote_literal(self.new_line)}",
+            f"skip = {self.skip}",
+            f"header = {str(self.header).lower()}",
+            f"columns = {_struct(dict(self.columns))}",
+        ]
+        # DuckDB reports a NUL comment character for files without comments.
+        if self.comment and self.comment != "\x00":
+            arguments.append(f"comment = {quote_literal(self.comment)}")
+        if self.date_format:
+            arguments.append(f"dateformat = {quote_literal(self.date_format)}")
+        if self.timestamp_format:
+            arguments.append(
+                f"timestampformat = {quote_literal(self.timestamp_format)}"
+            )
+        return arguments
+
+
+class DialectCache:
+    """Dialects of CSV files, by their first line and the options they were
+    sniffed with."""
+
+    # Name of the file dialects are kept in, in a cache directory.
+    FILE = "csv_dialects.json"
+
+    path: Optional[Path]
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dialects = self._load()
+
+    def get(self, file: Path, options: CsvOptions) -> Optional[Dialect]:
+        try:
+            key = self._key(file, options)
+        except OSError:
+            # Left for DuckDB to report when it reads the file.
+            return None
+        with self._lock:
+            dialect = self._dialects.get(key)
+        return Dialect.from_dict(dict(dialect)) if dialect is not None else None
+
+    def sniff(
+        self, conn: duckdb.DuckDBPyConnection, file: Path, options: CsvOptions
+    ) -> Dialect:
+        """Sniffs the dialect of ``file`` and remembers it for files
+        starting like it."""
+        dialect = Dialect.sniff(conn, file, options)
+        key = self._key(file, options)
+        with self._lock:
+            self._dialects[key] = asdict(dialect)
+            self._save()
+        return dialect
+
+    def discard(self, file: Path, options: CsvOptions) -> bool:
+        """Forgets the dialect of files starting like ``file``, returning
+        whether there was one."""
+        key = self._key(file, options)
+        with self._lock:
+            if self._dialects.pop(key, None) is None:
+                return False
+            self._save()
+        return True
+
+    @staticmethod
+    def _key(file: Path, options: CsvOptions) -> str:
+        opener = gzip.open if file.name.lower().endswith(".gz") else open
+        with opener(file, "rb") as f:
+            first_line = f.readline()
+        digest = hashlib.sha1(first_line)
+        digest.update(options.key().encode())
+        digest.update(file.suffix.lower().encode())
+        return digest.hexdigest()
+
+    def _load(self) -> dict[str, dict]:
+        if self.path is None:
+            return {}
+        try:
+            return json.loads(self.path.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        partial = self.path.with_suffix(".partial")
+        partial.write_text(json.dumps(self._dialects, indent=2))
+        os.replace(partial, self.path)
+
+
+def _struct(items: dict[str, str]) -> str:
+    pairs = ", ".join(
+        f"{quote_literal(k)}: {quote_literal(v)}" for k, v in items.items()
+    )
+    return "{" + pairs + "}"
@@ -0,0 +1,147 @@
+import glob
+import os
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Sequence
+
+READERS = {
+    ".csv": "read_csv_auto",
+    ".csv.gz": "read_csv_auto",
+    ".parquet": "read_parquet",
+    ".json": "read_json_auto",
+    ".jsonl": "read_json_auto",
+    ".ndjson": "read_json_auto",
+    ".json.gz": "read_json_auto",
+}
+
+# A name ending in a number or date, like events-2024-01 or part_0003.
+PARTITIONED_NAME = re.compile(r"^(?P<prefix>.*[^\d\-_.])[\-_.]*\d[\d\-_.]*$")
+
+
+def suffix(path: Path) -> Optional[str]:
+    """The data file suffix of ``path``, e.g. ``.csv.gz``, or None if it
+    isn't a data file."""
+    name = path.name.lower()
+    matches = [s for s in READERS if name.endswith(s) and len(name) > len(s)]
+    return max(matches, key=len, default=None)
+
+
+def is_data_file(path: Path) -> bool:
+    return suffix(path) is not None
+
+
+def is_csv(source: "Path | FileGroup") -> bool:
+    path = Path(source.pattern) if isinstance(source, FileGroup) else source
+    return suffix(path) in (".csv", ".csv.gz")
+
+
+def table_name(path: Path) -> str:
+    stem = path.name[: -len(s)] if (s := suffix(path)) else path.stem
+    return stem.replace("-", "_").replace(".", "_")
+
+
+@dataclass(frozen=True)
+class FileGroup:
+    """The files matching the glob ``pattern``, read as table ``name``."""
+
+    name: str
+    pattern: str
+
+    @classmethod
+    def from_pattern(cls, pattern: str, name: Optional[str] = None):
+        pattern = os.path.abspath(os.path.expanduser(pattern))
+        if name is None:
+            # The name of the files up to the first wildcard, as in
+            # events-*.csv, or else the directory holding them.
+            head, tail = os.path.split(pattern)
+            literal = re.split(r"[*?\[]", tail)[0].rstrip("-_.")
+            name = literal or os.path.basename(re.split(r"[*?\[]", head)[0].rstrip("/"))
+            name = name.replace("-", "_").replace(".", "_")
+        return cls(name, pattern)
+
+    def paths(self) -> list[Path]:
+        return sorted(Path(p) for p in glob.glob(self.pattern, recursive=True))
+
+
+def source(name: str, location: str) -> "Path | FileGroup":
+    """The file or file group at ``location``, as named in the catalog."""
+    if glob.has_magic(location):
+        return FileGroup(name, location)
+    return Path(location)
+
+
+def source_name(source: "Path | FileGroup") -> str:
+    return source.name if isinstance(source, FileGroup) else table_name(source)
+
+
+def location(source: "Path | FileGroup") -> str:
+    if isinstance(source, FileGroup):
+        return source.pattern
+    return str(source.resolve())
+
+
+def read_function(source: "Path | FileGroup", arguments: Sequence[str] = ()) -> str:
+    """The DuckDB table function call reading ``source``, with extra named
+    ``arguments`` such as a CSV delimiter."""
+    extra = "".join(f", {argument}" for argument in arguments)
+    if isinstance(source, FileGroup):
+        reader = READERS.get(suffix(Path(source.pattern)) or "", "read_csv_auto")
+        return (
+            f"{reader}('{source.pattern}', union_by_name = true, filename = true"
+            f"{extra})"
+        )
+    reader = READERS.get(suffix(source) or "", "read_csv_auto")
+    return f"{reader}('{source}'{extra})"
+
+
+def data_sources(directory: Path, group=False) -> list["Path | FileGroup"]:
+    """The data files of ``directory``, and a file group per subdirectory
+    holding Hive partitions. With ``group``, files whose names only
+    differ in a trailing number or date are grouped as well."""
+    files = sorted(path for path in directory.iterdir() if is_data_file(path))
+    sources: list[Path | FileGroup] = []
+    if group:
+        groups, files = _group_partitioned_names(directory, files)
+        sources += groups
+    sources += files
+    for subdirectory in sorted(p for p in directory.iterdir() if p.is_dir()):
+        if (hive := _hive_partitions(subdirectory)) is not None:
+            sources.append(hive)
+    return sources
+
+
+def _group_partitioned_names(
+    directory: Path, files: list[Path]
+) -> tuple[list[FileGroup], list[Path]]:
+    candidates: dict[tuple[str, str], list[Path]] = defaultdict(list)
+    for path in files:
+        stem = path.name[: -len(suffix(path))]
+        if match := PARTITIONED_NAME.match(stem):
+            candidates[match["prefix"], suffix(path)].append(path)
+
+    groups, grouped = [], set()
+    for (prefix, file_suffix), paths in candidates.items():
+        group = FileGroup.from_pattern(
+            str(directory / f"{glob.escape(prefix)}*{file_suffix}"),
+            table_name(Path(prefix + file_suffix)),
+        )
+        # Only group when the pattern matches nothing but the partitions.
+        members = {Path(os.path.abspath(path)) for path in paths}
+        if len(paths) > 1 and set(group.paths()) == members:
+            groups.append(group)
+            grouped.update(paths)
+    return groups, [path for path in files if path not in grouped]
+
+
+def _hive_partitions(directory: Path) -> Optional[FileGroup]:
+    if not any("=" in p.name for p in directory.iterdir() if p.is_dir()):
+        return None
+    suffixes = {suffix(p) for p in directory.rglob("*") if is_data_file(p)}
+    if len(suffixes) != 1:
+        return None
+    (file_suffix,) = suffixes
+    return FileGroup.from_pattern(
+        str(directory / "**" / f"*{file_suffix}"), table_name(directory)
+    )
@@ -1,27 +1,230 @@
-from dataclasses import dataclass
+import bisect
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+from enum import Enum
+from itertools import groupby
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Iterable, Optional
 
 import duckdb
-from polars import DataFrame
-from qtpy.QtCore import QAbstractTableModel, QObject, Qt, Signal
+import pyarrow as pa
+
+import datafiles
+from csvdialect import CsvOptions, DialectCache, options_for
+from datafiles import FileGroup, data_sources, read_function, source_name
+from engine import EngineSettings
+from export import ExportJob, ExportOptions
+from importcache import Fingerprint, ImportCache
+from profiling import QueryProfile, explain_analyze
+from qtcompat import QObject, QThreadPool, Signal, Slot
+from resultcache import ResultCache
+from resultview import ResultView
+
+# Polars and plotting are only needed for some results, so they are
+# imported when first used rather than slowing down startup.
+if TYPE_CHECKING:
+    from polars import DataFrame
+
+    from plotdata import PlotSource
+    from resultmodel import QueryResultModel
+
+
+class ImportMode(Enum):
+    """How a file is brought into the database.
+
+    ``TABLE`` copies the whole file into memory up front. ``VIEW`` only
+    registers a view over ``read_csv_auto``, so the file is scanned (with
+    projections and filters pushed down) whenever the view is queried.
+    """
+
+    TABLE = "TABLE"
+    VIEW = "VIEW"
+
+
+class SampleMethod(Enum):
+    RESERVOIR = "reservoir"
+    PERCENT = "percent"
+    FIRST_ROWS = "first"
+
+
+@dataclass
+class Sample:
+    """Which rows of a file a sampled import keeps: a uniform sample of
+    ``size`` rows or ``size`` percent of them, or its first ``size`` rows.
+
+    Only taking the first rows stops reading the file early. The other
+    methods still scan all of it, but only keep the sample in memory.
+    """
+
+    method: SampleMethod = SampleMethod.RESERVOIR
+    size: float = 100_000
+
+    @classmethod
+    def parse(cls, text: str):
+        """Parses ``method:size``, as in ``reservoir:100000``, ``percent:1``
+        or ``first:5000``."""
+        method, _, size = text.partition(":")
+        try:
+            return cls(SampleMethod(method), float(size))
+        except ValueError:
+            raise ValueError(
+                f"Invalid sample {text!r}, expected one of "
+                + ", ".join(f"{m.value}:<size>" for m in SampleMethod)
+            ) from None
+
+    def clause(self) -> str:
+        if self.method is SampleMethod.RESERVOIR:
+            return f"USING SAMPLE reservoir({int(self.size)} ROWS) REPEATABLE (0)"
+        if self.method is SampleMethod.PERCENT:
+            return f"USING SAMPLE {self.size:g} PERCENT (bernoulli, 0)"
+        return f"LIMIT {int(self.size)}"
+
+    def __str__(self):
+        if self.method is SampleMethod.RESERVOIR:
+            return f"{int(self.size)} random rows"
+        if self.method is SampleMethod.PERCENT:
+            return f"{self.size:g}% of rows"
+        return f"first {int(self.size)} rows"
+
+
+# Sampled tables are marked with a comment naming the file they came from,
+# so they can be told apart, and loaded in full, from the catalog alone.
+SAMPLE_COMMENT = re.compile(r"^Sample \((?P<sample>.*)\) of (?P<source>.*)$")
+
+
+@dataclass
+class ImportOptions:
+    mode: ImportMode = ImportMode.TABLE
+    cache: Optional[ImportCache] = None
+    sample: Optional[Sample] = None
+    # Import next to existing tables and swap them in once complete.
+    replace: bool = False
+    group_files: bool = False
+    csv: CsvOptions = field(default_factory=CsvOptions)
+    dialects: Optional[DialectCache] = None
 
 
 @dataclass
 class Table:
     name: str
     columns: list
+    kind: str = "BASE TABLE"
+    comment: str = ""
+
+    @property
+    def is_view(self):
+        return self.kind == "VIEW"
+
+    @property
+    def sample(self) -> Optional[str]:
+        """How the rows of a sampled table were picked, None for others."""
+        match = SAMPLE_COMMENT.match(self.comment)
+        return match["sample"] if match else None
+
+    @property
+    def source(self) -> "Optional[Path | FileGroup]":
+        """The file or files a sampled table was sampled from."""
+        match = SAMPLE_COMMENT.match(self.comment)
+        return datafiles.source(self.name, match["source"]) if match else None
 
     @classmethod
-    def from_file(cls, conn, path):
-        name = path.stem.replace("-", "_")
-        conn.sql(f"CREATE TABLE {name} AS SELECT * FROM read_csv_auto('{path}')")
+    def from_file(
+        cls, conn, path: "Path | FileGroup", options: Optional[ImportOptions] = None
+    ):
+        options = options or ImportOptions()
+        name = cls.create_from_file(conn, path, options)
         columns = cls._get_columns(conn, name)
-        return cls(name, columns)
+        if options.sample is not None:
+            return cls(name, columns, comment=_sample_comment(path, options.sample))
+        kind = "VIEW" if options.mode is ImportMode.VIEW else "BASE TABLE"
+        return cls(name, columns, kind)
+
+    @staticmethod
+    def create_from_file(
+        conn: duckdb.DuckDBPyConnection,
+        path: "Path | FileGroup",
+        options: Optional[ImportOptions] = None,
+    ) -> str:
+        """Creates a table or view named after ``path`` from its contents.
+        A file group is read with one scan of all of its files."""
+        options = options or ImportOptions()
+        name = source_name(path)
+        if not datafiles.is_csv(path):
+            arguments = []
+        elif isinstance(path, FileGroup):
+            arguments = options.csv.arguments()
+        elif options.dialects is None:
+            arguments = options_for(path, options.csv).arguments()
+        else:
+            csv = options_for(path, options.csv)
+            # Views read the file on every query, so they get the dialect
+            # of the file itself rather than one that may not fit it.
+            dialect = options.dialects.get(path, csv)
+            if dialect is not None and options.mode is ImportMode.TABLE:
+                source = read_function(path, dialect.arguments())
+                try:
+                    Table._create(conn, name, path, source, options)
+                    return name
+                except duckdb.Error:
+                    # Files starting alike can still differ further down.
+                    options.dialects.discard(path, csv)
+            arguments = options.dialects.sniff(conn, path, csv).arguments()
+        Table._create(conn, name, path, read_function(path, arguments), options)
+        return name
+
+    @staticmethod
+    def _create(
+        conn: duckdb.DuckDBPyConnection,
+        name: str,
+        path: "Path | FileGroup",
+        source: str,
+        options: ImportOptions,
+    ):
+        select, comment = f"SELECT * FROM {source}", ""
+        if options.sample is not None:
+            # Caching would take reading the whole file, which is what
+            # sampling is there to avoid.
+            select += f" {options.sample.clause()}"
+            comment = _sample_comment(path, options.sample).replace("'", "''")
+        elif (
+            options.cache is not None
+            and options.mode is ImportMode.TABLE
+            and isinstance(path, Path)
+            and not source.startswith("read_parquet")
+        ):
+            # Parquet files are read as fast as their copy in the cache,
+            # and views are there to read the file as it is now.
+            cached = options.cache.cached_file(conn, path, source)
+            select = f"SELECT * FROM read_parquet('{cached}')"
+
+        if not options.replace:
+            kind = "TABLE" if comment else options.mode.value
+            conn.sql(f"CREATE {kind} {name} AS {select}")
+            if comment:
+                conn.sql(f"COMMENT ON TABLE {name} IS '{comment}'")
+            return
+
+        # The table is swapped in once complete, so it stays queryable, and
+        # stays as it was if the import fails.
+        staged = f"{name}__staged"
+        conn.sql(f"CREATE OR REPLACE TABLE {staged} AS {select}")
+        if comment:
+            conn.sql(f"COMMENT ON TABLE {staged} IS '{comment}'")
+        conn.sql(
+            f"BEGIN; DROP TABLE IF EXISTS {name}; "
+            f"ALTER TABLE {staged} RENAME TO {name}; COMMIT"
+        )
 
     @classmethod
-    def from_existing(cls, conn, name):
-        return Table(name, cls._get_columns(conn, name))
+    def from_existing(cls, conn, name, kind="BASE TABLE"):
+        return Table(name, cls._get_columns(conn, name), kind)
 
     @staticmethod
     def _get_columns(conn: duckdb.DuckDBPyConnection, name):
@@ -32,58 +235,900 @@ class Table:
         ).fetchall()
 
 
+def _sample_comment(path: "Path | FileGroup", sample: Sample) -> str:
+    return f"Sample ({sample}) of {datafiles.location(path)}"
+
+
+# Statements that can't add, drop or alter tables and views.
+CATALOG_PRESERVING_STATEMENTS = {
+    duckdb.StatementType.SELECT,
+    duckdb.StatementType.INSERT,
+    duckdb.StatementType.UPDATE,
+    duckdb.StatementType.DELETE,
+    duckdb.StatementType.EXPLAIN,
+    duckdb.StatementType.SET,
+    duckdb.StatementType.VARIABLE_SET,
+    duckdb.StatementType.ANALYZE,
+}
+
+
+def changes_catalog(query: str) -> bool:
+    try:
+        statements = duckdb.extract_statements(query)
+    except duckdb.Error:
+        return True
+    return any(s.type not in CATALOG_PRESERVING_STATEMENTS for s in statements)
+
+
+# Statements that can't change the contents of any table.
+READ_ONLY_STATEMENTS = {
+    duckdb.StatementType.SELECT,
+    duckdb.StatementType.EXPLAIN,
+    duckdb.StatementType.SET,
+    duckdb.StatementType.VARIABLE_SET,
+    duckdb.StatementType.TRANSACTION,
+}
+
+# Only plain names are taken as targets. Quoted ones can hold anything,
+# so statements writing to them are taken to write anywhere.
+DML_TARGET = re.compile(
+    r"^\s*(?:INSERT\s+(?:OR\s+\w+\s+)?INTO|UPDATE|DELETE\s+FROM)\s+"
+    r"(?:\w+\.)*(\w+)(?=[\s(]|$)",
+    re.IGNORECASE,
+)
+
+# Queries whose result can differ from one run to the next, however the
+# tables they read stay the same.
+VOLATILE = re.compile(
+    r"\b(?:random|uuid|gen_random_uuid|setseed|nextval|currval|getvariable"
+    r"|now|today|current_date|current_time|current_timestamp|localtime"
+    r"|localtimestamp|transaction_timestamp|get_current_time"
+    r"|get_current_timestamp|tablesample)\b|\busing\s+sample\b",
+    re.IGNORECASE,
+)
+
+
+def rerunnable_select(query: Optional[str]) -> Optional[str]:
+    """The last statement of ``query`` if it is a SELECT, whose result
+    running it again gives back."""
+    if query is None:
+        return None
+    try:
+        last = duckdb.extract_statements(query)[-1]
+    except (duckdb.Error, IndexError):
+        return None
+    return last.query if last.type == duckdb.StatementType.SELECT else None
+
+
+def written_tables(query: str) -> Optional[set[str]]:
+    """Lowercased names of the tables ``query`` writes to, or None if that
+    can't be told, as for DDL or statements that fail to parse."""
+    try:
+        statements = duckdb.extract_statements(query)
+    except duckdb.Error:
+        return None
+
+    written = set()
+    for statement in statements:
+        if statement.type in READ_ONLY_STATEMENTS:
+            continue
+        if (match := DML_TARGET.match(statement.query)) is None:
+            return None
+        written.add(match[1].lower())
+    return written
+
+
 class DB(QObject):
     table_added = Signal(Table)
     table_dropped = Signal(Table)
+    table_changed = Signal(Table)
     error_occurred = Signal(duckdb.Error)
+    file_imported = Signal(object, object)
+    query_started = Signal(str)
+    query_finished = Signal()
+    import_started = Signal(int)
+    import_progress = Signal(int, int)
+    import_finished = Signal()
+    message_logged = Signal(str)
+    query_profiled = Signal(QueryProfile)
+    profile_updated = Signal(QueryProfile)
+    statement_finished = Signal(object)
+    result_view_reset = Signal()
+
+    RESULT_CACHE_BYTES = 256 * 1024 * 1024
 
     schema_tracker: "SchemaTracker"
-    result_model: "QueryResultModel"
+    result_model: Optional["QueryResultModel"]
+    result_cache: ResultCache
+    import_options: ImportOptions
+    settings: EngineSettings
+    result_view: ResultView
+    script_results: list["StatementResult"]
 
-    def __init__(self, conn, schema_tracker, result_model):
+    def __init__(
+        self, conn, schema_tracker, result_model=None, shared: Optional["DB"] = None
+    ):
         super().__init__()
         self._conn = conn
+        # Queries of a session run on the same cursor, one at a time, so
+        # temporary tables, variables and transactions carry over.
+        self._cursor = conn.cursor()
+        self._cursor_lock = threading.Lock()
+        self._job: Optional[QueryJob | ScriptJob] = None
+        self.script_results = []
+        self.result_view = ResultView()
+        self._result_version = 0
+        self._profile: Optional[QueryProfile] = None
         self.result_model = result_model
         self.schema_tracker = schema_tracker
         self.schema_tracker.table_added.connect(self.table_added.emit)
         self.schema_tracker.table_dropped.connect(self.table_dropped.emit)
+        self.schema_tracker.table_changed.connect(self.table_changed.emit)
+        if shared is not None:
+            self.import_options = shared.import_options
+            self.settings = shared.settings
+            self.result_cache = shared.result_cache
+            self._sessions = shared._sessions
+        else:
+            self.import_options = ImportOptions(dialects=DialectCache())
+            self.settings = EngineSettings()
+            self.result_cache = ResultCache(self.RESULT_CACHE_BYTES)
+            self._sessions = []
+            self.schema_tracker.table_dropped.connect(self._invalidate_table)
+            self.schema_tracker.table_changed.connect(self._invalidate_table)
+        self._sessions.append(self)
+        if result_model is not None:
+            result_model.error_occurred.connect(self.error_occurred.emit)
+            result_model.result_complete.connect(self._cache_result)
+            result_model.result_complete.connect(self._complete_profile)
+            result_model.result_truncated.connect(self._result_truncated)
+            result_model.max_result_bytes = self.settings.max_result_bytes
 
     @classmethod
-    def from_connection(cls):
+    def from_connection(cls, headless=False):
+        """A database on a new in-memory connection. Headless ones have no
+        result model, so they can be used without Qt."""
         conn = duckdb.connect()
+        if headless:
+            return cls(conn, SchemaTracker(conn))
+
+        from resultmodel import QueryResultModel
+
         return cls(conn, SchemaTracker(conn), QueryResultModel())
 
+    def new_session(self) -> "DB":
+        """Another handle on this database, as for a query tab.
+
+        Sessions share the tables, import options, engine settings and
+        result cache, but each runs its queries on a cursor of its own and
+        keeps its own result, script and running query. A long query in
+        one session doesn't hold up the others, and cancelling it leaves
+        theirs running.
+        """
+        from resultmodel import QueryResultModel
+
+        return DB(self._conn, self.schema_tracker, QueryResultModel(), shared=self)
+
+    def close(self):
+        """Cancels the running query of a session no longer used. It stops
+        signalling, so whatever showed its results can go away."""
+        self.cancel_query()
+        self.blockSignals(True)
+        if self in self._sessions:
+            self._sessions.remove(self)
+
     @property
     def tables(self):
         return self.schema_tracker.tables
 
-    def create_tables_from_data_dir(self, data_dir: Path):
-        for csv_path in data_dir.glob("*.csv"):
-            self.create_table_from_file(csv_path)
+    @property
+    def _model(self) -> "QueryResultModel":
+        assert self.result_model is not None, "Headless databases show no results"
+        return self.result_model
+
+    def apply_settings(self, settings: EngineSettings) -> bool:
+        """Applies ``settings`` to the engine, keeping the previous ones if
+        DuckDB rejects any of them."""
+        try:
+            settings.apply(self._conn)
+        except duckdb.Error as e:
+            self.settings.apply(self._conn)
+            self.error_occurred.emit(e)
+            return False
+
+        for session in self._sessions:
+            session.settings = settings
+            if session.result_model is not None:
+                session.result_model.max_result_bytes = settings.max_result_bytes
+        return True
+
+    def table(self, name) -> Optional[Table]:
+        return next((t for t in self.tables if t.name == name), None)
+
+    def cursor(self) -> duckdb.DuckDBPyConnection:
+        return self._conn.cursor()
+
+    def create_tables_from_data_dir(
+        self, data_dir: Path, background=False
+    ) -> "ImportJob":
+        sources = data_sources(data_dir, self.import_options.group_files)
+        return self.create_tables_from_files(sources, background)
+
+    def create_tables_from_files(
+        self, paths: "Iterable[Path | FileGroup]", background=False
+    ) -> "ImportJob":
+        return self._import(paths, self.import_options, background)
+
+    def reimport_files(self, paths: Iterable[Path]) -> "ImportJob":
+        """Imports files that were rewritten again in the background. Each
+        table is swapped for the new one once it's complete, so it stays
+        queryable meanwhile, and stays as it was if the import fails."""
+        options = replace(self.import_options, replace=True)
+        return self._import(paths, options, background=True)
+
+    def load_full_table(self, name) -> Optional["ImportJob"]:
+        """Imports the whole file a sampled table was sampled from in the
+        background. The sample stays queryable until the full table
+        replaces it."""
+        if (table := self.table(name)) is None or table.source is None:
+            self.message_logged.emit(f"{name} is not a sampled table")
+            return None
+        options = ImportOptions(
+            cache=self.import_options.cache,
+            replace=True,
+            csv=self.import_options.csv,
+            dialects=self.import_options.dialects,
+        )
+        return self._import([table.source], options, background=True)
+
+    def _import(
+        self,
+        paths: "Iterable[Path | FileGroup]",
+        options: ImportOptions,
+        background: bool,
+    ) -> "ImportJob":
+        job = ImportJob(self._conn, paths, options)
+        job.file_imported.connect(self.file_imported)
+        if options.replace:
+            job.file_imported.connect(self._table_replaced)
+        job.file_failed.connect(self._file_failed)
+        job.progress.connect(self.import_progress)
+        job.finished.connect(self._import_finished)
+
+        self.import_started.emit(len(job.paths))
+        if background:
+            job.start()
+        else:
+            job.run()
+        return job
 
     def create_table_from_file(self, csv_path):
         try:
-            name = csv_path.stem.replace("-", "_")
-            self._conn.sql(
-                f"CREATE TABLE {name} AS SELECT * FROM read_csv_auto('{csv_path}')"
-            )
+            Table.create_from_file(self._conn, csv_path, self.import_options)
             self.schema_tracker.refresh()
         except duckdb.Error as e:
             self.error_occurred.emit(e)
 
+    def materialize_view(self, name) -> "QueryJob":
+        """Replaces a view with a table holding its current contents, in
+        the background. It runs apart from the query of the session,
+        leaving its result, and the query running if any, alone."""
+        materialized = f"{name}__materialized"
+        cursor = self._conn.cursor()
+        job = QueryJob(
+            cursor,
+            "BEGIN; "
+            f"CREATE TABLE {materialized} AS SELECT * FROM {name}; "
+            f"DROP VIEW {name}; "
+            f"ALTER TABLE {materialized} RENAME TO {name}; "
+            "COMMIT",
+        )
+        job.error_occurred.connect(self._report_error)
+        job.finished.connect(self._materialized)
+        job.finished.connect(lambda: cursor.close())
+        job.start()
+        return job
+
+    def plot_source(self) -> Optional["PlotSource"]:
+        """The current result, for plotting.
+
+        Results of a SELECT are plotted from a view over the query, so
+        nothing runs until a plot reads the columns it needs. Anything
+        else, like INSERT ... RETURNING, can't be run twice, so the whole
+        stream is fetched and scanned as Arrow instead.
+        """
+        from plotdata import PlotSource
+
+        stream = self._model.stream
+        cursor = self._conn.cursor()
+        try:
+            if (query := self._rerunnable_query(stream)) is not None:
+                return PlotSource.from_query(cursor, query)
+            return PlotSource.from_arrow(cursor, self._model.to_arrow())
+        except duckdb.Error as e:
+            cursor.close()
+            self.error_occurred.emit(e)
+            return None
+
+    def export_results(self, path: Path, options: ExportOptions) -> ExportJob:
+        """Writes the current result to ``path`` in the background.
+
+        Like for plots, the result of a SELECT is written by running it
+        again. Anything else is exported from the fetched stream.
+        """
+        stream = self._model.stream
+        query, source = self._rerunnable_query(stream), None
+        if query is None:
+            query, source = "SELECT * FROM export_source", stream.to_arrow()
+
+        job = ExportJob(self._conn, query, path, options, source)
+        job.exported.connect(self._exported)
+        job.error_occurred.connect(self._report_error)
+        job.start()
+        return job
+
     def sql(self, query):
+        self._reset_view(query)
+        if self._serve_from_cache(query):
+            return
+
+        self._end_result_stream()
         try:
-            result = self._conn.sql(query)
+            with self._cursor_lock:
+                result = ResultStream.from_query(self._cursor, query)
+            self._set_result(result)
+        except duckdb.Error as e:
+            self.error_occurred.emit(e)
+
+        self.invalidate_written(query)
+        if changes_catalog(query):
             self.schema_tracker.refresh()
-            if result:
-                self.result_model.set_result(result.pl())
+
+    def sql_in_background(self, query) -> Optional["QueryJob"]:
+        """Runs ``query`` on a worker thread, or returns None if its result
+        was served from the cache."""
+        self._reset_view(query)
+        return self._query_in_background(query)
+
+    def sort_results(self, column: str, descending=False) -> Optional["QueryJob"]:
+        """Runs the query of the current result again, sorted by ``column``."""
+        if not self._can_change_view():
+            return None
+        self.result_view.order_by = column
+        self.result_view.descending = descending
+        return self._query_in_background(self.result_view.to_sql())
+
+    def filter_results(self, column: str, text: str) -> Optional["QueryJob"]:
+        """Runs the query of the current result again, keeping only the rows
+        matching ``text`` in ``column``, or all of them if it's empty."""
+        if not self._can_change_view():
+            return None
+        if text.strip():
+            self.result_view.filters[column] = text
+        elif self.result_view.filters.pop(column, None) is None:
+            return None
+        return self._query_in_background(self.result_view.to_sql())
+
+    def _reset_view(self, query: str):
+        self.result_view = ResultView(rerunnable_select(query))
+        self.result_view_reset.emit()
+
+    def _can_change_view(self) -> bool:
+        """Sorting and filtering wrap the query of the result in another
+        one, so DuckDB does the work and only the rows on screen are
+        fetched. That takes a SELECT to wrap."""
+        if self.result_view.query is None:
+            self.message_logged.emit(
+                "Only results of a SELECT can be sorted or filtered"
+            )
+            return False
+        if self.query_running:
+            self.message_logged.emit("Wait for the running query to finish")
+            return False
+        return True
+
+    def _query_in_background(self, query) -> Optional["QueryJob"]:
+        if self._serve_from_cache(query):
+            return None
+
+        self._end_result_stream()
+        job = QueryJob(self._cursor, query, self._cursor_lock)
+        job.result_ready.connect(self._set_result)
+        job.error_occurred.connect(self._report_error)
+        job.finished.connect(self._job_finished)
+
+        self._job = job
+        self.query_started.emit(query)
+        job.start()
+        return job
+
+    def run_script(self, script: str) -> "ScriptJob":
+        """Runs the statements of ``script`` one after the other on a worker
+        thread, stopping at the first that fails.
+
+        Each statement's timing and row count goes to ``script_results``
+        as soon as it finishes, along with the result of each query, to be
+        shown later with ``show_statement_result``.
+        """
+        self._end_result_stream()
+        job = ScriptJob(
+            self._cursor, script, self._cursor_lock, self.settings.max_result_bytes
+        )
+        job.statement_finished.connect(self._statement_finished)
+        job.error_occurred.connect(self._script_failed)
+        job.finished.connect(self._job_finished)
+
+        self.script_results = []
+        self._job = job
+        self.query_started.emit(script)
+        job.start()
+        return job
+
+    def show_statement_result(self, index: int):
+        statement = self.script_results[index]
+        if statement.result is not None:
+            self._reset_view(statement.query)
+            stream = ResultStream.from_arrow(statement.result, statement.query)
+            stream.execute_seconds = statement.seconds
+            self._show_result(stream)
+
+    def cancel_query(self):
+        if self._job is not None:
+            self._job.cancel()
+
+    @property
+    def query_running(self):
+        return self._job is not None
+
+    def explain_analyze(self, profile: QueryProfile) -> Optional["ExplainJob"]:
+        """Adds the operator tree to ``profile`` in the background. Only
+        single SELECTs are run again for that, since anything else could
+        write twice."""
+        statements = duckdb.extract_statements(profile.query)
+        if [s.type for s in statements] != [duckdb.StatementType.SELECT]:
+            self.message_logged.emit("Only single SELECT queries can be profiled")
+            return None
+
+        job = ExplainJob(self._conn, profile)
+        job.plan_ready.connect(self.profile_updated)
+        job.error_occurred.connect(self._report_error)
+        job.start()
+        return job
+
+    def invalidate_written(self, query: str):
+        """Drops cached results of the tables ``query`` may have written."""
+        if (written := written_tables(query)) is None:
+            self.result_cache.clear()
+            return
+        for name in written:
+            self.result_cache.invalidate(name)
+
+    @staticmethod
+    def _rerunnable_query(stream: "ResultStream") -> Optional[str]:
+        """The SELECT a result came from, if running it again gives it back."""
+        return rerunnable_select(stream.query)
+
+    def _cacheable_tables(self, query: str) -> Optional[frozenset[str]]:
+        """Lowercased names of the tables a single SELECT reads, or None if
+        its result can't be cached. Views are left out, since the files
+        they read can change behind the database's back, and so are
+        queries sampling rows or calling volatile functions."""
+        if VOLATILE.search(query):
+            return None
+        try:
+            (statement,) = duckdb.extract_statements(query)
+            if statement.type != duckdb.StatementType.SELECT:
+                return None
+            names = duckdb.get_table_names(query, connection=self._conn)
+        except (duckdb.Error, ValueError):
+            return None
+
+        tables = {t.name.lower() for t in self.tables if not t.is_view}
+        read = frozenset(name.lower() for name in names)
+        return read if read and read <= tables else None
+
+    def _serve_from_cache(self, query: str) -> bool:
+        if (table := self.result_cache.get(query)) is not None:
+            self.query_started.emit(query)
+            self.message_logged.emit(f"Result cache hit: {table.num_rows} rows")
+            self._show_result(ResultStream.from_arrow(table, query), cached=True)
+            self.query_finished.emit()
+            return True
+
+        if self._cacheable_tables(query) is not None:
+            self.message_logged.emit("Result cache miss")
+        return False
+
+    def _end_result_stream(self):
+        """Stops fetching the current result, which the next query on the
+        cursor of the session ends. Rows not fetched yet would be missing
+        from it without notice."""
+        if self.result_model is not None:
+            self.result_model.stream.close()
+
+    @Slot(object)
+    def _set_result(self, result: Optional["ResultStream"]):
+        if result is not None:
+            self._show_result(result)
+
+    def _show_result(self, result: "ResultStream", cached=False):
+        self._result_version = self.result_cache.version
+        self._profile = None
+        self._model.set_result(result)
+        self._profile = QueryProfile(
+            result.query or "",
+            result.execute_seconds,
+            result.fetch_seconds,
+            self._model.reset_seconds,
+            result.row_count,
+            result.nbytes,
+            cached,
+            complete=not result.has_more,
+        )
+        self.query_profiled.emit(self._profile)
+
+    @Slot(object)
+    def _complete_profile(self, stream: "ResultStream"):
+        """Counts the whole result in its profile once it was read to the
+        end, rather than the rows fetched to show it first."""
+        if (profile := self._profile) is not None and not profile.complete:
+            profile.rows, profile.nbytes = stream.row_count, stream.nbytes
+            profile.complete = True
+            self.profile_updated.emit(profile)
+
+    @Slot(object)
+    def _cache_result(self, stream: "ResultStream"):
+        """Caches a result once it was read to the end, unless some table
+        was written while it was being read."""
+        query = stream.query
+        if (
+            query is None
+            or stream.spilled
+            or query in self.result_cache
+            or self._result_version != self.result_cache.version
+            or (tables := self._cacheable_tables(query)) is None
+        ):
+            return
+        self.result_cache.put(query, stream.to_arrow(), tables)
+
+    @Slot(int)
+    def _result_truncated(self, rows):
+        self.message_logged.emit(
+            f"Result truncated to its first {rows} rows, "
+            f"over the limit of {self.settings.max_result_mb} MB"
+        )
+
+    @Slot(Table)
+    def _invalidate_table(self, table: Table):
+        self.result_cache.invalidate(table.name.lower())
+
+    @Slot(object)
+    def _statement_finished(self, statement: "StatementResult"):
+        self.script_results.append(statement)
+        if statement.truncated:
+            self._result_truncated(statement.rows)
+        self.invalidate_written(statement.query)
+        if changes_catalog(statement.query):
+            self.schema_tracker.refresh()
+        self.statement_finished.emit(statement)
+
+    @Slot(Path)
+    def _exported(self, path):
+        self.message_logged.emit(f"Exported results to {path}")
+
+    @Slot(duckdb.Error)
+    def _script_failed(self, e):
+        statement = len(self.script_results) + 1
+        self.message_logged.emit(f"Script stopped at statement {statement}")
+        self.error_occurred.emit(e)
+
+    @Slot(duckdb.Error)
+    def _report_error(self, e):
+        self.error_occurred.emit(e)
+
+    @Slot(object, duckdb.Error)
+    def _file_failed(self, path, e):
+        self.error_occurred.emit(e)
+
+    @Slot(object, object)
+    def _table_replaced(self, path: "Path | FileGroup", fingerprint):
+        # Tables replaced with the same columns go unnoticed by the schema
+        # tracker, but results read from the old ones are stale.
+        self.result_cache.invalidate(source_name(path).lower())
+
+    @Slot()
+    def _materialized(self):
+        self.schema_tracker.refresh()
+
+    @Slot()
+    def _import_finished(self):
+        self.schema_tracker.refresh()
+        self.import_finished.emit()
+
+    @Slot()
+    def _job_finished(self):
+        # Scripts already took care of this after each statement.
+        if isinstance(job := self._job, QueryJob):
+            self.invalidate_written(job.query)
+            if job.changes_catalog:
+                self.schema_tracker.refresh()
+        self._job = None
+        self.query_finished.emit()
+
+
+# Query jobs mostly wait on DuckDB, which runs queries on threads of its
+# own, so they get a pool sized for sessions querying side by side rather
+# than for the cores of the machine.
+QUERY_THREADS = 16
+_query_pool: Optional[QThreadPool] = None
+
+
+def query_pool() -> QThreadPool:
+    global _query_pool
+    if _query_pool is None:
+        _query_pool = QThreadPool()
+        _query_pool.setMaxThreadCount(QUERY_THREADS)
+    return _query_pool
+
+
+class QueryJob(QObject):
+    """Runs a query on a cursor in a background thread, once the jobs
+    holding ``lock`` before it are done with the cursor.
+
+    The first batch of the result is fetched on the worker thread as well,
+    so receivers of ``result_ready`` get a stream that already has rows to
+    show. The stream pulls the remaining batches from the cursor until it
+    runs another query.
+    """
+
+    result_ready = Signal(object)
+    error_occurred = Signal(duckdb.Error)
+    finished = Signal()
+
+    def __init__(
+        self,
+        cursor: duckdb.DuckDBPyConnection,
+        query: str,
+        lock: Optional[threading.Lock] = None,
+    ):
+        super().__init__()
+        self.query = query
+        self.changes_catalog = changes_catalog(query)
+        self._cursor = cursor
+        self._lock = lock or threading.Lock()
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+
+    def start(self):
+        query_pool().start(self.run)
+
+    def cancel(self):
+        self._cancelled.set()
+        # Waiting for the cursor, the job would interrupt the one using it.
+        if self._running.is_set():
+            self._cursor.interrupt()
+
+    def run(self):
+        try:
+            with self._lock:
+                self._running.set()
+                if self._cancelled.is_set():
+                    raise duckdb.InterruptException("Query cancelled")
+                result = ResultStream.from_query(self._cursor, self.query)
+            self.result_ready.emit(result)
+        except duckdb.Error as e:
+            self.error_occurred.emit(e)
+        finally:
+            self.finished.emit()
+
+
+@dataclass
+class StatementResult:
+    """One statement of a script once run. ``rows`` counts the rows returned
+    by a query, or those changed by INSERT, UPDATE and DELETE. The result
+    of a query is ``truncated`` to its first batches when it's over the
+    size limit for results, and ``rows`` only counts those."""
+
+    index: int
+    query: str
+    type: duckdb.StatementType
+    seconds: float
+    rows: int
+    result: Optional[pa.Table] = None
+    truncated: bool = False
+
+
+class ScriptJob(QObject):
+    """Runs the statements of a script one at a time on a cursor in a
+    background thread, reporting each one as it finishes. Results of
+    queries are kept up to ``max_bytes`` each."""
+
+    statement_finished = Signal(object)
+    error_occurred = Signal(duckdb.Error)
+    finished = Signal()
+
+    def __init__(
+        self,
+        cursor: duckdb.DuckDBPyConnection,
+        script: str,
+        lock: Optional[threading.Lock] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        super().__init__()
+        self.query = script
+        self._max_bytes = max_bytes
+        self._cursor = cursor
+        self._lock = lock or threading.Lock()
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+
+    def start(self):
+        query_pool().start(self.run)
+
+    def cancel(self):
+        self._cancelled.set()
+        if self._running.is_set():
+            self._cursor.interrupt()
+
+    def run(self):
+        try:
+            with self._lock:
+                self._running.set()
+                statements = duckdb.extract_statements(self.query)
+                for index, statement in enumerate(statements):
+                    # Between statements, there is no query to interrupt.
+                    if self._cancelled.is_set():
+                        raise duckdb.InterruptException("Script cancelled")
+                    self.statement_finished.emit(self._run_statement(index, statement))
+        except duckdb.Error as e:
+            self.error_occurred.emit(e)
+        finally:
+            self.finished.emit()
+
+    def _run_statement(self, index: int, statement) -> StatementResult:
+        start = time.perf_counter()
+        self._cursor.execute(statement.query)
+        reader = self._cursor.fetch_record_batch(ResultStream.BATCH_SIZE)
+        batches, nbytes, truncated = [], 0, False
+        for batch in reader:
+            if self._max_bytes is not None and nbytes >= self._max_bytes:
+                truncated = True
+                break
+            batches.append(batch)
+            nbytes += batch.nbytes
+        table = pa.Table.from_batches(batches, schema=reader.schema)
+        seconds = time.perf_counter() - start
+
+        result = StatementResult(
+            index, statement.query, statement.type, seconds, 0, truncated=truncated
+        )
+        if statement.type != duckdb.StatementType.SELECT and table.column_names in (
+            ["Count"],
+            ["Success"],
+        ):
+            if table.column_names == ["Count"] and table.num_rows:
+                result.rows = table["Count"][0].as_py()
+        else:
+            result.rows, result.result = table.num_rows, table
+        return result
+
+
+class ExplainJob(QObject):
+    """Runs a profiled query again with EXPLAIN ANALYZE on its own cursor
+    in a background thread, filling in the plan of its profile."""
+
+    plan_ready = Signal(QueryProfile)
+    error_occurred = Signal(duckdb.Error)
+
+    def __init__(self, conn: duckdb.DuckDBPyConnection, profile: QueryProfile):
+        super().__init__()
+        self.profile = profile
+        self._cursor = conn.cursor()
+
+    def start(self):
+        query_pool().start(self.run)
+
+    def run(self):
+        try:
+            self.profile.plan = explain_analyze(self._cursor, self.profile.query)
+            self.plan_ready.emit(self.profile)
         except duckdb.Error as e:
             self.error_occurred.emit(e)
+        finally:
+            self._cursor.close()
+
+
+class ImportJob(QObject):
+    """Imports files in parallel on a pool of cursors.
+
+    Each worker thread borrows a cursor from the pool for one file at a
+    time, so DuckDB parses several files at once. Refreshing the schema is
+    left to the receiver of ``finished``, so it happens once per import
+    rather than once per file. ``file_imported`` comes with the
+    fingerprint the file had right before it was read, None for groups.
+    """
+
+    MAX_WORKERS = 8
+
+    file_imported = Signal(object, object)
+    file_failed = Signal(object, duckdb.Error)
+    progress = Signal(int, int)
+    finished = Signal()
+
+    paths: list["Path | FileGroup"]
+
+    def __init__(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        paths: "Iterable[Path | FileGroup]",
+        options: Optional[ImportOptions] = None,
+    ):
+        super().__init__()
+        self.paths = list(paths)
+        self.options = options or ImportOptions()
+        self._conn = conn
+
+    def start(self):
+        QThreadPool.globalInstance().start(self.run)
+
+    def run(self):
+        workers = max(1, min(self.MAX_WORKERS, os.cpu_count() or 1, len(self.paths)))
+        cursors = queue.SimpleQueue()
+        for _ in range(workers):
+            cursors.put(self._conn.cursor())
+
+        try:
+            with ThreadPoolExecutor(workers) as executor:
+                futures = {
+                    executor.submit(self._import, cursors, path, self.options): path
+                    for path in self.paths
+                }
+                for done, future in enumerate(as_completed(futures), start=1):
+                    path = futures[future]
+                    try:
+                        self.file_imported.emit(path, future.result())
+                    except duckdb.Error as e:
+                        self.file_failed.emit(path, e)
+                    self.progress.emit(done, len(self.paths))
+        finally:
+            while not cursors.empty():
+                cursors.get().close()
+            self.finished.emit()
+
+    @staticmethod
+    def _import(
+        cursors: queue.SimpleQueue, path: "Path | FileGroup", options: ImportOptions
+    ) -> Optional[Fingerprint]:
+        cursor = cursors.get()
+        try:
+            fingerprint = _fingerprint(path)
+            Table.create_from_file(cursor, path, options)
+            return fingerprint
+        finally:
+            cursors.put(cursor)
+
+
+def _fingerprint(path: "Path | FileGroup") -> Optional[Fingerprint]:
+    if not isinstance(path, Path):
+        return None
+    try:
+        return Fingerprint.of(path)
+    except OSError:
+        # Left for DuckDB to report when it reads the file.
+        return None
 
 
 class SchemaTracker(QObject):
+    """Keeps ``tables`` in sync with the database catalog.
+
+    Each refresh reads every table and view with its columns in a single
+    query and diffs it against the tracked tables, signalling added,
+    dropped and changed (altered columns, view replaced by a table) ones.
+    """
+
     table_added = Signal(Table)
     table_dropped = Signal(Table)
+    table_changed = Signal(Table)
 
     tables: list[Table]
 
@@ -93,59 +1138,219 @@ class SchemaTracker(QObject):
         self.tables = []
 
     def refresh(self):
-        schema_table_names = set(self._db_schema_tables())
-        tracked_table_names = {t.name for t in self.tables}
-
-        if missing_tables := schema_table_names - tracked_table_names:
-            for table in missing_tables:
-                table = Table.from_existing(self._conn, table)
-                self.tables.append(table)
-                self.table_added.emit(table)
+        schema_tables = {t.name: t for t in self._db_schema_tables()}
+        tracked_tables = {t.name: t for t in self.tables}
 
-        if extra_tables := tracked_table_names - schema_table_names:
-            for table in extra_tables:
-                table = next(t for t in self.tables if t.name == table)
+        for name, table in tracked_tables.items():
+            if name not in schema_tables:
                 self.tables.remove(table)
                 self.table_dropped.emit(table)
 
+        for name, table in schema_tables.items():
+            if (tracked := tracked_tables.get(name)) is None:
+                self.tables.append(table)
+                self.table_added.emit(table)
+            elif tracked != table:
+                self.tables[self.tables.index(tracked)] = table
+                self.table_changed.emit(table)
+
     def _db_schema_tables(self):
-        return (
-            i[0]
-            for i in self._conn.sql(
-                "SELECT table_name FROM information_schema.tables"
-            ).fetchall()
+        rows = self._conn.sql(
+            "SELECT t.table_name, t.table_type, t.table_comment, "
+            "c.column_name, c.data_type "
+            "FROM information_schema.tables t "
+            "JOIN information_schema.columns c "
+            "USING (table_catalog, table_schema, table_name) "
+            "ORDER BY t.table_catalog, t.table_schema, t.table_name, "
+            "c.ordinal_position"
+        ).fetchall()
+        for (name, kind, comment), columns in groupby(rows, key=lambda row: row[:3]):
+            yield Table(
+                name,
+                [(column, data_type) for *_, column, data_type in columns],
+                kind,
+                comment or "",
+            )
+
+
+class ResultStream:
+    """Pulls record batches from a query result on demand.
+
+    Only the ``MAX_RESIDENT_BATCHES`` most recently used batches are kept in
+    memory. Older ones are spilled to Arrow IPC files in a temporary
+    directory and memory-mapped back when they are needed again.
+    """
+
+    BATCH_SIZE = 10_000
+    MAX_RESIDENT_BATCHES = 20
+
+    schema: pa.Schema
+    exhausted: bool
+    query: Optional[str]
+    nbytes: int
+    execute_seconds: float
+    fetch_seconds: float
+
+    def __init__(
+        self,
+        reader: pa.RecordBatchReader,
+        max_resident_batches: int = MAX_RESIDENT_BATCHES,
+    ):
+        self.schema = reader.schema
+        self.exhausted = False
+        self.query = None
+        self.nbytes = 0
+        self.execute_seconds = 0.0
+        self.fetch_seconds = 0.0
+        self._lookahead: Optional[pa.RecordBatch] = None
+        self._reader = reader
+        self._max_resident_batches = max_resident_batches
+        self._offsets = [0]
+        self._resident: OrderedDict[int, pa.RecordBatch] = OrderedDict()
+        self._spilled: dict[int, Path] = {}
+        self._spill_dir: Optional[tempfile.TemporaryDirectory] = None
+
+    @classmethod
+    def from_query(cls, cursor: duckdb.DuckDBPyConnection, query: str):
+        start = time.perf_counter()
+        relation = cursor.sql(query)
+        if relation is None:
+            return None
+
+        stream = cls(relation.fetch_arrow_reader(cls.BATCH_SIZE))
+        stream.execute_seconds = time.perf_counter() - start
+        stream.query = query
+        stream.fetch_more()
+        stream.prefetch()
+        return stream
+
+    @classmethod
+    def from_arrow(cls, table: pa.Table, query: Optional[str] = None):
+        stream = cls(
+            pa.RecordBatchReader.from_batches(
+                table.schema, table.to_batches(cls.BATCH_SIZE)
+            )
         )
+        stream.query = query
+        stream.fetch_more()
+        stream.prefetch()
+        return stream
 
+    @classmethod
+    def from_dataframe(cls, df: "DataFrame"):
+        return cls.from_arrow(df.to_arrow())
 
-class QueryResultModel(QAbstractTableModel):
-    result: DataFrame
+    @classmethod
+    def empty(cls):
+        return cls(pa.RecordBatchReader.from_batches(pa.schema([]), []))
 
-    def __init__(self, parent=None):
-        super().__init__(parent)
-        self.result = DataFrame()
+    @property
+    def column_names(self) -> list[str]:
+        return self.schema.names
+
+    @property
+    def row_count(self) -> int:
+        return self._offsets[-1]
 
-    def set_result(self, result: DataFrame):
-        self.beginResetModel()
-        self.result = result
-        self.endResetModel()
+    @property
+    def has_more(self) -> bool:
+        return self._lookahead is not None or not self.exhausted
 
     @property
-    def column_names(self):
-        return self.result.columns
+    def spilled(self) -> bool:
+        return bool(self._spilled)
 
-    def rowCount(self, parent=None):
-        return self.result.shape[0]
+    def prefetch(self):
+        """Reads one batch ahead, so a result that fits in the batches read
+        so far is known to be complete."""
+        if self._lookahead is None:
+            self._lookahead = self._read_next_batch()
 
-    def columnCount(self, parent=None):
-        return self.result.shape[1]
+    def read_batch(self) -> Optional[pa.RecordBatch]:
+        """Reads the next non-empty batch without appending it."""
+        if self._lookahead is not None:
+            batch, self._lookahead = self._lookahead, None
+            return batch
+        return self._read_next_batch()
 
-    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
-        if (
-            role == Qt.ItemDataRole.DisplayRole
-            and orientation == Qt.Orientation.Horizontal
-        ):
-            return self.result.columns[section]
+    def _read_next_batch(self) -> Optional[pa.RecordBatch]:
+        start = time.perf_counter()
+        try:
+            while not self.exhausted:
+                try:
+                    batch = self._reader.read_next_batch()
+                except StopIteration:
+                    self.close()
+                    return None
+                if batch.num_rows:
+                    return batch
+            return None
+        finally:
+            self.fetch_seconds += time.perf_counter() - start
+
+    def append(self, batch: pa.RecordBatch):
+        index = len(self._offsets) - 1
+        self.nbytes += batch.nbytes
+        self._offsets.append(self.row_count + batch.num_rows)
+        self._keep(index, batch)
+
+    def fetch_more(self) -> int:
+        if batch := self.read_batch():
+            self.append(batch)
+            return batch.num_rows
+        return 0
+
+    def locate(self, row: int) -> tuple[int, int]:
+        """Returns the index of the batch holding ``row`` and the row's
+        offset within it."""
+        index = bisect.bisect_right(self._offsets, row) - 1
+        return index, row - self._offsets[index]
+
+    def batch(self, index: int) -> pa.RecordBatch:
+        if (batch := self._resident.get(index)) is not None:
+            self._resident.move_to_end(index)
+        else:
+            batch = self._load_spilled(index)
+            self._keep(index, batch)
+        return batch
+
+    def batch_at(self, row: int) -> tuple[pa.RecordBatch, int]:
+        """Returns the batch holding ``row`` and the row's offset within it."""
+        index, offset = self.locate(row)
+        return self.batch(index), offset
+
+    def to_arrow(self, max_bytes: Optional[int] = None) -> pa.Table:
+        """Fetches whatever is left and returns the whole result, or only
+        its first batches once they take ``max_bytes``, leaving the rest
+        to be fetched."""
+        while (max_bytes is None or self.nbytes < max_bytes) and self.fetch_more():
+            pass
+        return pa.Table.from_batches(
+            [self.batch(index) for index in range(len(self._offsets) - 1)],
+            schema=self.schema,
+        )
+
+    def close(self):
+        self.exhausted = True
+        self._lookahead = None
+
+    def _keep(self, index: int, batch: pa.RecordBatch):
+        self._resident[index] = batch
+        while len(self._resident) > self._max_resident_batches:
+            evicted_index, evicted = self._resident.popitem(last=False)
+            if evicted_index not in self._spilled:
+                self._spill(evicted_index, evicted)
+
+    def _spill(self, index: int, batch: pa.RecordBatch):
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.TemporaryDirectory(prefix="datapond-")
+
+        path = Path(self._spill_dir.name) / f"{index}.arrow"
+        with pa.OSFile(str(path), "wb") as sink:
+            with pa.ipc.new_file(sink, batch.schema) as writer:
+                writer.write_batch(batch)
+        self._spilled[index] = path
 
-    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
-        if role == Qt.ItemDataRole.DisplayRole:
-            return self.result[index.row(), index.column()]
+    def _load_spilled(self, index: int) -> pa.RecordBatch:
+        source = pa.memory_map(str(self._spilled[index]))
+        return pa.ipc.open_file(source).get_batch(0)
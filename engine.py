@@ -0,0 +1,77 @@
+from argparse import Namespace
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+
+
+@dataclass
+class EngineSettings:
+    """Limits on the resources DuckDB and the results it returns may use.
+
+    Settings left as None keep DuckDB's defaults: 80% of the machine's
+    memory, a thread per core, and spilling to ``.tmp`` in the working
+    directory. ``max_result_mb`` caps how much of a result is brought
+    into Python memory at once, e.g. to convert it to a DataFrame.
+    """
+
+    memory_limit: Optional[str] = None
+    threads: Optional[int] = None
+    temp_directory: Optional[Path] = None
+    max_result_mb: int = 1024
+
+    @classmethod
+    def from_args(cls, args: Namespace):
+        return cls(
+            args.memory_limit, args.threads, args.temp_directory, args.max_result_mb
+        )
+
+    @property
+    def max_result_bytes(self) -> int:
+        return self.max_result_mb * 1024 * 1024
+
+    def apply(self, conn: duckdb.DuckDBPyConnection):
+        """Sets the limits of the database ``conn`` belongs to, which are
+        shared by all of its cursors."""
+        settings = {
+            "memory_limit": self.memory_limit,
+            "threads": self.threads,
+            "temp_directory": self.temp_directory,
+        }
+        for name, value in settings.items():
+            if value is None:
+                conn.execute(f"RESET {name}")
+            else:
+                conn.execute(f"SET {name} = ?", [str(value)])
+
+
+def add_arguments(parser):
+    defaults = EngineSettings()
+    parser.add_argument("--memory-limit", help="Maximum memory for DuckDB, e.g. 4GB")
+    parser.add_argument("--threads", type=int, help="Threads DuckDB may use")
+    parser.add_argument(
+        "--temp-directory",
+        type=Path,
+        help="Directory where DuckDB spills data that doesn't fit in memory",
+    )
+    parser.add_argument(
+        "--max-result-mb",
+        type=int,
+        default=defaults.max_result_mb,
+        help="Largest result brought into memory whole, bigger ones are truncated",
+    )
+
+
+def setting(cursor: duckdb.DuckDBPyConnection, name: str) -> str:
+    (value,) = cursor.execute("SELECT current_setting(?)", [name]).fetchone()
+    return str(value)
+
+
+def memory_usage(cursor: duckdb.DuckDBPyConnection) -> int:
+    """Bytes held by DuckDB's buffer manager, for queries, tables and
+    temporary data alike."""
+    (used,) = cursor.sql(
+        "SELECT coalesce(sum(memory_usage_bytes), 0) FROM duckdb_memory()"
+    ).fetchone()
+    return used
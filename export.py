@@ -0,0 +1,167 @@
+import os
+import threading
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Callable
+
+import duckdb
+import pyarrow as pa
+import pyarrow.csv
+import pyarrow.parquet
+
+from qtcompat import QObject, QThreadPool, Signal
+
+
+class ExportFormat(Enum):
+    PARQUET = "parquet"
+    CSV = "csv"
+    ARROW = "arrow"
+
+
+PARQUET_COMPRESSIONS = ["zstd", "snappy", "gzip", "uncompressed"]
+
+
+@dataclass
+class ExportOptions:
+    format: ExportFormat = ExportFormat.PARQUET
+    compression: str = "zstd"
+    row_group_size: int = 122_880
+    header: bool = True
+
+
+def copy_statement(query: str, path: Path, options: ExportOptions) -> str:
+    if options.format == ExportFormat.PARQUET:
+        assert options.compression in PARQUET_COMPRESSIONS
+        settings = (
+            f"FORMAT PARQUET, COMPRESSION {options.compression}, "
+            f"ROW_GROUP_SIZE {options.row_group_size}"
+        )
+    else:
+        assert options.format == ExportFormat.CSV, "Only COPY to Parquet or CSV"
+        settings = f"FORMAT CSV, HEADER {str(options.header).lower()}"
+    return f"COPY ({query}) TO '{path}' ({settings})"
+
+
+def write_batches(
+    reader: pa.RecordBatchReader,
+    sink,
+    options: ExportOptions,
+    stopped: Callable[[], bool] = lambda: False,
+):
+    """Writes record batches to ``sink`` one at a time, until ``reader`` is
+    exhausted or ``stopped`` returns True.
+
+    Arrow IPC is written in the stream format rather than the file
+    format when ``sink`` isn't a path, as it can be read without seeking.
+    """
+    schema = reader.schema
+    if options.format == ExportFormat.PARQUET:
+        writer = pa.parquet.ParquetWriter(
+            sink,
+            schema,
+            compression="none"
+            if options.compression == "uncompressed"
+            else options.compression,
+        )
+    elif options.format == ExportFormat.CSV:
+        writer = pa.csv.CSVWriter(
+            sink,
+            schema,
+            write_options=pa.csv.WriteOptions(include_header=options.header),
+        )
+    elif isinstance(sink, (str, Path)):
+        writer = pa.ipc.new_file(sink, schema)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+
+    with writer:
+        for batch in reader:
+            if stopped():
+                break
+            if options.format == ExportFormat.PARQUET:
+                writer.write_batch(batch, row_group_size=options.row_group_size)
+            else:
+                writer.write_batch(batch)
+
+
+class ExportJob(QObject):
+    """Writes the result of a query to a file in a background thread.
+
+    Parquet and CSV are written by DuckDB's COPY, so rows go from the
+    engine straight to disk. DuckDB has no Arrow IPC writer, so for that
+    format record batches are streamed into a pyarrow writer instead. The
+    file is written next to its destination and only moved there once it
+    is complete, so a failed or cancelled export leaves nothing behind.
+    """
+
+    BATCH_SIZE = 100_000
+
+    exported = Signal(Path)
+    finished = Signal(bool)
+    error_occurred = Signal(Exception)
+
+    path: Path
+
+    def __init__(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        query: str,
+        path: Path,
+        options: ExportOptions,
+        source: pa.Table | None = None,
+    ):
+        super().__init__()
+        self.path = path
+        self._partial = path.with_name(f".{path.name}.partial")
+        self._query = query
+        self._options = options
+        self._cursor = conn.cursor()
+        self._cancelled = threading.Event()
+        if source is not None:
+            self._cursor.register("export_source", source)
+
+    @property
+    def bytes_written(self) -> int:
+        try:
+            return self._partial.stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def start(self):
+        QThreadPool.globalInstance().start(self.run)
+
+    def cancel(self):
+        self._cancelled.set()
+        self._cursor.interrupt()
+
+    def run(self):
+        try:
+            if self._cancelled.is_set():
+                raise duckdb.InterruptException("Export cancelled")
+            if self._options.format == ExportFormat.ARROW:
+                self._write_ipc()
+            else:
+                self._cursor.execute(
+                    copy_statement(self._query, self._partial, self._options)
+                )
+            if self._cancelled.is_set():
+                raise duckdb.InterruptException("Export cancelled")
+            os.replace(self._partial, self.path)
+            self.exported.emit(self.path)
+            self.finished.emit(True)
+        except (duckdb.Error, pa.ArrowException, OSError) as e:
+            self._partial.unlink(missing_ok=True)
+            if not self._cancelled.is_set():
+                self.error_occurred.emit(e)
+            self.finished.emit(False)
+        finally:
+            self._cursor.close()
+
+    def _write_ipc(self):
+        write_batches(
+            self._cursor.sql(self._query).fetch_arrow_reader(self.BATCH_SIZE),
+            self._partial,
+            self._options,
+            self._cancelled.is_set,
+        )
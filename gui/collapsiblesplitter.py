@@ -5,9 +5,9 @@ from qtpy.QtWidgets import QSplitter, QWidget
 
 
 class CollapsibleSplitter(QSplitter):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, orientation=Qt.Orientation.Vertical):
         super().__init__(parent)
-        self.setOrientation(Qt.Orientation.Vertical)
+        self.setOrientation(orientation)
         self._original_positions = {}
 
     def add(self, widget, stretch=0, collapsible=True):
@@ -20,10 +20,12 @@ class CollapsibleSplitter(QSplitter):
         assert index != -1, "Widget not found in splitter"
 
         handle = self.handle(index)
-        _, max = cast(tuple[int, int], self.getRange(index))
+        low, high = cast(tuple[int, int], self.getRange(index))
 
-        if widget.height() > 0:
-            self._original_positions[index] = handle.pos().y()
-            handle.moveSplitter(max)
+        vertical = self.orientation() == Qt.Orientation.Vertical
+        if (widget.height() if vertical else widget.width()) > 0:
+            position = handle.pos().y() if vertical else handle.pos().x()
+            self._original_positions[index] = position
+            handle.moveSplitter(high)
         else:
-            handle.moveSplitter(self._original_positions.get(index, 0))
+            handle.moveSplitter(self._original_positions.get(index, (low + high) // 2))
@@ -1,3 +1,5 @@
+from typing import Callable
+
 from qtpy.QtWidgets import QComboBox, QLabel, QStackedLayout, QWidget
 
 from gui.layout import hbox, vbox
@@ -11,6 +13,7 @@ class ComboStack(QWidget):
 
         self.combobox = QComboBox()
         self.stack = QStackedLayout()
+        self._factories: dict[int, Callable[[], QWidget]] = {}
 
         self.setLayout(
             vbox(
@@ -18,9 +21,24 @@ class ComboStack(QWidget):
                 self.stack,
             )
         )
-        self.combobox.currentIndexChanged.connect(self.stack.setCurrentIndex)
+        self.combobox.currentIndexChanged.connect(self._show)
 
     def add_widget(self, name, widget):
-        self.combobox.addItem(name)
         widget.setContentsMargins(0, 0, 0, 0)
         self.stack.addWidget(widget)
+        self.combobox.addItem(name)
+
+    def add_lazy_widget(self, name, factory: Callable[[], QWidget]):
+        """Adds a widget that is only built once it is first selected."""
+        self._factories[self.stack.count()] = factory
+        self.add_widget(name, QWidget())
+
+    def _show(self, index):
+        if factory := self._factories.pop(index, None):
+            placeholder = self.stack.widget(index)
+            widget = factory()
+            widget.setContentsMargins(0, 0, 0, 0)
+            self.stack.insertWidget(index, widget)
+            self.stack.removeWidget(placeholder)
+            placeholder.deleteLater()
+        self.stack.setCurrentIndex(index)
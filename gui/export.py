@@ -0,0 +1,155 @@
+from pathlib import Path
+
+from export import PARQUET_COMPRESSIONS, ExportFormat, ExportJob, ExportOptions
+from qtpy.QtCore import QTimer, Slot
+from qtpy.QtWidgets import (
+    QCheckBox,
+    QComboBox,
+    QDialog,
+    QDialogButtonBox,
+    QFileDialog,
+    QFormLayout,
+    QLineEdit,
+    QProgressBar,
+    QPushButton,
+    QSpinBox,
+    QWidget,
+)
+
+from gui.layout import hbox
+
+FORMAT_NAMES = {
+    ExportFormat.PARQUET: "Parquet",
+    ExportFormat.CSV: "CSV",
+    ExportFormat.ARROW: "Arrow IPC",
+}
+FORMATS_BY_SUFFIX = {
+    export_format.value: export_format for export_format in ExportFormat
+}
+
+
+class ExportDialog(QDialog):
+    path: QLineEdit
+    format: QComboBox
+    compression: QComboBox
+    row_group_size: QSpinBox
+    header: QCheckBox
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Export Results")
+
+        self.path = QLineEdit()
+        browse = QPushButton("Browse...")
+        browse.clicked.connect(self._browse)
+
+        self.format = QComboBox()
+        for export_format, name in FORMAT_NAMES.items():
+            self.format.addItem(name, export_format)
+        self.format.currentIndexChanged.connect(self._update_fields)
+
+        defaults = ExportOptions()
+        self.compression = QComboBox()
+        self.compression.addItems(PARQUET_COMPRESSIONS)
+        self.compression.setCurrentText(defaults.compression)
+
+        self.row_group_size = QSpinBox()
+        self.row_group_size.setRange(1_024, 10_000_000)
+        self.row_group_size.setSingleStep(1_024)
+        self.row_group_size.setValue(defaults.row_group_size)
+
+        self.header = QCheckBox("Write a header row")
+        self.header.setChecked(defaults.header)
+
+        buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
+        )
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout = QFormLayout(self)
+        layout.addRow("File:", hbox((self.path, 1), browse))
+        layout.addRow("Format:", self.format)
+        layout.addRow("Compression:", self.compression)
+        layout.addRow("Row group size:", self.row_group_size)
+        layout.addRow(self.header)
+        layout.addRow(buttons)
+        self._update_fields()
+
+    def options(self) -> ExportOptions:
+        return ExportOptions(
+            self.format.currentData(),
+            self.compression.currentText(),
+            self.row_group_size.value(),
+            self.header.isChecked(),
+        )
+
+    def _browse(self):
+        filters = ";;".join(
+            f"{name} (*.{export_format.value})"
+            for export_format, name in FORMAT_NAMES.items()
+        )
+        path, _ = QFileDialog.getSaveFileName(self, "Export Results", "", filters)
+        if path:
+            self.path.setText(path)
+            # Names without a known suffix keep the format picked so far.
+            suffix = Path(path).suffix.lstrip(".").lower()
+            if (export_format := FORMATS_BY_SUFFIX.get(suffix)) is not None:
+                self.format.setCurrentIndex(self.format.findData(export_format))
+
+    def _update_fields(self):
+        parquet = self.format.currentData() == ExportFormat.PARQUET
+        self.compression.setEnabled(parquet)
+        self.row_group_size.setEnabled(parquet)
+        self.header.setEnabled(self.format.currentData() == ExportFormat.CSV)
+
+
+class ExportProgress(QWidget):
+    """Shows how much the running exports have written, with a button to
+    cancel them. The total size isn't known up front, so the bar only
+    shows that exports are busy."""
+
+    POLL_MS = 200
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._jobs: list[ExportJob] = []
+
+        self.bar = QProgressBar()
+        self.bar.setRange(0, 0)
+        self.bar.setTextVisible(True)
+        self.cancel = QPushButton("Cancel Export")
+        self.cancel.clicked.connect(self._cancel)
+        self.setLayout(hbox(self.bar, self.cancel))
+        self.layout().setContentsMargins(0, 0, 0, 0)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.POLL_MS)
+        self._timer.timeout.connect(self._show_progress)
+        self.hide()
+
+    def track(self, job: ExportJob):
+        self._jobs.append(job)
+        job.finished.connect(self._finished)
+        self._show_progress()
+        self._timer.start()
+        self.show()
+
+    def _show_progress(self):
+        megabytes = sum(job.bytes_written for job in self._jobs) / (1024 * 1024)
+        files = f" to {len(self._jobs)} files" if len(self._jobs) > 1 else ""
+        self.bar.setFormat(f"Exported {megabytes:.1f} MB{files}")
+
+    def _cancel(self):
+        for job in self._jobs:
+            job.cancel()
+
+    @Slot(bool)
+    def _finished(self, written: bool):
+        if (job := self.sender()) in self._jobs:
+            self._jobs.remove(job)
+        if not self._jobs:
+            self._timer.stop()
+            self.hide()
+        else:
+            self._show_progress()
@@ -7,6 +7,9 @@ class LogPanel(QTextEdit):
         super().__init__()
         self.setReadOnly(True)
 
+    def append_message(self, message: str):
+        self.append(message)
+
     def append_exception(self, e: Exception):
         default_color = self.textColor()
         self.setTextColor(Qt.GlobalColor.red)
@@ -0,0 +1,293 @@
+from pathlib import Path
+from typing import Optional
+
+from qtpy.QtCore import Qt
+from qtpy.QtGui import QAction, QActionGroup, QKeySequence
+from qtpy.QtWidgets import (
+    QDockWidget,
+    QFileDialog,
+    QInputDialog,
+    QMainWindow,
+    QProgressBar,
+    QPushButton,
+    QStyle,
+    QTabBar,
+    QTabWidget,
+    QTreeWidget,
+)
+
+from columnstats import ColumnStatsLoader
+from datafiles import READERS, FileGroup
+from db import DB, ImportMode, Sample, SampleMethod
+from watcher import DataDirWatcher
+from gui.export import ExportDialog, ExportProgress
+from gui.query import QueryView
+from gui.settings import MemoryUsage, SettingsDialog
+from gui.tabletree import TableTree
+
+
+IMPORT_SAMPLES = [
+    None,
+    Sample(SampleMethod.RESERVOIR, 100_000),
+    Sample(SampleMethod.PERCENT, 1),
+    Sample(SampleMethod.FIRST_ROWS, 100_000),
+]
+
+
+class MainWindow(QMainWindow):
+    query_tabs: QTabWidget
+    tables_tree: QTreeWidget
+    plot_result_button: QPushButton
+
+    def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Data Pond")
+        self.resize(1280, 768)
+
+        self.db = DB.from_connection()
+        self.data_dir_watcher = DataDirWatcher(self.db, self)
+        self._data_dirs: list[Path] = []
+
+        file_menu = self.menuBar().addMenu("File")
+
+        self.new_query_tab_action = QAction("New Query Tab", self)
+        self.new_query_tab_action.setShortcut(QKeySequence.StandardKey.AddTab)
+        self.new_query_tab_action.triggered.connect(self.new_query_tab)
+        file_menu.addAction(self.new_query_tab_action)
+
+        self.load_files_action = QAction("Open Files...", self)
+        self.load_files_action.triggered.connect(self.load_files)
+        file_menu.addAction(self.load_files_action)
+
+        self.add_dir_data_source_action = QAction("Add Directory...", self)
+        self.add_dir_data_source_action.triggered.connect(self.add_dir_data_source)
+        file_menu.addAction(self.add_dir_data_source_action)
+
+        self.add_file_group_action = QAction("Add Files Matching Pattern...", self)
+        self.add_file_group_action.triggered.connect(self.add_file_group)
+        file_menu.addAction(self.add_file_group_action)
+
+        self.export_results_action = QAction("Export Results...", self)
+        self.export_results_action.triggered.connect(self.export_results)
+        file_menu.addAction(self.export_results_action)
+
+        file_menu.addSeparator()
+
+        self.engine_settings_action = QAction("Engine Settings...", self)
+        self.engine_settings_action.triggered.connect(self.edit_engine_settings)
+        file_menu.addAction(self.engine_settings_action)
+
+        self.import_as_views_action = QAction("Import Files as Views", self)
+        self.import_as_views_action.setCheckable(True)
+        self.import_as_views_action.toggled.connect(self._set_import_as_views)
+        file_menu.addAction(self.import_as_views_action)
+
+        self._sample_menu = file_menu.addMenu("Import Samples of Files")
+        self._sample_actions = QActionGroup(self)
+        for sample in IMPORT_SAMPLES:
+            self._add_sample_action(sample)
+        self._sample_actions.actions()[0].setChecked(True)
+
+        self.group_files_action = QAction("Group Partitioned Files", self)
+        self.group_files_action.setToolTip(
+            "Import files named like events-2024-01.csv, events-2024-02.csv "
+            "as a single table"
+        )
+        self.group_files_action.setCheckable(True)
+        self.group_files_action.toggled.connect(self._set_group_files)
+        file_menu.addAction(self.group_files_action)
+
+        self.watch_data_dirs_action = QAction("Watch Directories for Changes", self)
+        self.watch_data_dirs_action.setCheckable(True)
+        self.watch_data_dirs_action.toggled.connect(self._set_watch_data_dirs)
+        file_menu.addAction(self.watch_data_dirs_action)
+
+        stats_loader = ColumnStatsLoader(self.db.cursor(), self.db.schema_tracker)
+        stats_loader.error_occurred.connect(self.db.error_occurred)
+        self.tables_tree = TableTree(self.db.schema_tracker, stats_loader)
+        self.tables_tree.materialize_requested.connect(
+            lambda table: self.db.materialize_view(table.name)
+        )
+        self.tables_tree.load_full_requested.connect(
+            lambda table: self.db.load_full_table(table.name)
+        )
+        self._add_to_dock(
+            self.tables_tree, "Tables", Qt.DockWidgetArea.LeftDockWidgetArea
+        )
+
+        # Each tab queries the database through a session of its own. The
+        # first one uses the window's own, which also reports on imports,
+        # so it stays open.
+        self.query_tabs = QTabWidget()
+        self.query_tabs.setDocumentMode(True)
+        self.query_tabs.setTabsClosable(True)
+        self.query_tabs.tabCloseRequested.connect(self.close_query_tab)
+        self.setCentralWidget(self.query_tabs)
+        self._query_tab_count = 0
+        self._add_query_tab(self.db)
+        tab_bar = self.query_tabs.tabBar()
+        close_side = tab_bar.style().styleHint(
+            QStyle.StyleHint.SH_TabBar_CloseButtonPosition, None, tab_bar
+        )
+        tab_bar.setTabButton(0, QTabBar.ButtonPosition(close_side), None)
+
+        self.plot_result_button = QPushButton("Plot Results")
+        self.plot_result_button.clicked.connect(self._plot_result)
+
+        toggle_log_button = QPushButton("Toggle Log")
+        toggle_log_button.clicked.connect(lambda: self.query_view.toggle_log())
+
+        toggle_profile_button = QPushButton("Toggle Profile")
+        toggle_profile_button.clicked.connect(lambda: self.query_view.toggle_profile())
+
+        self.import_progress_bar = QProgressBar()
+        self.import_progress_bar.setFormat("Importing %v/%m files")
+        self.import_progress_bar.hide()
+        self.db.import_started.connect(self._import_started)
+        self.db.import_progress.connect(self.import_progress_bar.setValue)
+        self.db.import_finished.connect(self.import_progress_bar.hide)
+
+        self.export_progress = ExportProgress()
+
+        status_bar = self.statusBar()
+        status_bar.addWidget(MemoryUsage(self.db))
+        status_bar.addPermanentWidget(self.import_progress_bar)
+        status_bar.addPermanentWidget(self.export_progress)
+        status_bar.addPermanentWidget(toggle_log_button)
+        status_bar.addPermanentWidget(toggle_profile_button)
+        status_bar.addPermanentWidget(self.plot_result_button)
+
+    @property
+    def query_view(self) -> QueryView:
+        """The query tab in front."""
+        return self.query_tabs.currentWidget()
+
+    def new_query_tab(self) -> QueryView:
+        view = self._add_query_tab(self.db.new_session())
+        self.query_tabs.setCurrentWidget(view)
+        view.query_input.query.setFocus()
+        return view
+
+    def close_query_tab(self, index: int):
+        """Closes a query tab, cancelling its running query."""
+        view = self.query_tabs.widget(index)
+        if view.db is self.db:
+            return
+        view.db.close()
+        self.query_tabs.removeTab(index)
+        view.deleteLater()
+
+    def load_files(self):
+        data_files, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Select one or more files to open",
+            "/home",
+            f"Data Files ({' '.join(f'*{suffix}' for suffix in READERS)})",
+        )
+        if data_files:
+            self.db.create_tables_from_files(map(Path, data_files), background=True)
+
+    def add_dir_data_source(self):
+        data_dir = QFileDialog.getExistingDirectory(self, "Select Data Directory")
+        if data_dir:
+            self.open_data_dir(Path(data_dir))
+
+    def add_file_group(self):
+        pattern, ok = QInputDialog.getText(
+            self,
+            "Add Files Matching Pattern",
+            "Files to read as one table, e.g. data/events-*.csv or "
+            "data/events/**/*.parquet:",
+        )
+        if ok and pattern.strip():
+            self.open_file_group(pattern.strip())
+
+    def open_file_group(self, pattern: str):
+        group = FileGroup.from_pattern(pattern)
+        self.db.create_tables_from_files([group], background=True)
+
+    def open_data_dir(self, data_dir: Path):
+        self._data_dirs.append(data_dir)
+        if self.watch_data_dirs_action.isChecked():
+            self.data_dir_watcher.watch(data_dir)
+        self.db.create_tables_from_data_dir(data_dir, background=True)
+
+    def export_results(self):
+        dialog = ExportDialog(self)
+        if dialog.exec() and (path := dialog.path.text()):
+            job = self.query_view.db.export_results(Path(path), dialog.options())
+            self.export_progress.track(job)
+
+    def edit_engine_settings(self):
+        dialog = SettingsDialog(self.db, self)
+        if dialog.exec():
+            self.db.apply_settings(dialog.settings())
+
+    def set_import_sample(self, sample: Optional[Sample]):
+        """Imports files as samples from now on, or whole if ``sample`` is
+        None."""
+        for action in self._sample_actions.actions():
+            if action.data() == sample:
+                break
+        else:
+            action = self._add_sample_action(sample)
+        action.setChecked(True)
+
+    def _add_sample_action(self, sample: Optional[Sample]) -> QAction:
+        label = str(sample).capitalize() if sample is not None else "All rows"
+        action = QAction(label, self._sample_actions)
+        action.setCheckable(True)
+        action.setData(sample)
+        action.toggled.connect(self._set_import_sample_from_action)
+        self._sample_menu.addAction(action)
+        return action
+
+    def _set_import_sample_from_action(self, checked):
+        if checked:
+            self.db.import_options.sample = self._sample_actions.checkedAction().data()
+
+    def _set_watch_data_dirs(self, checked):
+        if checked:
+            for data_dir in self._data_dirs:
+                self.data_dir_watcher.watch(data_dir)
+        else:
+            self.data_dir_watcher.unwatch_all()
+
+    def _set_group_files(self, checked):
+        self.db.import_options.group_files = checked
+
+    def _set_import_as_views(self, checked):
+        self.db.import_options.mode = ImportMode.VIEW if checked else ImportMode.TABLE
+
+    def _import_started(self, total):
+        self.import_progress_bar.setRange(0, total)
+        self.import_progress_bar.setValue(0)
+        self.import_progress_bar.show()
+
+    def _plot_result(self):
+        if (source := self.query_view.db.plot_source()) is None:
+            return
+
+        # pyqtgraph takes a while to import, so it waits for the first plot.
+        from gui.plotter import plot_result
+
+        self._plot_window = plot_result(source)
+        self._plot_window.show()
+
+    def _add_query_tab(self, db: DB) -> QueryView:
+        self._query_tab_count += 1
+        title = f"Query {self._query_tab_count}"
+        view = QueryView(db)
+        self.query_tabs.addTab(view, title)
+        db.query_started.connect(lambda: self._set_tab_title(view, f"{title} *"))
+        db.query_finished.connect(lambda: self._set_tab_title(view, title))
+        return view
+
+    def _set_tab_title(self, view: QueryView, title: str):
+        if (index := self.query_tabs.indexOf(view)) >= 0:
+            self.query_tabs.setTabText(index, title)
+
+    def _add_to_dock(self, widget, title, area):
+        dock = QDockWidget(title, self)
+        dock.setWidget(widget)
+        self.addDockWidget(area, dock)
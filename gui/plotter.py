@@ -1,26 +1,51 @@
-from polars import DataFrame
-from pyqtgraph import PlotDataItem, PlotWidget
-from qtpy.QtWidgets import QComboBox, QWidget
+from plotdata import Decimated, PlotSource
+from pyqtgraph import BarGraphItem, ImageItem, PlotDataItem, PlotWidget, colormap
+from qtpy.QtCore import QRectF, QTimer
+from qtpy.QtWidgets import QComboBox, QLabel, QSpinBox, QWidget
 
 from gui.combostack import ComboStack
 from gui.layout import hbox, vbox
 
 
 class XYChart(QWidget):
-    def __init__(self, df: DataFrame, plot_type="Line"):
+    """Plots two columns of a ``PlotSource``, loading only as many points
+    as fit the visible range and reloading them when it changes."""
+
+    DEFAULT_BUCKETS = 1000
+    MAX_SCATTER_POINTS = 20_000
+    RELOAD_DELAY_MS = 150
+
+    def __init__(self, source: PlotSource, plot_type="Line"):
         super().__init__()
-        self.df = df
+        self.source = source
         self.plot_widget = PlotWidget()
         self.plot_type = plot_type
+        self.decimation_label = QLabel()
+        self._loaded_range = None
+
+        kwargs = (
+            {"pen": "w"} if self.plot_type == "Line" else {"symbol": "o", "pen": None}
+        )
+        self._item = PlotDataItem(**kwargs)
+        self.plot_widget.addItem(self._item)
 
+        self._reload_timer = QTimer(self)
+        self._reload_timer.setSingleShot(True)
+        self._reload_timer.setInterval(self.RELOAD_DELAY_MS)
+        self._reload_timer.timeout.connect(self.load_visible)
+        self.plot_widget.getViewBox().sigRangeChanged.connect(self._reload_timer.start)
+
+        columns = source.columns
         self.x_combobox = QComboBox()
-        self.x_combobox.addItems(df.columns)
-        self.x_combobox.setCurrentText(df.columns[0])
+        self.x_combobox.addItems(columns)
+        if columns:
+            self.x_combobox.setCurrentText(columns[0])
         self.x_combobox.currentTextChanged.connect(self.refresh_plot)
 
         self.y_combobox = QComboBox()
-        self.y_combobox.addItems(df.columns)
-        self.y_combobox.setCurrentText(df.columns[1])
+        self.y_combobox.addItems(columns)
+        if columns:
+            self.y_combobox.setCurrentText(columns[min(1, len(columns) - 1)])
         self.y_combobox.currentTextChanged.connect(self.refresh_plot)
         self.refresh_plot()
 
@@ -31,38 +56,225 @@ class XYChart(QWidget):
                     hbox("Y: ", (self.y_combobox, 2)),
                 ),
                 self.plot_widget,
+                self.decimation_label,
             )
         )
 
     def refresh_plot(self):
-        kwargs = (
-            {"pen": "w"} if self.plot_type == "Line" else {"symbol": "o", "pen": None}
+        self._loaded_range = None
+        x, y = self.x_combobox.currentText(), self.y_combobox.currentText()
+        if not x or not y or (extent := self.source.extent(x, y)) is None:
+            self._item.setData([], [])
+            self.decimation_label.clear()
+            return
+
+        x_range, y_range = extent
+        self.plot_widget.setRange(xRange=x_range, yRange=y_range)
+        self.load_visible()
+
+    def load_visible(self):
+        x, y = self.x_combobox.currentText(), self.y_combobox.currentText()
+        view_range = tuple(map(tuple, self.plot_widget.getViewBox().viewRange()))
+        if not x or not y or view_range == self._loaded_range:
+            return
+
+        x_range, y_range = view_range
+        if self.plot_type == "Line":
+            margin = (x_range[1] - x_range[0]) * 0.05
+            points = self.source.line(
+                x, y, (x_range[0] - margin, x_range[1] + margin), self._buckets()
+            )
+        else:
+            points = self.source.scatter(
+                x, y, x_range, y_range, self.MAX_SCATTER_POINTS
+            )
+
+        self._loaded_range = view_range
+        self._item.setData(points.x, points.y)
+        self._show_decimation(points)
+
+    def _buckets(self):
+        return int(self.plot_widget.getViewBox().width()) or self.DEFAULT_BUCKETS
+
+    def _show_decimation(self, points: Decimated):
+        if points.ratio > 1:
+            self.decimation_label.setText(
+                f"Showing {len(points.x):,} of {points.total:,} points "
+                f"(1:{points.ratio:,.0f})"
+            )
+        else:
+            self.decimation_label.setText(f"Showing all {points.total:,} points")
+
+
+class HistogramChart(QWidget):
+    def __init__(self, source: PlotSource):
+        super().__init__()
+        self.source = source
+        self.plot_widget = PlotWidget()
+
+        self.column_combobox = QComboBox()
+        self.column_combobox.addItems(source.columns)
+        self.column_combobox.currentTextChanged.connect(self.refresh_plot)
+
+        self.bins_spinbox = _bins_spinbox(50)
+        self.bins_spinbox.valueChanged.connect(self.refresh_plot)
+        self.refresh_plot()
+
+        self.setLayout(
+            vbox(
+                hbox(
+                    hbox("Column: ", (self.column_combobox, 2)),
+                    hbox("Bins: ", self.bins_spinbox),
+                ),
+                self.plot_widget,
+            )
         )
 
+    def refresh_plot(self):
         self.plot_widget.clear()
+        if not (column := self.column_combobox.currentText()):
+            return
+
+        histogram = self.source.histogram(column, self.bins_spinbox.value())
         self.plot_widget.addItem(
             PlotDataItem(
-                self.df[self.x_combobox.currentText()],
-                self.df[self.y_combobox.currentText()],
-                **kwargs,
+                histogram.edges,
+                histogram.counts,
+                stepMode="center",
+                fillLevel=0,
+                brush=(100, 100, 255, 150),
+            )
+        )
+
+
+class DensityChart(QWidget):
+    def __init__(self, source: PlotSource):
+        super().__init__()
+        self.source = source
+        self.plot_widget = PlotWidget()
+        columns = source.columns
+
+        self.x_combobox = QComboBox()
+        self.x_combobox.addItems(columns)
+        self.x_combobox.currentTextChanged.connect(self.refresh_plot)
+
+        self.y_combobox = QComboBox()
+        self.y_combobox.addItems(columns)
+        if columns:
+            self.y_combobox.setCurrentText(columns[min(1, len(columns) - 1)])
+        self.y_combobox.currentTextChanged.connect(self.refresh_plot)
+
+        self.bins_spinbox = _bins_spinbox(100)
+        self.bins_spinbox.valueChanged.connect(self.refresh_plot)
+        self.refresh_plot()
+
+        self.setLayout(
+            vbox(
+                hbox(
+                    hbox("X: ", (self.x_combobox, 2)),
+                    hbox("Y: ", (self.y_combobox, 2)),
+                    hbox("Bins: ", self.bins_spinbox),
+                ),
+                self.plot_widget,
+            )
+        )
+
+    def refresh_plot(self):
+        self.plot_widget.clear()
+        x, y = self.x_combobox.currentText(), self.y_combobox.currentText()
+        if not x or not y:
+            return
+        if (density := self.source.density(x, y, self.bins_spinbox.value())) is None:
+            return
+
+        image = ImageItem(density.counts)
+        image.setColorMap(colormap.get("viridis"))
+        (x_low, x_high), (y_low, y_high) = density.x_range, density.y_range
+        image.setRect(QRectF(x_low, y_low, x_high - x_low, y_high - y_low))
+        self.plot_widget.addItem(image)
+
+
+class BarChart(QWidget):
+    MAX_BARS = 50
+
+    def __init__(self, source: PlotSource):
+        super().__init__()
+        self.source = source
+        self.plot_widget = PlotWidget()
+
+        self.category_combobox = QComboBox()
+        self.category_combobox.addItems(source.category_columns)
+        self.category_combobox.currentTextChanged.connect(self.refresh_plot)
+
+        self.aggregate_combobox = QComboBox()
+        self.aggregate_combobox.addItems(PlotSource.AGGREGATES)
+        self.aggregate_combobox.currentTextChanged.connect(self.refresh_plot)
+
+        self.value_combobox = QComboBox()
+        self.value_combobox.addItems(source.columns)
+        self.value_combobox.currentTextChanged.connect(self.refresh_plot)
+        self.refresh_plot()
+
+        self.setLayout(
+            vbox(
+                hbox(
+                    hbox("Group by: ", (self.category_combobox, 2)),
+                    hbox("Aggregate: ", (self.aggregate_combobox, 1)),
+                    hbox("Of: ", (self.value_combobox, 2)),
+                ),
+                self.plot_widget,
             )
         )
 
+    def refresh_plot(self):
+        self.plot_widget.clear()
+        category = self.category_combobox.currentText()
+        aggregate = self.aggregate_combobox.currentText()
+        value = self.value_combobox.currentText()
+        if not category or (aggregate != "count" and not value):
+            return
+
+        bars = self.source.bars(category, value, aggregate, self.MAX_BARS)
+        positions = range(len(bars.categories))
+        self.plot_widget.addItem(
+            BarGraphItem(x=list(positions), height=bars.values, width=0.8)
+        )
+        self.plot_widget.getAxis("bottom").setTicks(
+            [list(zip(positions, bars.categories))]
+        )
+
+
+def _bins_spinbox(default: int) -> QSpinBox:
+    spinbox = QSpinBox()
+    spinbox.setRange(1, 1000)
+    spinbox.setValue(default)
+    return spinbox
+
 
 class Plotter(ComboStack):
-    PLOT_TYPES = [
-        "Line",
-        "Scatter",
-    ]
+    """Chooses between plot types, building each chart when first shown."""
 
-    def __init__(self, df: DataFrame):
+    PLOT_TYPES = {
+        "Line": lambda source: XYChart(source, "Line"),
+        "Scatter": lambda source: XYChart(source, "Scatter"),
+        "Histogram": HistogramChart,
+        "Density": DensityChart,
+        "Bar": BarChart,
+    }
+
+    def __init__(self, source: PlotSource):
         super().__init__("Plot type: ")
-        for plot_name in self.PLOT_TYPES:
-            self.add_widget(plot_name, XYChart(df, plot_name))
+        self.source = source
+        for plot_name, chart in self.PLOT_TYPES.items():
+            self.add_lazy_widget(plot_name, lambda chart=chart: chart(source))
+
+    def closeEvent(self, event):
+        self.source.close()
+        super().closeEvent(event)
 
 
-def plot_result(df: DataFrame) -> QWidget:
-    plotter = Plotter(df)
+def plot_result(source: PlotSource) -> QWidget:
+    plotter = Plotter(source)
 
     plotter.setWindowTitle("Plot Results")
     plotter.resize(800, 600)
@@ -71,20 +283,19 @@ def plot_result(df: DataFrame) -> QWidget:
 
 
 if __name__ == "__main__":
-    import random
     import sys
 
+    import duckdb
     from qtpy.QtWidgets import QApplication
 
     app = QApplication(sys.argv)
-    df = DataFrame(
-        {
-            "value": range(1000),
-            "another_value": [random.randint(0, 100) for _ in range(1000)],
-        }
+    source = PlotSource.from_query(
+        duckdb.connect(),
+        "SELECT range AS value, random() * 100 AS another_value "
+        "FROM range(1_000_000)",
     )
 
-    widget = plot_result(df)
+    widget = plot_result(source)
     widget.show()
 
     sys.exit(app.exec_())
@@ -0,0 +1,151 @@
+from db import DB
+from profiling import QueryProfile
+from qtpy.QtWidgets import (
+    QComboBox,
+    QPushButton,
+    QTreeWidget,
+    QTreeWidgetItem,
+    QWidget,
+)
+
+from gui.layout import hbox, vbox
+
+
+class ProfileView(QWidget):
+    """Shows one run picked from the panel's history: the time spent in
+    each step, and the operator tree once it was explained."""
+
+    runs: QComboBox
+    explain: QPushButton
+    tree: QTreeWidget
+
+    def __init__(self, db: DB, profiles: list[QueryProfile]):
+        super().__init__()
+        self._db = db
+        self._profiles = profiles
+
+        self.runs = QComboBox()
+        self.runs.currentIndexChanged.connect(self.show_profile)
+
+        self.explain = QPushButton("Explain Analyze")
+        self.explain.clicked.connect(self._explain)
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["Step", "Time", "Rows", "Details"])
+
+        self.setLayout(vbox(hbox((self.runs, 1), self.explain), self.tree))
+
+    @property
+    def profile(self) -> QueryProfile | None:
+        index = self.runs.currentIndex()
+        return self._profiles[index] if index >= 0 else None
+
+    def update_runs(self, current: int):
+        self.runs.blockSignals(True)
+        self.runs.clear()
+        self.runs.addItems(
+            [f"#{i + 1}: {_one_line(p.query)}" for i, p in enumerate(self._profiles)]
+        )
+        self.runs.setCurrentIndex(current)
+        self.runs.blockSignals(False)
+        self.show_profile()
+
+    def show_profile(self):
+        self.tree.clear()
+        if (profile := self.profile) is None:
+            return
+
+        # Until the result was read to the end, only its first rows count.
+        more = "" if profile.complete else "+"
+        steps = [
+            ("Execute", profile.execute_seconds, ""),
+            ("Fetch", profile.fetch_seconds, _bytes(profile.nbytes) + more),
+            ("Model", profile.model_seconds, ""),
+        ]
+        total = QTreeWidgetItem(
+            ["Total", _seconds(profile.total_seconds), f"{profile.rows}{more}"]
+        )
+        if profile.cached:
+            total.setText(3, "from result cache")
+        for name, seconds, details in steps:
+            total.addChild(QTreeWidgetItem([name, _seconds(seconds), "", details]))
+        self.tree.addTopLevelItem(total)
+
+        if profile.plan is not None:
+            parents = [self.tree.invisibleRootItem()]
+            for depth, operator in profile.plan.walk():
+                item = QTreeWidgetItem(
+                    [
+                        operator.name,
+                        _seconds(operator.seconds),
+                        str(operator.rows),
+                        "; ".join(f"{k}: {v}" for k, v in operator.details.items()),
+                    ]
+                )
+                del parents[depth + 1 :]
+                parents[depth].addChild(item)
+                parents.append(item)
+
+        self.tree.expandAll()
+        for column in range(3):
+            self.tree.resizeColumnToContents(column)
+
+    def _explain(self):
+        if (profile := self.profile) is not None:
+            self._db.explain_analyze(profile)
+
+
+class ProfilePanel(QWidget):
+    """Keeps the profiles of the last runs and shows two of them side by
+    side: the latest run on the left and, for comparison, the one before
+    it on the right unless another one was picked there."""
+
+    MAX_PROFILES = 50
+
+    profiles: list[QueryProfile]
+    latest: ProfileView
+    compared: ProfileView
+
+    def __init__(self, db: DB):
+        super().__init__()
+        self.profiles = []
+        self.latest = ProfileView(db, self.profiles)
+        self.compared = ProfileView(db, self.profiles)
+        self.setLayout(hbox(self.latest, self.compared))
+
+        db.query_profiled.connect(self.add_profile)
+        db.profile_updated.connect(self._profile_updated)
+
+    def add_profile(self, profile: QueryProfile):
+        compared = self.compared.runs.currentIndex()
+        if compared in (-1, len(self.profiles) - 2):
+            compared = len(self.profiles) - 1
+
+        self.profiles.append(profile)
+        if len(self.profiles) > self.MAX_PROFILES:
+            del self.profiles[0]
+            compared -= 1
+
+        self.latest.update_runs(len(self.profiles) - 1)
+        self.compared.update_runs(max(compared, 0))
+
+    def _profile_updated(self, profile: QueryProfile):
+        for view in (self.latest, self.compared):
+            if view.profile is profile:
+                view.show_profile()
+
+
+def _one_line(query: str) -> str:
+    return " ".join(query.split())[:80] or "(no query)"
+
+
+def _seconds(seconds: float) -> str:
+    return f"{seconds * 1000:.1f} ms"
+
+
+def _bytes(nbytes: int) -> str:
+    for unit in ["B", "KB", "MB"]:
+        if nbytes < 1024:
+            return f"{nbytes:.0f} {unit}"
+        nbytes /= 1024
+    return f"{nbytes:.1f} GB"
@@ -1,22 +1,32 @@
 from db import DB
 from qtcodeedit import CodeEdit
-from qtpy.QtCore import Qt, Signal
+from qtpy.QtCore import QElapsedTimer, Qt, QTimer, Signal
 from qtpy.QtWidgets import (
     QHBoxLayout,
+    QLabel,
     QPushButton,
     QTableView,
     QWidget,
 )
 
 from gui.collapsiblesplitter import CollapsibleSplitter
+from gui.layout import vbox
 from gui.logs import LogPanel
+from gui.profiler import ProfilePanel
+from gui.resultfilters import ResultFilters
+from gui.script import ScriptResults
 
 
 class QueryInput(QWidget):
     submitted = Signal(str)
+    script_submitted = Signal(str)
+    cancelled = Signal()
 
     query: CodeEdit
     submit: QPushButton
+    submit_script: QPushButton
+    cancel: QPushButton
+    status: QLabel
     _plot_result: QWidget
 
     def __init__(self):
@@ -36,21 +46,65 @@ class QueryInput(QWidget):
         self.submit.clicked.connect(
             lambda: self.submitted.emit(self.query.toPlainText())
         )
-        layout.addWidget(self.submit)
+
+        self.submit_script = QPushButton("Run as Script")
+        self.submit_script.setToolTip(
+            "Run each statement in turn, keeping the result of every query"
+        )
+        self.submit_script.clicked.connect(
+            lambda: self.script_submitted.emit(self.query.toPlainText())
+        )
+
+        self.cancel = QPushButton("Cancel")
+        self.cancel.setEnabled(False)
+        self.cancel.clicked.connect(self.cancelled.emit)
+
+        self.status = QLabel()
+
+        self._elapsed = QElapsedTimer()
+        self._elapsed_timer = QTimer(self)
+        self._elapsed_timer.setInterval(100)
+        self._elapsed_timer.timeout.connect(self._show_elapsed)
+
+        layout.addLayout(
+            vbox(self.submit, self.submit_script, self.cancel, self.status)
+        )
+
+    def set_running(self, running: bool):
+        self.submit.setEnabled(not running)
+        self.submit_script.setEnabled(not running)
+        self.cancel.setEnabled(running)
+        if running:
+            self._elapsed.start()
+            self._elapsed_timer.start()
+            self._show_elapsed()
+        else:
+            self._elapsed_timer.stop()
+            self.status.setText(f"Done in {self._elapsed_seconds():.1f}s")
 
     def keyPressEvent(self, event):
         if (
             event.key() == Qt.Key.Key_Return
             and event.modifiers() == Qt.KeyboardModifier.ControlModifier
         ):
-            self.submitted.emit(self.query.toPlainText())
+            if self.submit.isEnabled():
+                self.submitted.emit(self.query.toPlainText())
         else:
             super().keyPressEvent(event)
 
+    def _show_elapsed(self):
+        self.status.setText(f"Running... {self._elapsed_seconds():.1f}s")
+
+    def _elapsed_seconds(self):
+        return self._elapsed.elapsed() / 1000
+
 
 class QueryView(CollapsibleSplitter):
     query_input: QueryInput
     results_table: QTableView
+    result_filters: ResultFilters
+    script_results: ScriptResults
+    profile_panel: ProfilePanel
     log_panel: LogPanel
 
     def __init__(self, db: DB):
@@ -59,20 +113,79 @@ class QueryView(CollapsibleSplitter):
 
         self.query_input = QueryInput()
         self.query_input.submitted.connect(self._run_query)
+        self.query_input.script_submitted.connect(self._run_script)
+        self.query_input.cancelled.connect(self._db.cancel_query)
 
         self.results_table = QTableView()
         self.results_table.setModel(self._db.result_model)
+        header = self.results_table.horizontalHeader()
+        header.setSectionsClickable(True)
+        header.setSortIndicatorShown(True)
+        header.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        header.sortIndicatorChanged.connect(self._sort_results)
+
+        self.result_filters = ResultFilters(self.results_table)
+        self.result_filters.filter_changed.connect(self._db.filter_results)
+        self._db.result_view_reset.connect(self._reset_result_view)
+        results = QWidget()
+        results.setLayout(vbox(self.result_filters, self.results_table))
+        results.layout().setSpacing(0)
+        results.layout().setContentsMargins(0, 0, 0, 0)
+
+        self.script_results = ScriptResults(self._db)
+
+        self.profile_panel = ProfilePanel(self._db)
+        self._results = CollapsibleSplitter(orientation=Qt.Orientation.Horizontal)
+        self._results.add(self.script_results, stretch=1)
+        self._results.add(results, stretch=2, collapsible=False)
+        self._results.add(self.profile_panel, stretch=1)
+        self._results.setSizes([0, 1, 0])
 
         self.log_panel = LogPanel()
 
         self.add(self.query_input, stretch=1, collapsible=False)
-        self.add(self.results_table, stretch=2, collapsible=False)
+        self.add(self._results, stretch=2, collapsible=False)
         self.add(self.log_panel, stretch=1)
 
         self._db.error_occurred.connect(self.log_panel.append_exception)
+        self._db.message_logged.connect(self.log_panel.append_message)
+        self._db.query_started.connect(lambda: self.query_input.set_running(True))
+        self._db.query_finished.connect(lambda: self.query_input.set_running(False))
+
+    @property
+    def db(self) -> DB:
+        return self._db
 
     def toggle_log(self):
         self.toggle_collapsed(self.log_panel)
 
+    def toggle_profile(self):
+        self._results.toggle_collapsed(self.profile_panel)
+
     def _run_query(self, query: str):
-        self._db.sql(query)
+        self._db.sql_in_background(query)
+
+    def _sort_results(self, section: int, order: Qt.SortOrder):
+        if section < 0:
+            return
+        column = self._db.result_model.column_names[section]
+        self._db.sort_results(column, order == Qt.SortOrder.DescendingOrder)
+        if self._db.result_view.order_by != column:
+            self._reset_sort_indicator()
+
+    def _reset_result_view(self):
+        self._reset_sort_indicator()
+        self.result_filters.clear()
+
+    def _reset_sort_indicator(self):
+        header = self.results_table.horizontalHeader()
+        header.blockSignals(True)
+        header.setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        header.blockSignals(False)
+
+    def _run_script(self, script: str):
+        self.script_results.clear()
+        scripts, results, profile = self._results.sizes()
+        if scripts == 0:
+            self._results.setSizes([results // 3, results - results // 3, profile])
+        self._db.run_script(script)
@@ -0,0 +1,71 @@
+from qtpy.QtCore import Signal
+from qtpy.QtWidgets import QLineEdit, QTableView, QWidget
+
+
+class ResultFilters(QWidget):
+    """A filter per column of ``table``, kept aligned with its header.
+
+    A filter is submitted when Return is pressed in it or it loses focus.
+    Filters keep their text when the result has the same columns, as it
+    does after sorting or filtering.
+    """
+
+    filter_changed = Signal(str, str)
+
+    def __init__(self, table: QTableView):
+        super().__init__()
+        self._table = table
+        self._edits: dict[str, QLineEdit] = {}
+        self.setFixedHeight(QLineEdit().sizeHint().height())
+
+        header = table.horizontalHeader()
+        header.sectionResized.connect(self._place_edits)
+        header.sectionMoved.connect(self._place_edits)
+        header.geometriesChanged.connect(self._place_edits)
+        table.horizontalScrollBar().valueChanged.connect(self._place_edits)
+        table.model().modelReset.connect(self._update_columns)
+
+    def clear(self):
+        for edit in self._edits.values():
+            edit.clear()
+
+    def edit(self, column: str) -> QLineEdit:
+        return self._edits[column]
+
+    def _update_columns(self):
+        columns = self._table.model().column_names
+        if columns == list(self._edits):
+            return
+
+        for edit in self._edits.values():
+            edit.deleteLater()
+        self._edits = {}
+        for column in columns:
+            edit = QLineEdit(self)
+            edit.setPlaceholderText("Filter")
+            edit.setToolTip(
+                "Text to search for, or a condition like > 10 or IS NOT NULL"
+            )
+            edit.editingFinished.connect(
+                lambda column=column, edit=edit: self._submit(column, edit)
+            )
+            edit.show()
+            self._edits[column] = edit
+        self._place_edits()
+
+    def _submit(self, column: str, edit: QLineEdit):
+        if edit.isModified():
+            edit.setModified(False)
+            self.filter_changed.emit(column, edit.text())
+
+    def _place_edits(self):
+        header = self._table.horizontalHeader()
+        left = self._table.frameWidth() + self._table.verticalHeader().width()
+        for section, edit in enumerate(self._edits.values()):
+            edit.setVisible(not header.isSectionHidden(section))
+            edit.setGeometry(
+                left + header.sectionViewportPosition(section),
+                0,
+                header.sectionSize(section),
+                self.height(),
+            )
@@ -0,0 +1,33 @@
+from db import DB, StatementResult
+from qtpy.QtWidgets import QTreeWidget, QTreeWidgetItem
+
+
+class ScriptResults(QTreeWidget):
+    """The statements of the last script run, with their timing and row
+    counts. Selecting a query shows its result."""
+
+    def __init__(self, db: DB):
+        super().__init__()
+        self._db = db
+        self.setHeaderLabels(["#", "Statement", "Time", "Rows"])
+        self.setRootIsDecorated(False)
+        self._db.statement_finished.connect(self.add_statement)
+        self.currentItemChanged.connect(self._show_result)
+
+    def add_statement(self, statement: StatementResult):
+        item = QTreeWidgetItem(
+            [
+                str(statement.index + 1),
+                " ".join(statement.query.split()),
+                f"{statement.seconds * 1000:.1f} ms",
+                f"{statement.rows}+" if statement.truncated else str(statement.rows),
+            ]
+        )
+        item.setToolTip(1, statement.query)
+        self.addTopLevelItem(item)
+        for column in (0, 2, 3):
+            self.resizeColumnToContents(column)
+
+    def _show_result(self, item: QTreeWidgetItem):
+        if item is not None:
+            self._db.show_statement_result(self.indexOfTopLevelItem(item))
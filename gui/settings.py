@@ -0,0 +1,100 @@
+from pathlib import Path
+
+from db import DB
+from engine import EngineSettings, memory_usage, setting
+from qtpy.QtCore import QTimer
+from qtpy.QtWidgets import (
+    QDialog,
+    QDialogButtonBox,
+    QFileDialog,
+    QFormLayout,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QSpinBox,
+)
+
+from gui.layout import hbox
+
+
+class SettingsDialog(QDialog):
+    """Edits the engine settings. Fields left empty, or at 0 threads, keep
+    DuckDB's defaults, which are shown as placeholders."""
+
+    memory_limit: QLineEdit
+    threads: QSpinBox
+    temp_directory: QLineEdit
+    max_result_mb: QSpinBox
+
+    def __init__(self, db: DB, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Engine Settings")
+        settings = db.settings
+        cursor = db.cursor()
+
+        self.memory_limit = QLineEdit(settings.memory_limit or "")
+        self.memory_limit.setPlaceholderText(setting(cursor, "memory_limit"))
+
+        self.threads = QSpinBox()
+        self.threads.setRange(0, 1024)
+        self.threads.setSpecialValueText("Default")
+        self.threads.setValue(settings.threads or 0)
+
+        self.temp_directory = QLineEdit(str(settings.temp_directory or ""))
+        self.temp_directory.setPlaceholderText(setting(cursor, "temp_directory"))
+        cursor.close()
+        browse = QPushButton("Browse...")
+        browse.clicked.connect(self._browse)
+
+        self.max_result_mb = QSpinBox()
+        self.max_result_mb.setRange(1, 1024 * 1024)
+        self.max_result_mb.setSuffix(" MB")
+        self.max_result_mb.setValue(settings.max_result_mb)
+
+        buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
+        )
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout = QFormLayout(self)
+        layout.addRow("Memory limit:", self.memory_limit)
+        layout.addRow("Threads:", self.threads)
+        layout.addRow("Spill directory:", hbox((self.temp_directory, 1), browse))
+        layout.addRow("Largest result in memory:", self.max_result_mb)
+        layout.addRow(buttons)
+
+    def settings(self) -> EngineSettings:
+        temp_directory = self.temp_directory.text().strip()
+        return EngineSettings(
+            self.memory_limit.text().strip() or None,
+            self.threads.value() or None,
+            Path(temp_directory) if temp_directory else None,
+            self.max_result_mb.value(),
+        )
+
+    def _browse(self):
+        path = QFileDialog.getExistingDirectory(self, "Spill Directory")
+        if path:
+            self.temp_directory.setText(path)
+
+
+class MemoryUsage(QLabel):
+    """DuckDB's current memory use against its limit, polled while the
+    window is open."""
+
+    POLL_MS = 1000
+
+    def __init__(self, db: DB, parent=None):
+        super().__init__(parent)
+        self._cursor = db.cursor()
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.POLL_MS)
+        self._timer.timeout.connect(self.refresh)
+        self._timer.start()
+        self.refresh()
+
+    def refresh(self):
+        used = memory_usage(self._cursor) / (1024 * 1024)
+        limit = setting(self._cursor, "memory_limit")
+        self.setText(f"Engine memory: {used:.0f} MB of {limit}")
@@ -1,15 +1,37 @@
+from typing import Optional
+
+from columnstats import ColumnStats, ColumnStatsLoader, TableStats
 from db import SchemaTracker, Table
-from qtpy.QtCore import Qt, Slot
-from qtpy.QtWidgets import QTreeWidget, QTreeWidgetItem
+from qtpy.QtCore import Qt, Signal, Slot
+from qtpy.QtWidgets import QMenu, QTreeWidget, QTreeWidgetItem
 
 
 class TableTree(QTreeWidget):
-    def __init__(self, schema_tracker: SchemaTracker, parent=None):
+    """Tables and their columns. With a ``ColumnStatsLoader``, the
+    statistics of a table's columns are loaded when it is first expanded."""
+
+    materialize_requested = Signal(Table)
+    load_full_requested = Signal(Table)
+
+    def __init__(
+        self,
+        schema_tracker: SchemaTracker,
+        stats_loader: Optional[ColumnStatsLoader] = None,
+        parent=None,
+    ):
         super().__init__(parent)
-        self.setHeaderLabels(["Table", "Type"])
+        self.setHeaderLabels(["Table", "Type", "Statistics"])
+        self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.customContextMenuRequested.connect(self._show_context_menu)
         self._schema_tracker = schema_tracker
         self._schema_tracker.table_added.connect(self.add_table)
         self._schema_tracker.table_dropped.connect(self.remove_table)
+        self._schema_tracker.table_changed.connect(self.update_table)
+
+        self._stats_loader = stats_loader
+        if stats_loader is not None:
+            self.itemExpanded.connect(self._load_stats)
+            stats_loader.stats_ready.connect(self.set_stats)
 
     @Slot(Table)
     def add_table(self, table):
@@ -24,9 +46,78 @@ class TableTree(QTreeWidget):
 
             self.takeTopLevelItem(self.indexOfTopLevelItem(match[0]))
 
+    @Slot(Table)
+    def update_table(self, table):
+        if match := self.findItems(table.name, Qt.MatchFlag.MatchExactly):
+            index = self.indexOfTopLevelItem(match[0])
+            expanded = match[0].isExpanded()
+            self.takeTopLevelItem(index)
+            self.insertTopLevelItem(index, item := TableTreeItem(table))
+            item.setExpanded(expanded)
+
+    @Slot(str, object)
+    def set_stats(self, name: str, stats: TableStats):
+        if match := self.findItems(name, Qt.MatchFlag.MatchExactly):
+            match[0].set_stats(stats)
+
+    def context_menu(self, item: QTreeWidgetItem) -> QMenu:
+        menu = QMenu(self)
+        if isinstance(item, TableTreeItem) and item.table.is_view:
+            materialize = menu.addAction("Materialize as Table")
+            materialize.triggered.connect(
+                lambda: self.materialize_requested.emit(item.table)
+            )
+        if isinstance(item, TableTreeItem) and item.table.sample is not None:
+            load_full = menu.addAction("Load Full Table")
+            load_full.triggered.connect(
+                lambda: self.load_full_requested.emit(item.table)
+            )
+        return menu
+
+    def _load_stats(self, item: QTreeWidgetItem):
+        if isinstance(item, TableTreeItem) and self._stats_loader is not None:
+            self._stats_loader.request(item.table)
+
+    def _show_context_menu(self, pos):
+        if (item := self.itemAt(pos)) is None:
+            return
+        if not (menu := self.context_menu(item)).isEmpty():
+            menu.exec(self.viewport().mapToGlobal(pos))
+
 
 class TableTreeItem(QTreeWidgetItem):
+    MAX_VALUE_LENGTH = 20
+
     def __init__(self, table):
-        super().__init__([table.name])
+        super().__init__([table.name, self._kind(table)])
+        self.table = table
+        if table.sample is not None:
+            self.setToolTip(1, f"{table.sample.capitalize()} of {table.source}")
         for column, data_type in table.columns:
             self.addChild(QTreeWidgetItem([column, data_type]))
+
+    def set_stats(self, stats: TableStats):
+        sampled = f"Statistics of a {stats.rows}-row sample" if stats.sampled else ""
+        self.setText(2, f"{stats.rows} rows{' sampled' if stats.sampled else ''}")
+        for i in range(self.childCount()):
+            child = self.child(i)
+            if column := stats.columns.get(child.text(0)):
+                child.setText(2, self._describe(column))
+                child.setToolTip(2, sampled)
+
+    @staticmethod
+    def _kind(table: Table) -> str:
+        if table.is_view:
+            return "VIEW"
+        return "SAMPLE" if table.sample is not None else ""
+
+    def _describe(self, stats: ColumnStats) -> str:
+        text = f"~{stats.approx_distinct} distinct, {stats.null_fraction:.0%} null"
+        if stats.min is not None:
+            text += f", {self._shorten(stats.min)} to {self._shorten(stats.max)}"
+        return text
+
+    def _shorten(self, value: str) -> str:
+        if len(value) <= self.MAX_VALUE_LENGTH:
+            return value
+        return value[: self.MAX_VALUE_LENGTH - 1] + "…"
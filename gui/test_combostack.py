@@ -1,3 +1,5 @@
+from unittest import mock
+
 from qtpy.QtWidgets import QWidget
 
 from gui.combostack import ComboStack
@@ -15,3 +17,22 @@ def test_combostack(qtbot):
     combostack.combobox.setCurrentIndex(1)
 
     assert combostack.stack.currentWidget() is widget2
+
+
+def test_combostack_builds_lazy_widgets_when_selected(qtbot):
+    combostack = ComboStack("Choose a widget")
+    qtbot.addWidget(combostack)
+    factory = mock.Mock(return_value=QWidget())
+
+    combostack.add_widget("widget1", widget1 := QWidget())
+    combostack.add_lazy_widget("widget2", factory)
+
+    assert combostack.stack.currentWidget() is widget1
+    factory.assert_not_called()
+
+    combostack.combobox.setCurrentIndex(1)
+
+    assert combostack.stack.currentWidget() is factory.return_value
+    combostack.combobox.setCurrentIndex(0)
+    combostack.combobox.setCurrentIndex(1)
+    factory.assert_called_once()
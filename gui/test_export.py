@@ -0,0 +1,53 @@
+import duckdb
+from export import ExportFormat, ExportJob, ExportOptions
+from qtpy.QtWidgets import QFileDialog
+
+from gui.export import ExportDialog, ExportProgress
+
+
+def test_picks_the_format_of_the_chosen_suffix(qtbot, monkeypatch):
+    dialog = ExportDialog()
+    qtbot.addWidget(dialog)
+    chosen = []
+    monkeypatch.setattr(
+        QFileDialog, "getSaveFileName", classmethod(lambda *_: (chosen[-1], ""))
+    )
+
+    for path, expected in [
+        ("out.csv", ExportFormat.CSV),
+        ("results", ExportFormat.CSV),
+        ("out.txt", ExportFormat.CSV),
+        ("out.ARROW", ExportFormat.ARROW),
+    ]:
+        chosen.append(path)
+        dialog._browse()
+        assert dialog.path.text() == path
+        assert dialog.format.currentData() == expected
+
+
+def test_tracks_exports_running_side_by_side(qtbot, tmp_path):
+    conn = duckdb.connect()
+    progress = ExportProgress()
+    qtbot.addWidget(progress)
+    jobs = [
+        ExportJob(
+            conn,
+            "SELECT * FROM range(10)",
+            tmp_path / f"{name}.csv",
+            ExportOptions(ExportFormat.CSV),
+        )
+        for name in ("first", "second")
+    ]
+
+    for job in jobs:
+        progress.track(job)
+    assert "2 files" in progress.bar.format()
+
+    with qtbot.waitSignal(jobs[0].finished):
+        jobs[0].start()
+    assert not progress.isHidden()
+    assert progress._jobs == [jobs[1]]
+
+    with qtbot.waitSignal(jobs[1].finished):
+        jobs[1].start()
+    assert progress.isHidden()
@@ -0,0 +1,38 @@
+import duckdb
+from plotdata import PlotSource
+
+from gui.plotter import BarChart, Plotter, XYChart
+
+
+def test_xy_chart_reloads_points_when_zooming(qtbot):
+    source = PlotSource.from_query(
+        duckdb.connect(), "SELECT range AS x, sin(range) AS y FROM range(100000)"
+    )
+    chart = XYChart(source, "Line")
+    qtbot.addWidget(chart)
+
+    assert "of 100,000 points" in chart.decimation_label.text()
+
+    chart.plot_widget.setXRange(0, 100, padding=0)
+    chart.load_visible()
+
+    assert "Showing all" in chart.decimation_label.text()
+
+
+def test_plotter_builds_charts_when_selected(qtbot):
+    source = PlotSource.from_query(
+        duckdb.connect(), "SELECT range AS x, range % 7 AS y FROM range(1000)"
+    )
+    plotter = Plotter(source)
+    qtbot.addWidget(plotter)
+
+    assert isinstance(plotter.stack.currentWidget(), XYChart)
+    assert not any(
+        isinstance(plotter.stack.widget(i), BarChart)
+        for i in range(plotter.stack.count())
+    )
+
+    plotter.combobox.setCurrentText("Bar")
+
+    assert isinstance(plotter.stack.currentWidget(), BarChart)
+    assert plotter.stack.count() == len(Plotter.PLOT_TYPES)
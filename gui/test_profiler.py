@@ -0,0 +1,56 @@
+from db import DB
+from profiling import Operator, QueryProfile
+
+from gui.profiler import ProfilePanel
+
+
+def profile(query, plan=None):
+    return QueryProfile(query, 0.01, 0.002, 0.001, 10, 1024, plan=plan)
+
+
+def test_compares_latest_run_with_previous_one(qtbot):
+    panel = ProfilePanel(DB.from_connection())
+    qtbot.addWidget(panel)
+
+    panel.add_profile(first := profile("SELECT 1"))
+    panel.add_profile(second := profile("SELECT 2"))
+    panel.add_profile(third := profile("SELECT 3"))
+
+    assert panel.latest.profile is third
+    assert panel.compared.profile is second
+
+    panel.compared.runs.setCurrentIndex(0)
+    panel.add_profile(profile("SELECT 4"))
+
+    assert panel.compared.profile is first
+
+
+def test_shows_timings_and_operator_tree(qtbot):
+    panel = ProfilePanel(DB.from_connection())
+    qtbot.addWidget(panel)
+    scan = Operator("TABLE_SCAN", 0.004, 10, {"Table": "people"})
+
+    panel.add_profile(profile("SELECT 1", Operator("QUERY", 0.005, 0, {}, [scan])))
+
+    tree = panel.latest.tree
+    total = tree.topLevelItem(0)
+    assert total.text(0) == "Total"
+    assert [total.child(i).text(0) for i in range(3)] == ["Execute", "Fetch", "Model"]
+    assert total.child(1).text(3) == "1 KB"
+    assert total.text(2) == "10"
+    plan = tree.topLevelItem(1)
+    assert plan.child(0).text(0) == "TABLE_SCAN"
+    assert plan.child(0).text(3) == "Table: people"
+
+
+def test_marks_counts_of_results_not_read_to_the_end(qtbot):
+    panel = ProfilePanel(DB.from_connection())
+    qtbot.addWidget(panel)
+    partial = profile("SELECT 1")
+    partial.complete = False
+
+    panel.add_profile(partial)
+
+    total = panel.latest.tree.topLevelItem(0)
+    assert total.text(2) == "10+"
+    assert total.child(1).text(3) == "1 KB+"
@@ -0,0 +1,33 @@
+from pathlib import Path
+
+from db import DB
+from engine import EngineSettings
+
+from gui.settings import MemoryUsage, SettingsDialog
+
+
+def test_edits_engine_settings(qtbot, tmp_path):
+    db = DB.from_connection()
+    db.apply_settings(EngineSettings(threads=2))
+    dialog = SettingsDialog(db)
+    qtbot.addWidget(dialog)
+
+    assert dialog.threads.value() == 2
+    assert dialog.memory_limit.text() == ""
+    assert dialog.memory_limit.placeholderText()
+
+    dialog.memory_limit.setText("2GB")
+    dialog.threads.setValue(0)
+    dialog.temp_directory.setText(str(tmp_path))
+
+    assert dialog.settings() == EngineSettings("2GB", None, Path(tmp_path), 1024)
+
+
+def test_shows_memory_usage(qtbot):
+    db = DB.from_connection()
+    db.apply_settings(EngineSettings(memory_limit="1GB"))
+    label = MemoryUsage(db)
+    qtbot.addWidget(label)
+
+    assert label.text().startswith("Engine memory:")
+    assert label.text().endswith("of 953.6 MiB")
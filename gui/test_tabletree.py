@@ -1,7 +1,10 @@
+from unittest import mock
+
 import duckdb
-from db import Table
+from columnstats import ColumnStats, ColumnStatsLoader, TableStats
+from db import ImportMode, ImportOptions, Sample, SchemaTracker, Table
 
-from gui.tabletree import TableTreeItem
+from gui.tabletree import TableTree, TableTreeItem
 
 
 def test_table_tree_item(datadir):
@@ -15,3 +18,81 @@ def test_table_tree_item(datadir):
     assert tree_item.child(0).text(1) == "VARCHAR"
     assert tree_item.child(1).text(0) == "age"
     assert tree_item.child(1).text(1) == "BIGINT"
+
+
+def test_materialize_view_from_context_menu(qtbot, datadir):
+    conn = duckdb.connect()
+    tree = TableTree(SchemaTracker(conn))
+    qtbot.addWidget(tree)
+    tree.materialize_requested.connect(materialize_requested_signal_mock := mock.Mock())
+
+    view = Table.from_file(conn, datadir / "people.csv", ImportOptions(ImportMode.VIEW))
+    tree.add_table(view)
+    tree.add_table(Table.from_file(conn, datadir / "animals.csv"))
+
+    view_menu = tree.context_menu(tree.topLevelItem(0))
+    table_menu = tree.context_menu(tree.topLevelItem(1))
+
+    assert table_menu.isEmpty()
+    view_menu.actions()[0].trigger()
+    materialize_requested_signal_mock.assert_called_once_with(view)
+
+
+def test_load_sampled_table_in_full_from_context_menu(qtbot, datadir):
+    conn = duckdb.connect()
+    tree = TableTree(SchemaTracker(conn))
+    qtbot.addWidget(tree)
+    tree.load_full_requested.connect(load_full_requested_signal_mock := mock.Mock())
+
+    sample = Table.from_file(
+        conn, datadir / "people.csv", ImportOptions(sample=Sample())
+    )
+    tree.add_table(sample)
+
+    assert tree.topLevelItem(0).text(1) == "SAMPLE"
+    tree.context_menu(tree.topLevelItem(0)).actions()[0].trigger()
+    load_full_requested_signal_mock.assert_called_once_with(sample)
+
+
+def test_update_table_replaces_its_columns(qtbot, datadir):
+    conn = duckdb.connect()
+    tree = TableTree(SchemaTracker(conn))
+    qtbot.addWidget(tree)
+
+    table = Table.from_file(conn, datadir / "people.csv")
+    tree.add_table(table)
+    tree.update_table(Table(table.name, table.columns[:1]))
+
+    assert tree.topLevelItemCount() == 1
+    assert tree.topLevelItem(0).childCount() == 1
+
+
+def test_loads_column_stats_when_table_is_expanded(qtbot, datadir):
+    conn = duckdb.connect()
+    tracker = SchemaTracker(conn)
+    loader = ColumnStatsLoader(conn, tracker)
+    tree = TableTree(tracker, loader)
+    qtbot.addWidget(tree)
+    tree.add_table(Table.from_file(conn, datadir / "people.csv"))
+    item = tree.topLevelItem(0)
+
+    assert item.child(1).text(2) == ""
+    with qtbot.waitSignal(loader.stats_ready):
+        item.setExpanded(True)
+
+    assert item.text(2) == "2 rows"
+    assert item.child(1).text(2).startswith("~2 distinct, 0% null, ")
+
+
+def test_marks_stats_of_a_sample(qtbot, datadir):
+    conn = duckdb.connect()
+    tree = TableTree(SchemaTracker(conn))
+    qtbot.addWidget(tree)
+    tree.add_table(Table.from_file(conn, datadir / "people.csv"))
+    item = tree.topLevelItem(0)
+
+    age = ColumnStats(2, 0.0, "25", "30")
+    item.set_stats(TableStats({"age": age}, 1000, sampled=True))
+
+    assert item.text(2) == "1000 rows sampled"
+    assert item.child(1).toolTip(2) == "Statistics of a 1000-row sample"
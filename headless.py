@@ -0,0 +1,89 @@
+"""Runs a query or script over data files and writes its result, without Qt."""
+
+import sys
+from argparse import Namespace
+from pathlib import Path
+
+import duckdb
+
+from csvdialect import CsvOptions, DialectCache
+from datafiles import FileGroup
+from db import DB, ImportMode
+from engine import EngineSettings
+from export import ExportFormat, ExportOptions, write_batches
+from importcache import ImportCache
+
+FORMATS = {export_format.value: export_format for export_format in ExportFormat}
+
+
+def run(args: Namespace) -> int:
+    db = DB.from_connection(headless=True)
+    db.error_occurred.connect(_report)
+    if not db.apply_settings(EngineSettings.from_args(args)):
+        return 1
+    if args.import_as_views:
+        db.import_options.mode = ImportMode.VIEW
+    db.import_options.sample = args.sample
+    db.import_options.csv = CsvOptions.from_args(args)
+    if args.cache_dir:
+        db.import_options.cache = ImportCache(args.cache_dir)
+        db.import_options.dialects = DialectCache(args.cache_dir / DialectCache.FILE)
+    db.import_options.group_files = args.group_files
+    if args.datadir:
+        db.create_tables_from_data_dir(args.datadir)
+    if args.glob:
+        db.create_tables_from_files(map(FileGroup.from_pattern, args.glob))
+
+    script = args.query if args.query is not None else args.script.read_text()
+    options = ExportOptions(FORMATS[args.format])
+    cursor = db.cursor()
+    try:
+        if not (statements := duckdb.extract_statements(script)):
+            _report("Nothing to run")
+            return 1
+        *statements, last = statements
+        for statement in statements:
+            cursor.execute(statement.query)
+        if (relation := cursor.sql(last.query)) is None:
+            return 0
+
+        batch_size = (
+            options.row_group_size if options.format == ExportFormat.PARQUET else None
+        )
+        reader = relation.fetch_arrow_reader(batch_size or 100_000)
+        write_batches(reader, _sink(args.output), options)
+    except (duckdb.Error, OSError) as e:
+        _report(e)
+        return 1
+    finally:
+        cursor.close()
+    return 0
+
+
+def add_arguments(parser):
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--query", help="Run a query headless and write its result")
+    group.add_argument(
+        "--script",
+        type=Path,
+        help="Run the statements of a SQL file headless and write the last result",
+    )
+    parser.add_argument(
+        "--format",
+        choices=list(FORMATS),
+        default="csv",
+        help="Format of the headless result",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        help="File for the headless result, standard output if not given",
+    )
+
+
+def _sink(output: Path | None):
+    return str(output) if output is not None else sys.stdout.buffer
+
+
+def _report(error: Exception | str):
+    print(f"Error: {error}", file=sys.stderr)
@@ -0,0 +1,77 @@
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import duckdb
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    size: int
+    mtime_ns: int
+
+    @classmethod
+    def of(cls, path: Path):
+        stat = path.stat()
+        return cls(stat.st_size, stat.st_mtime_ns)
+
+
+class ImportCache:
+    """Parquet copies of imported files, kept in a directory across runs.
+
+    A manifest maps each source path, along with how it was read, to the
+    size and mtime it had when it was cached. Files whose fingerprint
+    still matches are read back from Parquet instead of being parsed
+    again, unless they are now read with other options, like another
+    CSV delimiter or header.
+    """
+
+    MANIFEST = "manifest.json"
+
+    directory: Path
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._manifest = self._load_manifest()
+
+    def cached_file(
+        self, conn: duckdb.DuckDBPyConnection, path: Path, source: str
+    ) -> Path:
+        """Returns the Parquet copy of ``path``, writing it from ``source``
+        first if the file is new or changed since it was cached."""
+        # The same file read with other options is another table.
+        reader = hashlib.sha1(source.encode()).hexdigest()[:16]
+        key = f"{path.resolve()}#{reader}"
+        fingerprint = Fingerprint.of(path)
+        parquet = self.directory / f"{hashlib.sha1(key.encode()).hexdigest()}.parquet"
+
+        with self._lock:
+            entry = self._manifest.get(key)
+        if entry == asdict(fingerprint) and parquet.exists():
+            return parquet
+
+        partial = parquet.with_suffix(f".{threading.get_ident()}.partial")
+        conn.sql(f"COPY (SELECT * FROM {source}) TO '{partial}' (FORMAT PARQUET)")
+        os.replace(partial, parquet)
+
+        with self._lock:
+            self._manifest[key] = asdict(fingerprint)
+            self._save_manifest()
+        return parquet
+
+    def _load_manifest(self) -> dict[str, dict]:
+        try:
+            return json.loads((self.directory / self.MANIFEST).read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_manifest(self):
+        manifest = self.directory / self.MANIFEST
+        partial = manifest.with_suffix(".partial")
+        partial.write_text(json.dumps(self._manifest, indent=2))
+        os.replace(partial, manifest)
@@ -1,103 +1,176 @@
+import argparse
+import os
+import sys
+import time
 from pathlib import Path
 
-from PySide6.QtGui import QAction
-from qtpy.QtCore import Qt
-from qtpy.QtWidgets import (
-    QDockWidget,
-    QFileDialog,
-    QMainWindow,
-    QPushButton,
-    QTreeWidget,
-)
 
-from db import DB
-from gui.plotter import plot_result
-from gui.query import QueryView
-from gui.tabletree import TableTree
-
-
-class MainWindow(QMainWindow):
-    query_view: QueryView
-    tables_tree: QTreeWidget
-    plot_result_button: QPushButton
+class StartupProfile:
+    """Time spent in each phase of startup, measured from its creation."""
 
     def __init__(self):
-        super().__init__()
-        self.setWindowTitle("Data Pond")
-        self.resize(1280, 768)
-
-        self.db = DB.from_connection()
-
-        file_menu = self.menuBar().addMenu("File")
+        self.phases: list[tuple[str, float]] = []
+        self._start = self._last = time.perf_counter()
 
-        self.load_files_action = QAction("Open Files...", self)
-        self.load_files_action.triggered.connect(self.load_files)
-        file_menu.addAction(self.load_files_action)
-
-        self.add_dir_data_source_action = QAction("Add Directory...", self)
-        self.add_dir_data_source_action.triggered.connect(self.add_dir_data_source)
-        file_menu.addAction(self.add_dir_data_source_action)
-
-        self.tables_tree = TableTree(self.db.schema_tracker)
-        self._add_to_dock(
-            self.tables_tree, "Tables", Qt.DockWidgetArea.LeftDockWidgetArea
-        )
-
-        self.query_view = QueryView(self.db)
-        self.setCentralWidget(self.query_view)
-
-        self.plot_result_button = QPushButton("Plot Results")
-        self.plot_result_button.clicked.connect(self._plot_result)
-
-        toggle_log_button = QPushButton("Toggle Log")
-        toggle_log_button.clicked.connect(self.query_view.toggle_log)
-
-        status_bar = self.statusBar()
-        status_bar.addPermanentWidget(toggle_log_button)
-        status_bar.addPermanentWidget(self.plot_result_button)
-
-    def load_files(self):
-        data_files, _ = QFileDialog.getOpenFileNames(
-            self,
-            "Select one or more files to open",
-            "/home",
-            "Data Files (*.csv)",
-        )
-        for data_file in data_files:
-            self.db.create_table_from_file(Path(data_file))
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
 
-    def add_dir_data_source(self):
-        data_dir = QFileDialog.getExistingDirectory(self, "Select Data Directory")
-        self.db.create_tables_from_data_dir(Path(data_dir))
+    @property
+    def total(self) -> float:
+        return self._last - self._start
 
-    def _plot_result(self):
-        if self.db.result_model.result is None:
-            return
+    def report(self, file=None):
+        file = file or sys.stderr
+        for phase, seconds in self.phases:
+            print(f"{phase:<24}{seconds * 1000:8.1f} ms", file=file)
+        print(f"{'total':<24}{self.total * 1000:8.1f} ms", file=file)
 
-        self._plot_window = plot_result(self.db.result_model.result)
-        self._plot_window.show()
 
-    def _add_to_dock(self, widget, title, area):
-        dock = QDockWidget(title, self)
-        dock.setWidget(widget)
-        self.addDockWidget(area, dock)
-
-
-if __name__ == "__main__":
-    import argparse
-    import sys
+def parse_args(argv=None):
+    import csvdialect
+    import engine
+    import headless
+    from db import DB
 
     parser = argparse.ArgumentParser(description="Data Pond")
     parser.add_argument("--datadir", type=Path, help="Directory with CSV files")
-    args = parser.parse_args()
-
+    parser.add_argument(
+        "--glob",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="Import the files matching a glob pattern as one table, "
+        "e.g. 'data/events-*.csv'. Can be given more than once",
+    )
+    parser.add_argument(
+        "--group-files",
+        action="store_true",
+        help="Import files in --datadir named like events-2024-01.csv, "
+        "events-2024-02.csv as a single table",
+    )
+    parser.add_argument(
+        "--import-as-views",
+        action="store_true",
+        help="Register files as views over read_csv_auto instead of loading them",
+    )
+    parser.add_argument(
+        "--sample",
+        type=_sample,
+        metavar="METHOD:SIZE",
+        help="Import only a sample of each file: reservoir:<rows>, "
+        "percent:<percent> or first:<rows>",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep tables in sync with changes to the files in data directories",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        help="Directory where files imported as tables are cached as Parquet "
+        "across runs",
+    )
+    parser.add_argument(
+        "--result-cache-mb",
+        type=int,
+        default=DB.RESULT_CACHE_BYTES // (1024 * 1024),
+        help="Memory for caching results of repeated queries, 0 to disable",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Print how long each phase of startup took, up to the first paint",
+    )
+    csvdialect.add_arguments(parser)
+    engine.add_arguments(parser)
+    headless.add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def _sample(text: str):
+    from db import Sample
+
+    try:
+        return Sample.parse(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def is_headless(argv=None) -> bool:
+    """Whether the command line asks for a headless run, told apart
+    before parse_args imports anything that could import Qt."""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--query")
+    parser.add_argument("--script")
+    args, _ = parser.parse_known_args(argv)
+    return args.query is not None or args.script is not None
+
+
+def run_gui(args, profile: StartupProfile | None = None) -> int:
+    profile = profile or StartupProfile()
+
+    from qtpy.QtCore import QEvent, QObject, QTimer
     from qtpy.QtWidgets import QApplication
 
+    profile.mark("Qt imports")
     app = QApplication(sys.argv)
+    profile.mark("QApplication")
+
+    from csvdialect import CsvOptions, DialectCache
+    from engine import EngineSettings
+    from gui.mainwindow import MainWindow
+    from importcache import ImportCache
+
+    profile.mark("window imports")
 
     window = MainWindow()
-    if args.datadir:
-        window.db.create_tables_from_data_dir(args.datadir)
+    window.import_as_views_action.setChecked(args.import_as_views)
+    window.set_import_sample(args.sample)
+    window.group_files_action.setChecked(args.group_files)
+    window.db.import_options.csv = CsvOptions.from_args(args)
+    if args.cache_dir:
+        window.db.import_options.cache = ImportCache(args.cache_dir)
+        window.db.import_options.dialects = DialectCache(
+            args.cache_dir / DialectCache.FILE
+        )
+    window.db.result_cache.max_bytes = args.result_cache_mb * 1024 * 1024
+    window.db.apply_settings(EngineSettings.from_args(args))
+    window.watch_data_dirs_action.setChecked(args.watch)
+    profile.mark("window construction")
+
+    class FirstPaint(QObject):
+        def eventFilter(self, watched, event):
+            if event.type() == QEvent.Type.Paint:
+                window.removeEventFilter(self)
+                profile.mark("first paint")
+                if args.profile_startup:
+                    profile.report()
+            return False
+
+    first_paint = FirstPaint(window)
+    window.installEventFilter(first_paint)
 
     window.show()
-    sys.exit(app.exec_())
+    # Importing the data directory starts once the window is up, so a
+    # large directory doesn't keep it from appearing.
+    if args.datadir:
+        QTimer.singleShot(0, lambda: window.open_data_dir(args.datadir))
+    for pattern in args.glob:
+        QTimer.singleShot(0, lambda pattern=pattern: window.open_file_group(pattern))
+    return app.exec_()
+
+
+if __name__ == "__main__":
+    profile = StartupProfile()
+    if is_headless():
+        os.environ["DATAPOND_NO_QT"] = "1"
+    args = parse_args()
+    profile.mark("core imports")
+    if args.query is not None or args.script is not None:
+        import headless
+
+        sys.exit(headless.run(args))
+    sys.exit(run_gui(args, profile))
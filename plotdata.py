@@ -0,0 +1,252 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+
+Range = tuple[float, float]
+
+NUMERIC_TYPES = {
+    "TINYINT",
+    "SMALLINT",
+    "INTEGER",
+    "BIGINT",
+    "HUGEINT",
+    "UTINYINT",
+    "USMALLINT",
+    "UINTEGER",
+    "UBIGINT",
+    "UHUGEINT",
+    "FLOAT",
+    "DOUBLE",
+}
+
+
+@dataclass
+class Decimated:
+    """Points to draw, out of ``total`` points in the queried range."""
+
+    x: np.ndarray
+    y: np.ndarray
+    total: int
+
+    @property
+    def ratio(self) -> float:
+        return self.total / len(self.x) if len(self.x) else 1.0
+
+
+@dataclass
+class Histogram:
+    edges: np.ndarray
+    counts: np.ndarray
+
+
+@dataclass
+class Density:
+    """Point counts on a grid, indexed by x bin then y bin."""
+
+    counts: np.ndarray
+    x_range: Range
+    y_range: Range
+
+
+@dataclass
+class Bars:
+    categories: list[str]
+    values: np.ndarray
+
+
+class PlotSource:
+    """A result for plots to query, as a temporary DuckDB view over the
+    query it came from or as its Arrow table.
+
+    Instead of moving every row into Python, plots ask for as many points
+    as they have pixels: min and max per pixel-wide bucket for lines, and
+    a reservoir sample for scatters. Both only consider the visible range,
+    so zooming in brings back detail. Histograms, densities and bars are
+    aggregated in DuckDB as well, so only the bins reach Python.
+    """
+
+    TABLE = "plot_source"
+    AGGREGATES = ["count", "sum", "avg", "min", "max"]
+
+    columns: list[str]
+    category_columns: list[str]
+
+    def __init__(self, cursor: duckdb.DuckDBPyConnection):
+        self._cursor = cursor
+        self._expressions: dict[str, str] = {}
+        self.category_columns = []
+        for name, data_type, *_ in cursor.sql(f"DESCRIBE {self.TABLE}").fetchall():
+            self.category_columns.append(name)
+            if (expression := _as_double(name, data_type)) is not None:
+                self._expressions[name] = expression
+        self.columns = list(self._expressions)
+
+    @classmethod
+    def from_query(cls, cursor: duckdb.DuckDBPyConnection, query: str):
+        """Plots the result of ``query`` without running it up front. Each
+        plot runs it again, reading only the columns it shows."""
+        cursor.sql(f"CREATE TEMP VIEW {cls.TABLE} AS {query}")
+        return cls(cursor)
+
+    @classmethod
+    def from_arrow(cls, cursor: duckdb.DuckDBPyConnection, table: pa.Table):
+        """Plots ``table`` where it is: DuckDB scans its Arrow buffers
+        rather than copying them into a table of its own."""
+        cursor.register(cls.TABLE, table)
+        return cls(cursor)
+
+    def extent(self, x: str, y: str) -> Optional[tuple[Range, Range]]:
+        x_min, x_max, y_min, y_max = self._cursor.sql(
+            f"SELECT min(x), max(x), min(y), max(y) FROM {self._points(x, y)}"
+        ).fetchone()
+        if x_min is None:
+            return None
+        return (x_min, x_max), (y_min, y_max)
+
+    def line(self, x: str, y: str, x_range: Range, buckets: int) -> Decimated:
+        x_min, x_max = x_range
+        width = (x_max - x_min) or 1.0
+        result = _fetch_numpy(
+            self._cursor.sql(
+                "SELECT arg_min(x, y) AS x_low, min(y) AS y_low, "
+                "arg_max(x, y) AS x_high, max(y) AS y_high, count(*) AS n "
+                f"FROM {self._points(x, y, x_range)} "
+                f"GROUP BY {_bin('x', x_min, width, buckets)} "
+                "ORDER BY min(x)"
+            )
+        )
+
+        x_low, y_low = result["x_low"], result["y_low"]
+        x_high, y_high = result["x_high"], result["y_high"]
+        low_first = x_low <= x_high
+        xs = np.column_stack(
+            [np.where(low_first, x_low, x_high), np.where(low_first, x_high, x_low)]
+        )
+        ys = np.column_stack(
+            [np.where(low_first, y_low, y_high), np.where(low_first, y_high, y_low)]
+        )
+        return Decimated(xs.ravel(), ys.ravel(), int(result["n"].sum()))
+
+    def scatter(
+        self, x: str, y: str, x_range: Range, y_range: Range, max_points: int
+    ) -> Decimated:
+        points = self._points(x, y, x_range, y_range)
+        (total,) = self._cursor.sql(f"SELECT count(*) FROM {points}").fetchone()
+        result = _fetch_numpy(
+            self._cursor.sql(
+                f"SELECT x, y FROM {points} "
+                f"USING SAMPLE reservoir({max_points} ROWS) REPEATABLE (42)"
+            )
+        )
+        return Decimated(result["x"], result["y"], total)
+
+    def histogram(self, column: str, bins: int) -> Histogram:
+        if (extent := self.extent(column, column)) is None:
+            return Histogram(np.array([]), np.array([]))
+
+        (low, high), _ = extent
+        width = (high - low) or 1.0
+        result = _fetch_numpy(
+            self._cursor.sql(
+                f"SELECT {_bin('x', low, width, bins)} AS bin, count(*) AS n "
+                f"FROM {self._points(column, column)} GROUP BY bin"
+            )
+        )
+
+        counts = np.zeros(bins)
+        counts[result["bin"].astype(int)] = result["n"]
+        return Histogram(np.linspace(low, low + width, bins + 1), counts)
+
+    def density(self, x: str, y: str, bins: int) -> Optional[Density]:
+        if (extent := self.extent(x, y)) is None:
+            return None
+
+        (x_low, x_high), (y_low, y_high) = extent
+        x_width, y_width = (x_high - x_low) or 1.0, (y_high - y_low) or 1.0
+        result = _fetch_numpy(
+            self._cursor.sql(
+                f"SELECT {_bin('x', x_low, x_width, bins)} AS x_bin, "
+                f"{_bin('y', y_low, y_width, bins)} AS y_bin, count(*) AS n "
+                f"FROM {self._points(x, y)} GROUP BY x_bin, y_bin"
+            )
+        )
+
+        counts = np.zeros((bins, bins))
+        counts[result["x_bin"].astype(int), result["y_bin"].astype(int)] = result["n"]
+        return Density(counts, (x_low, x_low + x_width), (y_low, y_low + y_width))
+
+    def bars(self, category: str, value: str, aggregate: str, limit: int) -> Bars:
+        """Aggregates ``value`` per ``category``, keeping the ``limit``
+        categories with the largest aggregate."""
+        assert aggregate in self.AGGREGATES, f"Unknown aggregate {aggregate}"
+        measure = (
+            "count(*)"
+            if aggregate == "count"
+            else f"{aggregate}({self._expressions[value]})"
+        )
+        rows = self._cursor.sql(
+            f'SELECT "{category}"::VARCHAR AS category, {measure} AS value '
+            f"FROM {self.TABLE} GROUP BY category "
+            f"ORDER BY value DESC NULLS LAST LIMIT {limit}"
+        ).fetchall()
+        return Bars(
+            [str(category) for category, _ in rows],
+            np.array([value for _, value in rows], dtype=float),
+        )
+
+    def close(self):
+        self._cursor.close()
+
+    def _points(
+        self,
+        x: str,
+        y: str,
+        x_range: Optional[Range] = None,
+        y_range: Optional[Range] = None,
+    ) -> str:
+        conditions = ["x IS NOT NULL", "y IS NOT NULL"]
+        if x_range is not None:
+            conditions.append(f"x BETWEEN {x_range[0]} AND {x_range[1]}")
+        if y_range is not None:
+            conditions.append(f"y BETWEEN {y_range[0]} AND {y_range[1]}")
+
+        return (
+            f"(SELECT * FROM (SELECT {self._expressions[x]} AS x, "
+            f"{self._expressions[y]} AS y FROM {self.TABLE}) "
+            f"WHERE {' AND '.join(conditions)})"
+        )
+
+
+def _fetch_numpy(relation: duckdb.DuckDBPyRelation) -> dict[str, np.ndarray]:
+    """The columns of a result as NumPy arrays, which view the Arrow buffers
+    DuckDB wrote the result into where they can, rather than copying
+    them. Such views are read only."""
+    table = relation.fetch_arrow_table()
+    return {
+        name: _to_numpy(column)
+        for name, column in zip(table.column_names, table.columns)
+    }
+
+
+def _to_numpy(column: pa.ChunkedArray) -> np.ndarray:
+    # Combining chunks copies them, even if there is only one.
+    array = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+    return array.to_numpy(zero_copy_only=False)
+
+
+def _bin(column: str, low: float, width: float, bins: int) -> str:
+    """SQL expression for the index of the bin ``column`` falls in."""
+    return f"least(floor(({column} - {low}) / {width} * {bins}), {bins - 1})"
+
+
+def _as_double(name: str, data_type: str) -> Optional[str]:
+    """SQL expression turning a column into DOUBLE, if it can be plotted."""
+    column = f'"{name}"'
+    if data_type.startswith(("DATE", "TIMESTAMP")):
+        return f"epoch({column})"
+    if data_type in NUMERIC_TYPES or data_type.startswith("DECIMAL"):
+        return f"{column}::DOUBLE"
+    return None
@@ -0,0 +1,74 @@
+import json
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+import duckdb
+
+
+@dataclass
+class Operator:
+    """A node of DuckDB's profiled query plan."""
+
+    name: str
+    seconds: float
+    rows: int
+    details: dict[str, str] = field(default_factory=dict)
+    children: list["Operator"] = field(default_factory=list)
+
+    @classmethod
+    def from_json(cls, node: dict):
+        return cls(
+            node.get("operator_type") or node.get("query_name") or "QUERY",
+            node.get("operator_timing", 0.0),
+            node.get("operator_cardinality", 0),
+            {key: _detail(value) for key, value in node.get("extra_info", {}).items()},
+            [cls.from_json(child) for child in node.get("children", [])],
+        )
+
+    def walk(self, depth=0) -> Iterator[tuple[int, "Operator"]]:
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+
+@dataclass
+class QueryProfile:
+    """Where the time of one run went, from submitting the query to showing
+    its first rows.
+
+    ``execute_seconds`` is spent in DuckDB until the result can be read,
+    ``fetch_seconds`` reading Arrow batches from it and ``model_seconds``
+    resetting the result model and inserting rows into it. ``rows`` and
+    ``nbytes`` only count the rows fetched so far until the result is
+    ``complete``. The operator tree is only known once the query was run
+    again with EXPLAIN ANALYZE.
+    """
+
+    query: str
+    execute_seconds: float
+    fetch_seconds: float
+    model_seconds: float
+    rows: int
+    nbytes: int
+    cached: bool = False
+    plan: Optional[Operator] = None
+    complete: bool = True
+
+    @property
+    def total_seconds(self) -> float:
+        return self.execute_seconds + self.fetch_seconds + self.model_seconds
+
+
+def explain_analyze(cursor: duckdb.DuckDBPyConnection, query: str) -> Operator:
+    """Runs ``query`` once more with the profiler on and returns its plan.
+
+    The profiler setting stays with ``cursor``, so a cursor of its own
+    keeps other queries from being profiled.
+    """
+    cursor.sql("SET enable_profiling = 'json'")
+    ((_, plan),) = cursor.sql(f"EXPLAIN ANALYZE {query}").fetchall()
+    return Operator.from_json(json.loads(plan))
+
+
+def _detail(value) -> str:
+    return ", ".join(value) if isinstance(value, list) else str(value)
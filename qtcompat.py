@@ -0,0 +1,70 @@
+"""Qt's QObject, Signal, Slot and QThreadPool, or stand-ins without Qt."""
+
+import os
+import threading
+from typing import Callable
+
+try:
+    if os.environ.get("DATAPOND_NO_QT"):
+        raise ImportError("Qt disabled by DATAPOND_NO_QT")
+    from qtpy.QtCore import QObject, QThreadPool, Signal, Slot
+
+    HAS_QT = True
+except ImportError:
+    HAS_QT = False
+
+    class BoundSignal:
+        def __init__(self):
+            self._slots: list[Callable] = []
+
+        def connect(self, slot: Callable):
+            self._slots.append(slot)
+
+        def disconnect(self, slot: Callable):
+            self._slots.remove(slot)
+
+        def emit(self, *args):
+            for slot in list(self._slots):
+                slot(*args)
+
+        # Connecting a signal to another one, as Qt allows, re-emits it.
+        __call__ = emit
+
+    class Signal:
+        def __init__(self, *types):
+            self._name = ""
+
+        def __set_name__(self, owner, name):
+            self._name = f"_signal_{name}"
+
+        def __get__(self, instance, owner=None):
+            if instance is None:
+                return self
+            if (bound := instance.__dict__.get(self._name)) is None:
+                bound = instance.__dict__[self._name] = BoundSignal()
+            return bound
+
+    def Slot(*types, **kwargs):
+        return lambda function: function
+
+    class QObject:
+        def __init__(self, parent=None):
+            self._parent = parent
+
+    class QThreadPool:
+        _instance = None
+
+        @classmethod
+        def globalInstance(cls):
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+        def setMaxThreadCount(self, count: int):
+            pass
+
+        def start(self, function: Callable[[], None]):
+            threading.Thread(target=function, daemon=True).start()
+
+
+__all__ = ["HAS_QT", "QObject", "QThreadPool", "Signal", "Slot"]
@@ -0,0 +1,81 @@
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import pyarrow as pa
+
+# String literals and quoted identifiers are kept as they are, while runs
+# of whitespace anywhere else collapse to a single space.
+TOKEN = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|\s+""")
+
+
+@dataclass
+class CachedResult:
+    table: pa.Table
+    tables: frozenset[str]
+
+
+class ResultCache:
+    """Complete query results, keyed by their normalized SQL text.
+
+    Entries remember which tables they read, so they can be invalidated
+    when one of them changes. The least recently used entries are evicted
+    to stay within ``max_bytes``. ``version`` goes up on every
+    invalidation, so a result computed before one can be told apart from
+    a result computed after it.
+    """
+
+    max_bytes: int
+    nbytes: int
+    version: int
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.version = 0
+        self._entries: OrderedDict[str, CachedResult] = OrderedDict()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        collapsed = TOKEN.sub(lambda m: " " if m[0].isspace() else m[0], query)
+        return collapsed.strip().rstrip(";").strip()
+
+    def get(self, query: str) -> Optional[pa.Table]:
+        key = self.normalize(query)
+        if (entry := self._entries.get(key)) is None:
+            return None
+        self._entries.move_to_end(key)
+        return entry.table
+
+    def put(self, query: str, table: pa.Table, tables: frozenset[str]) -> bool:
+        if not self.max_bytes or table.nbytes > self.max_bytes:
+            return False
+
+        key = self.normalize(query)
+        self._remove(key)
+        self._entries[key] = CachedResult(table, tables)
+        self.nbytes += table.nbytes
+        while self.nbytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+        return True
+
+    def invalidate(self, table_name: str):
+        self.version += 1
+        for key in [k for k, e in self._entries.items() if table_name in e.tables]:
+            self._remove(key)
+
+    def clear(self):
+        self.version += 1
+        self._entries.clear()
+        self.nbytes = 0
+
+    def __contains__(self, query: str):
+        return self.normalize(query) in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key: str):
+        if (entry := self._entries.pop(key, None)) is not None:
+            self.nbytes -= entry.table.nbytes
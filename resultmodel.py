@@ -0,0 +1,157 @@
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional
+
+import duckdb
+import pyarrow as pa
+import pyarrow.compute as pc
+from qtpy.QtCore import QAbstractTableModel, QModelIndex, Qt, Signal
+
+from db import ResultStream
+
+if TYPE_CHECKING:
+    from polars import DataFrame
+
+
+class QueryResultModel(QAbstractTableModel):
+    """Table model over a ``ResultStream``, fetching batches as the view
+    scrolls down through ``canFetchMore``/``fetchMore``.
+
+    Cells are formatted a block of rows of one column at a time and the
+    formatted strings are kept in an LRU cache, so repaints don't go
+    through a Python conversion per cell.
+    """
+
+    BLOCK_SIZE = 256
+    MAX_CACHED_BLOCKS = 2048
+
+    error_occurred = Signal(Exception)
+    result_complete = Signal(object)
+    result_truncated = Signal(int)
+
+    stream: ResultStream
+    reset_seconds: float
+    max_result_bytes: Optional[int]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.stream = ResultStream.empty()
+        self.reset_seconds = 0.0
+        self.max_result_bytes = None
+        self._dataframe: Optional["DataFrame"] = None
+        self._alignments: list[Qt.AlignmentFlag] = []
+        self._cell_cache: OrderedDict[tuple[int, int, int], list] = OrderedDict()
+
+    def set_result(self, result: "ResultStream | DataFrame"):
+        if not isinstance(result, ResultStream):
+            result = ResultStream.from_dataframe(result)
+
+        start = time.perf_counter()
+        self.beginResetModel()
+        self.stream.close()
+        self.stream = result
+        self._dataframe = None
+        self._alignments = [_alignment(field.type) for field in result.schema]
+        self._cell_cache.clear()
+        self.endResetModel()
+        self.reset_seconds = time.perf_counter() - start
+
+        if not result.has_more:
+            self.result_complete.emit(result)
+
+    @property
+    def result(self) -> "DataFrame":
+        """The whole result as a DataFrame, fetching any rows not streamed yet."""
+        if self._dataframe is None:
+            import polars
+
+            # Without rechunking, polars uses the Arrow buffers of the
+            # batches as they are instead of copying them into one.
+            self._dataframe = polars.from_arrow(self.to_arrow(), rechunk=False)
+        return self._dataframe
+
+    def to_arrow(self) -> pa.Table:
+        """The whole result, or as much of it as fits in ``max_result_bytes``."""
+        table = self.stream.to_arrow(self.max_result_bytes)
+        if self.stream.has_more:
+            self.result_truncated.emit(table.num_rows)
+        return table
+
+    @property
+    def column_names(self):
+        return self.stream.column_names
+
+    def rowCount(self, parent=None):
+        return self.stream.row_count
+
+    def columnCount(self, parent=None):
+        return len(self.stream.column_names)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.stream.has_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        try:
+            batch = self.stream.read_batch()
+        except (duckdb.Error, pa.ArrowException) as e:
+            self.stream.close()
+            self.error_occurred.emit(e)
+            return
+
+        if batch is None:
+            self.result_complete.emit(self.stream)
+            return
+
+        first = self.stream.row_count
+        self.beginInsertRows(QModelIndex(), first, first + batch.num_rows - 1)
+        self.stream.append(batch)
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (
+            role == Qt.ItemDataRole.DisplayRole
+            and orientation == Qt.Orientation.Horizontal
+        ):
+            return self.stream.column_names[section]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._formatted_cell(index.row(), index.column())
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return self._alignments[index.column()]
+        if role == Qt.ItemDataRole.UserRole:
+            batch, row = self.stream.batch_at(index.row())
+            return batch.column(index.column())[row].as_py()
+
+    def _formatted_cell(self, row, column):
+        batch_index, offset = self.stream.locate(row)
+        block, offset_in_block = divmod(offset, self.BLOCK_SIZE)
+        key = (batch_index, block, column)
+
+        if (cells := self._cell_cache.get(key)) is not None:
+            self._cell_cache.move_to_end(key)
+        else:
+            array = self.stream.batch(batch_index).column(column)
+            cells = _format_cells(array.slice(block * self.BLOCK_SIZE, self.BLOCK_SIZE))
+            self._cell_cache[key] = cells
+            if len(self._cell_cache) > self.MAX_CACHED_BLOCKS:
+                self._cell_cache.popitem(last=False)
+
+        return cells[offset_in_block]
+
+
+def _format_cells(array: pa.Array) -> list[Optional[str]]:
+    try:
+        return pc.cast(array, pa.string()).to_pylist()
+    except pa.ArrowException:
+        return [None if v is None else str(v) for v in array.to_pylist()]
+
+
+def _alignment(data_type: pa.DataType) -> Qt.AlignmentFlag:
+    if (
+        pa.types.is_integer(data_type)
+        or pa.types.is_floating(data_type)
+        or pa.types.is_decimal(data_type)
+    ):
+        return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+    return Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
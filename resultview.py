@@ -0,0 +1,56 @@
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlutil import quote_identifier, quote_literal
+
+# Filters starting with one of these are taken as a condition on the
+# column, as in "> 10" or "IS NULL". Anything else is searched for.
+CONDITION = re.compile(
+    r"^\s*(?:[=<>!]|(?:NOT\s+)?(?:I?LIKE|IN|BETWEEN|SIMILAR)\b|IS\b)",
+    re.IGNORECASE,
+)
+
+
+def filter_condition(column: str, text: str) -> str:
+    """The WHERE condition for the text typed in the filter of ``column``:
+    either a condition on the column, or a case-insensitive search of its
+    values."""
+    name = quote_identifier(column)
+    if CONDITION.match(text):
+        return f"{name} {text.strip()}"
+    return f"contains(lower(CAST({name} AS VARCHAR)), {quote_literal(text.lower())})"
+
+
+@dataclass
+class ResultView:
+    """A sort order and filters over the result of ``query``, applied by
+    wrapping it in another query so the engine does the work."""
+
+    query: Optional[str] = None
+    order_by: Optional[str] = None
+    descending: bool = False
+    filters: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def is_identity(self) -> bool:
+        return self.order_by is None and not self.filters
+
+    def to_sql(self) -> str:
+        assert self.query is not None, "Only results of a query have a view"
+        if self.is_identity:
+            return self.query
+
+        # The query may end in a line comment, so the parenthesis closing it
+        # goes on a line of its own.
+        query = self.query.strip().rstrip(";")
+        sql = f"SELECT * FROM ({query}\n) AS result"
+        if self.filters:
+            conditions = (
+                filter_condition(column, text) for column, text in self.filters.items()
+            )
+            sql += " WHERE " + " AND ".join(f"({c})" for c in conditions)
+        if self.order_by is not None:
+            direction = "DESC" if self.descending else "ASC"
+            sql += f" ORDER BY {quote_identifier(self.order_by)} {direction}"
+        return sql
@@ -0,0 +1,43 @@
+import duckdb
+
+from benchmark import DataSpec, compare, generate_csvs, run
+
+
+def test_generates_csvs_from_spec(tmp_path):
+    spec = DataSpec(rows=100, columns=5, types=["int", "date"], files=2)
+
+    paths = generate_csvs(tmp_path, spec)
+
+    assert len(paths) == 2
+    columns = duckdb.sql(f"DESCRIBE SELECT * FROM '{paths[0]}'").fetchall()
+    assert [(name, data_type) for name, data_type, *_ in columns] == [
+        ("c0_int", "BIGINT"),
+        ("c1_date", "DATE"),
+        ("c2_int", "BIGINT"),
+        ("c3_date", "DATE"),
+        ("c4_int", "BIGINT"),
+    ]
+    assert duckdb.sql(f"SELECT count(*) FROM '{paths[1]}'").fetchone() == (100,)
+    assert (
+        paths[0].read_text() == generate_csvs(tmp_path / "again", spec)[0].read_text()
+    )
+
+
+def test_runs_every_benchmark(qtbot):
+    report = run(DataSpec(rows=500, files=1), repeat=1)
+
+    assert set(report["results"]) == {
+        "import",
+        "query",
+        "model_scroll",
+        "schema_refresh",
+        "plot",
+    }
+    assert compare(report["results"], report["results"], tolerance=0.2) == []
+
+
+def test_reports_regressions():
+    baseline = {"query": {"median": 1.0}, "plot": {"median": 1.0}}
+    results = {"query": {"median": 1.5}, "plot": {"median": 1.1}}
+
+    assert compare(results, baseline, tolerance=0.2) == ["query"]
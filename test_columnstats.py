@@ -0,0 +1,52 @@
+import duckdb
+import pytest
+
+from columnstats import ColumnStatsLoader, table_stats
+from db import ImportMode, ImportOptions, SchemaTracker, Table
+
+
+def test_table_stats(datadir):
+    conn = duckdb.connect()
+    table = Table.from_file(conn, datadir / "people.csv")
+    conn.sql("INSERT INTO people VALUES (NULL, 50)")
+
+    stats = table_stats(conn, table, sample_rows=1000)
+
+    assert stats.rows == 3
+    assert not stats.sampled
+    assert stats.columns["name"].null_fraction == pytest.approx(1 / 3)
+    assert stats.columns["age"].approx_distinct == 3
+    assert stats.columns["age"].null_fraction == 0
+    assert int(stats.columns["age"].max) == 50
+
+
+def test_samples_large_tables_and_views(tmp_path):
+    conn = duckdb.connect()
+    conn.sql("CREATE TABLE numbers AS SELECT range AS n, [range] AS l FROM range(5000)")
+    conn.sql(f"COPY numbers TO '{tmp_path / 'numbers_file.csv'}' (HEADER)")
+    table = Table.from_existing(conn, "numbers")
+    view = Table.from_file(
+        conn, tmp_path / "numbers_file.csv", ImportOptions(ImportMode.VIEW)
+    )
+
+    table_sample = table_stats(conn, table, sample_rows=100)
+    view_sample = table_stats(conn, view, sample_rows=100)
+
+    assert (table_sample.rows, table_sample.sampled) == (100, True)
+    assert (view_sample.rows, view_sample.sampled) == (100, True)
+    assert table_sample.columns["l"].min is None
+
+
+def test_loader_caches_stats_until_table_changes(qtbot, datadir):
+    conn = duckdb.connect()
+    tracker = SchemaTracker(conn)
+    loader = ColumnStatsLoader(conn, tracker)
+    table = Table.from_file(conn, datadir / "people.csv")
+
+    with qtbot.waitSignal(loader.stats_ready):
+        loader.request(table)
+    assert loader.stats("people").rows == 2
+
+    tracker.table_changed.emit(table)
+
+    assert loader.stats("people") is None
@@ -0,0 +1,117 @@
+import json
+from unittest import mock
+
+import pytest
+
+from csvdialect import (
+    OPTIONS_FILE,
+    CsvOptions,
+    Dialect,
+    DialectCache,
+    options_for,
+    parse_types,
+)
+from db import ImportMode, ImportOptions, Table
+from importcache import ImportCache
+from main import parse_args
+
+
+def test_parse_types():
+    assert parse_types("id=VARCHAR, amount=DECIMAL(18,2)") == {
+        "id": "VARCHAR",
+        "amount": "DECIMAL(18,2)",
+    }
+    with pytest.raises(ValueError):
+        parse_types("id")
+
+
+def test_directory_options_override_defaults(tmp_path):
+    (tmp_path / OPTIONS_FILE).write_text(
+        json.dumps(
+            {
+                "*": {"delimiter": ";", "sample_size": 1000},
+                "events-*.csv": {"header": False, "types": {"id": "VARCHAR"}},
+            }
+        )
+    )
+    defaults = CsvOptions(types={"amount": "DOUBLE"})
+
+    assert options_for(tmp_path / "events-01.csv", defaults) == CsvOptions(
+        1000, ";", False, {"amount": "DOUBLE", "id": "VARCHAR"}
+    )
+    assert options_for(tmp_path / "people.csv", defaults) == CsvOptions(
+        1000, ";", None, {"amount": "DOUBLE"}
+    )
+
+
+def test_imports_with_explicit_types_and_delimiter(conn, tmp_path):
+    (tmp_path / "codes.csv").write_text("code;amount\n007;1.5\n")
+    options = ImportOptions(
+        csv=CsvOptions(delimiter=";", types={"code": "VARCHAR"}),
+        dialects=DialectCache(),
+    )
+
+    Table.create_from_file(conn, tmp_path / "codes.csv", options)
+
+    assert conn.sql("SELECT * FROM codes").fetchall() == [("007", 1.5)]
+
+
+def test_files_starting_alike_reuse_the_sniffed_dialect(conn, tmp_path):
+    (tmp_path / "day_1.csv").write_text("id|at\n1|2024-01-02\n")
+    (tmp_path / "day_2.csv").write_text("id|at\n2|2024-01-03\n")
+    cache = DialectCache(tmp_path / "cache" / DialectCache.FILE)
+    options = ImportOptions(dialects=cache)
+
+    Table.create_from_file(conn, tmp_path / "day_1.csv", options)
+    with mock.patch.object(Dialect, "sniff") as sniff:
+        Table.create_from_file(conn, tmp_path / "day_2.csv", options)
+
+    sniff.assert_not_called()
+    assert conn.sql("SELECT * FROM day_2").dtypes == ["BIGINT", "DATE"]
+    assert DialectCache(cache.path).get(tmp_path / "day_2.csv", CsvOptions())
+
+
+def test_sniffs_again_when_the_cached_dialect_does_not_fit(conn, tmp_path):
+    (tmp_path / "a.csv").write_text("id\n1\n")
+    (tmp_path / "b.csv").write_text("id\nX-1\n")
+    options = ImportOptions(dialects=DialectCache())
+
+    Table.create_from_file(conn, tmp_path / "a.csv", options)
+    Table.create_from_file(conn, tmp_path / "b.csv", options)
+
+    assert conn.sql("SELECT * FROM b").fetchall() == [("X-1",)]
+    assert options.dialects.get(tmp_path / "b.csv", CsvOptions()).columns == (
+        ("id", "VARCHAR"),
+    )
+
+
+def test_views_are_read_with_their_own_dialect(conn, tmp_path):
+    (tmp_path / "a.csv").write_text("id\n1\n")
+    (tmp_path / "b.csv").write_text("id\nX-1\n")
+    options = ImportOptions(ImportMode.VIEW, dialects=DialectCache())
+
+    Table.create_from_file(conn, tmp_path / "a.csv", options)
+    Table.create_from_file(conn, tmp_path / "b.csv", options)
+
+    assert conn.sql("SELECT * FROM b").fetchall() == [("X-1",)]
+
+
+def test_options_from_command_line():
+    args = parse_args(
+        ["--csv-delimiter", "\t", "--no-csv-header", "--csv-types", "id=INT"]
+    )
+
+    assert CsvOptions.from_args(args) == CsvOptions(None, "\t", False, {"id": "INT"})
+    assert CsvOptions.from_args(parse_args([])) == CsvOptions()
+
+
+def test_cached_imports_follow_changed_options(conn, tmp_path):
+    (tmp_path / "pairs.csv").write_text("a,b\n1,2\n")
+    cache = ImportCache(tmp_path / "cache")
+
+    Table.create_from_file(conn, tmp_path / "pairs.csv", ImportOptions(cache=cache))
+    conn.sql("DROP TABLE pairs")
+    options = ImportOptions(cache=cache, csv=CsvOptions(header=False))
+    Table.create_from_file(conn, tmp_path / "pairs.csv", options)
+
+    assert conn.sql("SELECT * FROM pairs").fetchall() == [("a", "b"), ("1", "2")]
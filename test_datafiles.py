@@ -0,0 +1,85 @@
+from pathlib import Path
+
+import duckdb
+import pytest
+
+from datafiles import FileGroup, data_sources, read_function, suffix, table_name
+from db import ImportOptions, Sample, Table
+
+
+@pytest.fixture
+def partitions(tmp_path):
+    (tmp_path / "events-2024-01.csv").write_text("id,kind\n1,click\n")
+    (tmp_path / "events-2024-02.csv").write_text("kind,id,user\nview,2,ann\n")
+    (tmp_path / "people.csv").write_text("name\nAlice\n")
+    (tmp_path / "notes.txt").write_text("not data")
+    for year in (2023, 2024):
+        partition = tmp_path / "sales" / f"year={year}"
+        partition.mkdir(parents=True)
+        duckdb.sql(
+            f"COPY (SELECT {year} % 10 AS amount) TO '{partition / 'data.parquet'}'"
+        )
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    "name, expected_suffix, expected_table",
+    [
+        ("events.csv", ".csv", "events"),
+        ("events-2024.csv.gz", ".csv.gz", "events_2024"),
+        ("Trips.PARQUET", ".parquet", "Trips"),
+        ("logs.jsonl", ".jsonl", "logs"),
+        ("notes.txt", None, "notes"),
+    ],
+)
+def test_suffix_and_table_name(name, expected_suffix, expected_table):
+    assert suffix(Path(name)) == expected_suffix
+    assert table_name(Path(name)) == expected_table
+
+
+def test_groups_partitioned_files(partitions):
+    events = FileGroup("events", str(partitions / "events*.csv"))
+    sales = FileGroup("sales", str(partitions / "sales" / "**" / "*.parquet"))
+
+    assert data_sources(partitions) == [
+        partitions / "events-2024-01.csv",
+        partitions / "events-2024-02.csv",
+        partitions / "people.csv",
+        sales,
+    ]
+    assert data_sources(partitions, group=True) == [
+        events,
+        partitions / "people.csv",
+        sales,
+    ]
+
+
+def test_names_groups_after_their_pattern():
+    assert FileGroup.from_pattern("data/events-*.csv").name == "events"
+    assert FileGroup.from_pattern("data/sales/**/*.parquet").name == "sales"
+
+
+def test_reads_group_as_one_table(partitions):
+    conn = duckdb.connect()
+    Table.create_from_file(
+        conn, FileGroup.from_pattern(str(partitions / "events*.csv"))
+    )
+    Table.create_from_file(conn, data_sources(partitions)[-1])
+
+    assert conn.sql("SELECT id, kind, user FROM events ORDER BY id").fetchall() == [
+        (1, "click", None),
+        (2, "view", "ann"),
+    ]
+    assert conn.sql(
+        "SELECT amount FROM sales WHERE year = 2024 AND filename LIKE '%.parquet'"
+    ).fetchall() == [(4,)]
+
+
+def test_samples_of_groups_name_their_pattern(partitions):
+    group = FileGroup.from_pattern(str(partitions / "events*.csv"))
+    conn = duckdb.connect()
+
+    table = Table.from_file(conn, group, ImportOptions(sample=Sample()))
+
+    assert table.source == group
+    assert "union_by_name = true" in read_function(group)
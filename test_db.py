@@ -3,9 +3,25 @@ from unittest import mock
 
 import duckdb
 import pytest
-from qtpy.QtCore import Qt
 
-from db import DB, QueryResultModel, Table
+from db import (
+    DB,
+    ImportMode,
+    ImportOptions,
+    QueryJob,
+    ResultStream,
+    Sample,
+    SampleMethod,
+    SchemaTracker,
+    ScriptJob,
+    Table,
+    changes_catalog,
+    written_tables,
+)
+from engine import EngineSettings, setting
+from export import ExportFormat, ExportOptions
+from importcache import ImportCache
+from profiling import QueryProfile
 
 
 @pytest.fixture
@@ -31,6 +47,59 @@ class TestDB:
 
         assert table_added_signal_mock.call_count >= 2
 
+    def test_import_files_as_views(self, db, datadir):
+        db.import_options.mode = ImportMode.VIEW
+
+        db.create_tables_from_data_dir(datadir)
+
+        people_table = next(t for t in db.tables if t.name == "people")
+        assert people_table.is_view
+        assert {("name", "VARCHAR"), ("age", "BIGINT")} == set(people_table.columns)
+
+    def test_materialize_view(self, db, datadir, qtbot):
+        db.import_options.mode = ImportMode.VIEW
+        db.create_table_from_file(datadir / "people.csv")
+        db.sql("SELECT 42 AS answer")
+        db.sql_in_background(
+            "SELECT sum(a.range * b.range) FROM range(1000000) a, range(1000000) b"
+        )
+        db.table_changed.connect(table_changed_signal_mock := mock.Mock())
+
+        with qtbot.waitSignal(db.table_changed):
+            job = db.materialize_view("people")
+
+        people_table = next(t for t in db.tables if t.name == "people")
+        assert not people_table.is_view
+        assert len(db.tables) == 1
+        assert table_changed_signal_mock.call_count == 1
+        assert db.result_model.result["answer"].to_list() == [42]
+        assert db.query_running and db._job is not job
+        with qtbot.waitSignal(db.query_finished):
+            db.cancel_query()
+
+    def test_import_through_cache(self, db, datadir, tmp_path):
+        db.import_options.cache = ImportCache(tmp_path / "cache")
+
+        db.create_tables_from_data_dir(datadir)
+
+        people_table = next(t for t in db.tables if t.name == "people")
+        assert {("name", "VARCHAR"), ("age", "BIGINT")} == set(people_table.columns)
+        assert len(list((tmp_path / "cache").glob("*.parquet"))) == len(
+            list(datadir.glob("*.csv"))
+        )
+
+    def test_views_read_files_rather_than_the_cache(self, db, datadir, tmp_path):
+        db.import_options.cache = ImportCache(tmp_path / "cache")
+        db.import_options.mode = ImportMode.VIEW
+        db.create_tables_from_data_dir(datadir)
+
+        with open(datadir / "people.csv", "a") as f:
+            f.write("Carol,40\n")
+
+        cursor = db.cursor()
+        assert cursor.sql("SELECT count(*) FROM people").fetchone() == (3,)
+        assert not list((tmp_path / "cache").glob("*.parquet"))
+
     def test_create_table_from_sql(self, db):
         db.table_added.connect(table_added_signal_mock := mock.Mock())
 
@@ -52,6 +121,24 @@ class TestDB:
         assert "new_table" not in {t.name for t in db.tables}
         assert table_deleted_signal_mock.call_count == 1
 
+    def test_alter_table_from_sql(self, db):
+        db.sql("CREATE TABLE new_table (a_column VARCHAR)")
+        db.table_changed.connect(table_changed_signal_mock := mock.Mock())
+
+        db.sql("ALTER TABLE new_table ADD COLUMN another_column INTEGER")
+
+        new_table = next(t for t in db.tables if t.name == "new_table")
+        assert [("a_column", "VARCHAR"), ("another_column", "INTEGER")] == (
+            new_table.columns
+        )
+        table_changed_signal_mock.assert_called_once_with(new_table)
+
+    def test_does_not_refresh_schema_after_queries(self, db):
+        with mock.patch.object(db.schema_tracker, "refresh") as refresh_mock:
+            db.sql("SELECT 42")
+
+        assert refresh_mock.call_count == 0
+
     def test_signals_query_errors(self, db):
         db.error_occurred.connect(error_occurred_signal_mock := mock.Mock())
 
@@ -60,6 +147,298 @@ class TestDB:
         assert result is None
         assert error_occurred_signal_mock.call_count == 1
 
+    def test_sql_in_background(self, db, datadir, qtbot):
+        db.create_tables_from_data_dir(datadir)
+
+        with qtbot.waitSignal(db.query_finished):
+            db.sql_in_background("SELECT * FROM people")
+
+        assert db.result_model.rowCount() == 2
+        assert not db.query_running
+
+    def test_sessions_run_queries_independently(self, db, datadir, qtbot):
+        db.create_tables_from_data_dir(datadir)
+        session = db.new_session()
+        db.sql_in_background(
+            "SELECT sum(a.range * b.range) FROM range(1000000) a, range(1000000) b"
+        )
+
+        with qtbot.waitSignal(session.query_finished):
+            session.sql_in_background("SELECT * FROM people")
+        assert db.query_running
+        assert session.result_model.rowCount() == 2
+
+        with qtbot.waitSignal(db.query_finished):
+            db.cancel_query()
+        assert db.result_model.rowCount() == 0
+        assert session.result_model.rowCount() == 2
+
+    def test_queries_of_a_session_share_its_state(self, db, qtbot):
+        db.sql("CREATE TEMP TABLE x AS SELECT 1 AS n")
+        with qtbot.waitSignal(db.query_finished):
+            db.sql_in_background("SET VARIABLE v = 2")
+        with qtbot.waitSignal(db.query_finished):
+            db.run_script("INSERT INTO x VALUES (getvariable('v'))")
+
+        with qtbot.waitSignal(db.query_finished):
+            db.sql_in_background("SELECT * FROM x ORDER BY n")
+        assert db.result_model.result["n"].to_list() == [1, 2]
+
+        session = db.new_session()
+        session.error_occurred.connect(error_occurred_signal_mock := mock.Mock())
+        session.sql("SELECT * FROM x")
+        error_occurred_signal_mock.assert_called_once()
+
+    def test_sessions_share_tables_and_settings(self, db, datadir):
+        session = db.new_session()
+        session.create_tables_from_data_dir(datadir)
+        db.apply_settings(EngineSettings(max_result_mb=10))
+
+        assert {t.name for t in db.tables} >= {"people", "animals"}
+        assert session.settings.max_result_mb == 10
+        assert session.result_model.max_result_bytes == 10 * 1024 * 1024
+        assert session.import_options is db.import_options
+
+        session.close()
+        db.apply_settings(EngineSettings())
+        assert session.settings.max_result_mb == 10
+
+    def test_sql_in_background_signals_errors(self, db, qtbot):
+        db.error_occurred.connect(error_occurred_signal_mock := mock.Mock())
+
+        with qtbot.waitSignal(db.query_finished):
+            db.sql_in_background("SELECT * FROM non_existent_table")
+
+        assert error_occurred_signal_mock.call_count == 1
+
+    def test_sorts_and_filters_results_in_the_engine(self, db, datadir, qtbot):
+        db.create_tables_from_data_dir(datadir)
+        db.sql("SELECT name, age FROM people;")
+
+        with qtbot.waitSignal(db.query_finished):
+            db.sort_results("age", descending=True)
+        assert db.result_model.result["name"].to_list() == ["Bob", "Alice"]
+
+        with qtbot.waitSignal(db.query_finished):
+            db.filter_results("name", "ali")
+        assert db.result_model.result["name"].to_list() == ["Alice"]
+
+        db.result_view_reset.connect(result_view_reset_signal_mock := mock.Mock())
+        db.sql("SELECT * FROM people")
+        assert result_view_reset_signal_mock.call_count == 1
+        assert db.result_view.is_identity
+
+    def test_only_sorts_results_of_selects(self, db):
+        db.message_logged.connect(message_logged_signal_mock := mock.Mock())
+        db.sql("CREATE TABLE t AS SELECT 1 AS n")
+
+        assert db.sort_results("n") is None
+        message_logged_signal_mock.assert_called_with(
+            "Only results of a SELECT can be sorted or filtered"
+        )
+
+    def test_keeps_settings_duckdb_rejects(self, db):
+        db.error_occurred.connect(error_occurred_signal_mock := mock.Mock())
+        db.apply_settings(EngineSettings(threads=2, max_result_mb=1))
+
+        assert not db.apply_settings(EngineSettings(memory_limit="lots"))
+
+        assert error_occurred_signal_mock.call_count == 1
+        assert db.settings.threads == 2
+        assert setting(db.cursor(), "threads") == "2"
+        assert db.result_model.max_result_bytes == 1024 * 1024
+
+    def test_truncates_results_over_the_size_limit(self, db):
+        db.message_logged.connect(message_logged_signal_mock := mock.Mock())
+        db.apply_settings(EngineSettings(max_result_mb=1))
+
+        db.sql("SELECT * FROM range(1000000)")
+
+        assert 0 < len(db.result_model.result) < 1_000_000
+        assert message_logged_signal_mock.call_args.args[0].startswith(
+            "Result truncated to its first"
+        )
+
+    def test_serves_repeated_queries_from_cache(self, db, datadir):
+        db.create_tables_from_data_dir(datadir)
+        db.message_logged.connect(message_logged_signal_mock := mock.Mock())
+
+        db.sql("SELECT * FROM people")
+        with mock.patch.object(ResultStream, "from_query") as from_query_mock:
+            db.sql("SELECT *\n  FROM people;")
+
+        assert from_query_mock.call_count == 0
+        assert db.result_model.rowCount() == 2
+        assert [
+            c.args[0].split(":")[0] for c in message_logged_signal_mock.call_args_list
+        ] == [
+            "Result cache miss",
+            "Result cache hit",
+        ]
+
+    def test_writes_invalidate_cached_results(self, db, datadir):
+        db.create_tables_from_data_dir(datadir)
+        db.sql("SELECT * FROM people")
+        db.sql("SELECT * FROM animals")
+
+        db.sql("INSERT INTO people VALUES ('Carol', 40)")
+
+        assert "SELECT * FROM people" not in db.result_cache
+        assert "SELECT * FROM animals" in db.result_cache
+        db.sql("SELECT * FROM people")
+        assert db.result_model.rowCount() == 3
+
+    def test_does_not_cache_volatile_results(self, db, datadir):
+        db.create_tables_from_data_dir(datadir)
+
+        for query in [
+            "SELECT random() FROM people",
+            "SELECT *, now() FROM people",
+            "SELECT * FROM people USING SAMPLE 1 ROWS",
+        ]:
+            db.sql(query)
+            assert query not in db.result_cache
+
+    def test_writes_to_quoted_tables_clear_cached_results(self, db):
+        db.sql('CREATE TABLE "my table" AS SELECT 1 AS n')
+        db.sql('SELECT * FROM "my table"')
+        assert len(db.result_cache) == 1
+
+        db.sql('INSERT INTO "my table" VALUES (2)')
+
+        assert len(db.result_cache) == 0
+        db.sql('SELECT * FROM "my table"')
+        assert db.result_model.rowCount() == 2
+
+    def test_schema_changes_invalidate_cached_results(self, db, datadir):
+        db.create_tables_from_data_dir(datadir)
+        db.sql("SELECT * FROM people")
+
+        db.sql("ALTER TABLE people ADD COLUMN height INTEGER")
+
+        assert len(db.result_cache) == 0
+
+    def test_does_not_cache_results_of_views(self, db, datadir):
+        db.import_options.mode = ImportMode.VIEW
+        db.create_tables_from_data_dir(datadir)
+
+        db.sql("SELECT * FROM people")
+
+        assert len(db.result_cache) == 0
+
+    def test_profiles_queries(self, db, datadir, qtbot):
+        db.create_tables_from_data_dir(datadir)
+        db.query_profiled.connect(query_profiled_signal_mock := mock.Mock())
+
+        db.sql("SELECT * FROM people")
+
+        (profile,) = query_profiled_signal_mock.call_args.args
+        assert profile.query == "SELECT * FROM people"
+        assert profile.rows == 2
+        assert profile.nbytes > 0
+        assert profile.total_seconds > 0
+
+        with qtbot.waitSignal(db.profile_updated):
+            db.explain_analyze(profile)
+
+        assert "TABLE_SCAN" in {operator.name for _, operator in profile.plan.walk()}
+
+    def test_profiles_count_whole_results_once_read(self, db):
+        db.query_profiled.connect(query_profiled_signal_mock := mock.Mock())
+        db.profile_updated.connect(profile_updated_signal_mock := mock.Mock())
+        db.sql("SELECT * FROM range(100000)")
+        (profile,) = query_profiled_signal_mock.call_args.args
+        assert not profile.complete and profile.rows < 100000
+
+        while db.result_model.canFetchMore():
+            db.result_model.fetchMore()
+
+        profile_updated_signal_mock.assert_called_once_with(profile)
+        assert profile.complete
+        assert profile.rows == 100000
+        assert profile.nbytes >= 100000 * 8
+
+    def test_only_profiles_selects(self, db):
+        db.message_logged.connect(message_logged_signal_mock := mock.Mock())
+        db.sql("CREATE TABLE t (a INTEGER)")
+
+        job = db.explain_analyze(
+            QueryProfile("INSERT INTO t VALUES (1)", 0, 0, 0, 0, 0)
+        )
+
+        assert job is None
+        assert message_logged_signal_mock.call_count == 1
+        assert db.cursor().sql("SELECT count(*) FROM t").fetchone() == (0,)
+
+    def test_run_script(self, db, datadir, qtbot):
+        db.create_tables_from_data_dir(datadir)
+        db.table_added.connect(table_added_signal_mock := mock.Mock())
+
+        with qtbot.waitSignal(db.query_finished):
+            db.run_script(
+                "CREATE TABLE adults AS SELECT * FROM people WHERE age >= 18;"
+                "SELECT * FROM animals;"
+                "INSERT INTO adults SELECT * FROM adults;"
+                "SELECT count(*) FROM adults"
+            )
+
+        assert [s.rows for s in db.script_results] == [2, 2, 2, 1]
+        assert table_added_signal_mock.call_count == 1
+        db.show_statement_result(1)
+        assert db.result_model.column_names == ["name", "species"]
+        db.show_statement_result(3)
+        assert db.result_model.data(db.result_model.index(0, 0)) == "4"
+        assert not db.query_running
+
+    def test_run_script_truncates_large_results(self, db, qtbot):
+        db.apply_settings(EngineSettings(max_result_mb=1))
+        db.message_logged.connect(message_logged_signal_mock := mock.Mock())
+
+        with qtbot.waitSignal(db.query_finished):
+            db.run_script("SELECT * FROM range(1000000); SELECT 1")
+
+        large, small = db.script_results
+        assert large.truncated and 0 < large.rows < 1_000_000
+        assert large.result.num_rows == large.rows
+        assert not small.truncated and small.rows == 1
+        message_logged_signal_mock.assert_called_once()
+        assert "truncated" in message_logged_signal_mock.call_args.args[0]
+
+    def test_run_script_stops_at_failing_statement(self, db, qtbot):
+        db.error_occurred.connect(error_occurred_signal_mock := mock.Mock())
+
+        with qtbot.waitSignal(db.query_finished):
+            db.run_script("CREATE TABLE t (a INTEGER); SELECT * FROM missing; SELECT 1")
+
+        assert len(db.script_results) == 1
+        assert "t" in {t.name for t in db.tables}
+        assert error_occurred_signal_mock.call_count == 1
+
+    def test_export_results(self, db, datadir, tmp_path, qtbot):
+        db.create_tables_from_data_dir(datadir)
+        db.sql("SELECT * FROM people")
+
+        with qtbot.waitSignal(db.message_logged):
+            db.export_results(tmp_path / "out.csv", ExportOptions(ExportFormat.CSV))
+
+        cursor = db.cursor()
+        exported = cursor.sql(f"SELECT * FROM '{tmp_path / 'out.csv'}'").fetchall()
+        assert exported == cursor.sql("SELECT * FROM people").fetchall()
+
+    def test_load_full_table_replaces_sample(self, db, datadir, qtbot):
+        db.import_options.sample = Sample(SampleMethod.FIRST_ROWS, 1)
+        db.create_tables_from_files([datadir / "people.csv"])
+        assert db.table("people").sample == "first 1 rows"
+
+        db.table_changed.connect(table_changed_signal_mock := mock.Mock())
+        with qtbot.waitSignal(db.import_finished):
+            db.load_full_table("people")
+
+        (people,) = table_changed_signal_mock.call_args.args
+        assert people.sample is None
+        assert db.table("people") == people
+        assert db.cursor().sql("SELECT count(*) FROM people").fetchone() == (2,)
+
     def test_signals_errors_on_table_creation_from_directory(self, db, tmp_path):
         with open(tmp_path / "somefile.csv", "w") as f:
             f.write("anything")
@@ -67,11 +446,94 @@ class TestDB:
         db.error_occurred.connect(error_occurred_signal_mock := mock.Mock())
 
         with mock.patch.object(db, "_conn") as conn_mock:
-            conn_mock.sql.side_effect = duckdb.Error()
+            conn_mock.cursor.return_value.sql.side_effect = duckdb.Error()
             db.create_tables_from_data_dir(tmp_path)
 
         assert error_occurred_signal_mock.call_count == 1
 
+    def test_import_reports_progress_and_refreshes_schema_once(self, db, datadir):
+        db.import_progress.connect(import_progress_signal_mock := mock.Mock())
+
+        with mock.patch.object(
+            db.schema_tracker, "refresh", wraps=db.schema_tracker.refresh
+        ) as refresh_mock:
+            job = db.create_tables_from_data_dir(datadir)
+
+        total = len(job.paths)
+        assert import_progress_signal_mock.call_args_list == [
+            mock.call(done, total) for done in range(1, total + 1)
+        ]
+        assert refresh_mock.call_count == 1
+
+    def test_import_in_background(self, db, datadir, qtbot):
+        db.error_occurred.connect(error_occurred_signal_mock := mock.Mock())
+
+        with qtbot.waitSignal(db.import_finished):
+            db.create_tables_from_files(
+                [datadir / "people.csv", datadir / "missing.csv"], background=True
+            )
+
+        assert "people" in {t.name for t in db.tables}
+        assert error_occurred_signal_mock.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("SELECT * FROM t", False),
+        ("INSERT INTO t VALUES (1); SELECT 1", False),
+        ("CREATE TABLE t (a INT)", True),
+        ("SELECT 1; DROP TABLE t", True),
+        ("ATTACH 'other.db'", True),
+        ("SELEC oops", True),
+    ],
+)
+def test_changes_catalog(query, expected):
+    assert changes_catalog(query) == expected
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("SELECT * FROM t", set()),
+        ("INSERT INTO T VALUES (1); SELECT 1", {"t"}),
+        ("UPDATE main.t SET a = 1", {"t"}),
+        ("DELETE FROM t; INSERT OR REPLACE INTO u SELECT 1", {"t", "u"}),
+        ('DELETE FROM "t"', None),
+        ('INSERT INTO "my table" VALUES (1)', None),
+        ("CREATE TABLE t (a INT)", None),
+        ("SELEC oops", None),
+    ],
+)
+def test_written_tables(query, expected):
+    assert written_tables(query) == expected
+
+
+def test_cancelled_query_does_not_start(conn):
+    job = QueryJob(conn.cursor(), "CREATE TABLE t (a INTEGER)")
+    job.error_occurred.connect(error_occurred_signal_mock := mock.Mock())
+
+    job.cancel()
+    job.run()
+
+    assert conn.sql("SELECT count(*) FROM duckdb_tables()").fetchone() == (0,)
+    (error,) = error_occurred_signal_mock.call_args.args
+    assert isinstance(error, duckdb.InterruptException)
+
+
+def test_cancelled_script_stops_before_next_statement(conn):
+    job = ScriptJob(
+        conn.cursor(), "CREATE TABLE t (a INTEGER); INSERT INTO t VALUES (1)"
+    )
+    job.statement_finished.connect(lambda _: job.cancel())
+    job.error_occurred.connect(error_occurred_signal_mock := mock.Mock())
+
+    job.run()
+
+    assert conn.sql("SELECT count(*) FROM t").fetchone() == (0,)
+    (error,) = error_occurred_signal_mock.call_args.args
+    assert isinstance(error, duckdb.InterruptException)
+
 
 class TestTable:
     def test_from_file(self, datadir):
@@ -89,21 +551,60 @@ class TestTable:
 
         assert table.name == "test_with_dash"
 
+    def test_from_file_as_view(self, datadir):
+        conn = duckdb.connect()
+        table = Table.from_file(
+            conn, datadir / "people.csv", ImportOptions(ImportMode.VIEW)
+        )
+
+        assert table.is_view
+        assert conn.sql(
+            "SELECT table_type FROM information_schema.tables"
+        ).fetchall() == [("VIEW",)]
+
+    @pytest.mark.parametrize(
+        "sample, rows",
+        [
+            (Sample(SampleMethod.RESERVOIR, 1), 1),
+            (Sample(SampleMethod.PERCENT, 100), 2),
+            (Sample(SampleMethod.FIRST_ROWS, 1), 1),
+        ],
+    )
+    def test_from_file_as_sample(self, datadir, sample, rows):
+        conn = duckdb.connect()
+        table = Table.from_file(
+            conn, datadir / "people.csv", ImportOptions(sample=sample)
+        )
+
+        assert table.sample == str(sample)
+        assert table.source == (datadir / "people.csv").resolve()
+        assert conn.sql("SELECT count(*) FROM people").fetchone() == (rows,)
+        assert list(SchemaTracker(conn)._db_schema_tables()) == [table]
+
+
+def test_parse_sample():
+    assert Sample.parse("percent:2.5") == Sample(SampleMethod.PERCENT, 2.5)
+    with pytest.raises(ValueError, match="reservoir:<size>"):
+        Sample.parse("top:10")
+
+
+class TestResultStream:
+    def test_spills_batches_outside_the_resident_window(self, conn):
+        reader = conn.sql("SELECT * FROM range(100)").fetch_arrow_reader(10)
+        stream = ResultStream(reader, max_resident_batches=2)
 
-class TestQueryResultModel:
-    def test_query_result_model(self, duck_relation):
-        result = duck_relation("people").pl()
-        model = QueryResultModel()
-        model.set_result(result)
+        while stream.fetch_more():
+            pass
 
-        assert model.rowCount() == 2
-        assert model.columnCount() == 2
+        assert stream.row_count == 100
+        assert len(stream._resident) == 2
 
-        assert model.headerData(0, Qt.Orientation.Horizontal) == "name"
-        assert model.headerData(1, Qt.Orientation.Horizontal) == "age"
+        batch, row = stream.batch_at(5)
+        assert batch.column(0)[row].as_py() == 5
+        assert len(stream._resident) == 2
 
-        assert model.data(model.index(0, 0)) == "Alice"
-        assert model.data(model.index(0, 1)) == 25
+    def test_to_arrow_fetches_remaining_rows(self, conn):
+        stream = ResultStream.from_query(conn.cursor(), "SELECT * FROM range(25)")
 
-        assert model.data(model.index(1, 0)) == "Bob"
-        assert model.data(model.index(1, 1)) == 30
+        assert stream.to_arrow().num_rows == 25
+        assert stream.exhausted
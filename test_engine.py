@@ -0,0 +1,28 @@
+from pathlib import Path
+
+import duckdb
+
+from engine import EngineSettings, memory_usage, setting
+
+
+def test_applies_and_resets_settings(tmp_path):
+    conn = duckdb.connect()
+    default_limit = setting(conn, "memory_limit")
+
+    EngineSettings("1GB", 2, tmp_path).apply(conn)
+    cursor = conn.cursor()
+    assert setting(cursor, "memory_limit") == "953.6 MiB"
+    assert setting(cursor, "threads") == "2"
+    assert Path(setting(cursor, "temp_directory")) == tmp_path
+
+    EngineSettings().apply(conn)
+    assert setting(cursor, "memory_limit") == default_limit
+
+
+def test_memory_usage_counts_tables():
+    conn = duckdb.connect()
+    before = memory_usage(conn)
+
+    conn.sql("CREATE TABLE t AS SELECT * FROM range(1000000)")
+
+    assert memory_usage(conn) > before
@@ -0,0 +1,60 @@
+import duckdb
+import pyarrow as pa
+import pytest
+
+from export import ExportFormat, ExportJob, ExportOptions, copy_statement
+
+
+@pytest.mark.parametrize(
+    "options, reader",
+    [
+        (ExportOptions(ExportFormat.PARQUET, "snappy", 1024), "read_parquet"),
+        (ExportOptions(ExportFormat.CSV), "read_csv_auto"),
+    ],
+)
+def test_copies_query_result(tmp_path, options, reader):
+    conn = duckdb.connect()
+    path = tmp_path / f"numbers.{options.format.value}"
+
+    conn.sql(copy_statement("SELECT range AS n FROM range(5000)", path, options))
+
+    assert conn.sql(f"SELECT count(*), sum(n) FROM {reader}('{path}')").fetchone() == (
+        5000,
+        sum(range(5000)),
+    )
+
+
+def test_writes_arrow_ipc(qtbot, tmp_path):
+    path = tmp_path / "numbers.arrow"
+    job = ExportJob(
+        duckdb.connect(),
+        "SELECT range AS n FROM range(5000)",
+        path,
+        ExportOptions(ExportFormat.ARROW),
+    )
+
+    with qtbot.waitSignal(job.finished) as blocker:
+        job.start()
+
+    assert blocker.args == [True]
+    with pa.memory_map(str(path)) as source:
+        assert pa.ipc.open_file(source).read_all().num_rows == 5000
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_cancelled_export_leaves_no_file(qtbot, tmp_path):
+    path = tmp_path / "numbers.parquet"
+    job = ExportJob(
+        duckdb.connect(),
+        "SELECT range AS n, hash(range)::VARCHAR FROM range(100_000_000)",
+        path,
+        ExportOptions(),
+    )
+
+    with qtbot.waitSignal(job.finished, timeout=10_000) as blocker:
+        job.start()
+        qtbot.waitUntil(lambda: job.bytes_written > 0)
+        job.cancel()
+
+    assert blocker.args == [False]
+    assert list(tmp_path.iterdir()) == []
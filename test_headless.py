@@ -0,0 +1,88 @@
+import duckdb
+import pyarrow as pa
+
+import headless
+from main import parse_args
+
+
+def test_writes_query_result_to_file(datadir, tmp_path):
+    output = tmp_path / "adults.parquet"
+    args = parse_args(
+        [
+            "--datadir",
+            str(datadir),
+            "--query",
+            "SELECT name FROM people WHERE age > 26",
+            "--format",
+            "parquet",
+            "--output",
+            str(output),
+        ]
+    )
+
+    assert headless.run(args) == 0
+    assert duckdb.sql(f"SELECT * FROM '{output}'").fetchall() == [("Bob",)]
+
+
+def test_writes_last_result_of_script(datadir, tmp_path):
+    script = tmp_path / "script.sql"
+    script.write_text(
+        "CREATE TABLE names AS SELECT name FROM people;"
+        "INSERT INTO names VALUES ('Carol');"
+        "SELECT * FROM names ORDER BY name"
+    )
+    output = tmp_path / "names.arrow"
+    args = parse_args(
+        ["--datadir", str(datadir), "--script", str(script), "--format", "arrow"]
+        + ["--output", str(output)]
+    )
+
+    assert headless.run(args) == 0
+    with pa.memory_map(str(output)) as source:
+        names = pa.ipc.open_file(source).read_all()["name"].to_pylist()
+    assert names == ["Alice", "Bob", "Carol"]
+
+
+def test_imports_samples(datadir, tmp_path):
+    output = tmp_path / "count.csv"
+    args = parse_args(
+        [
+            "--datadir",
+            str(datadir),
+            "--sample",
+            "first:1",
+            "--query",
+            "SELECT count(*) AS n FROM people",
+            "--output",
+            str(output),
+        ]
+    )
+
+    assert headless.run(args) == 0
+    assert output.read_text().splitlines()[1:] == ["1"]
+
+
+def test_imports_files_matching_patterns(tmp_path):
+    (tmp_path / "people-1.csv").write_text("name,age\nAlice,25\nBob,30\n")
+    (tmp_path / "people-2.csv").write_text("age,name\n41,Carol\n")
+    output = tmp_path / "count.csv"
+    args = parse_args(
+        [
+            "--glob",
+            str(tmp_path / "people-*.csv"),
+            "--query",
+            "SELECT count(DISTINCT filename) FROM people WHERE age > 26",
+            "--output",
+            str(output),
+        ]
+    )
+
+    assert headless.run(args) == 0
+    assert output.read_text().splitlines()[1:] == ["2"]
+
+
+def test_reports_errors(capsys):
+    args = parse_args(["--query", "SELECT * FROM missing"])
+
+    assert headless.run(args) == 1
+    assert "missing" in capsys.readouterr().err
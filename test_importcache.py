@@ -0,0 +1,42 @@
+import duckdb
+
+from importcache import ImportCache
+
+
+def test_caches_files_until_they_change(tmp_path):
+    conn = duckdb.connect()
+    csv_path = tmp_path / "numbers.csv"
+    csv_path.write_text("n\n1\n2\n")
+    source = f"read_csv_auto('{csv_path}')"
+
+    cache = ImportCache(tmp_path / "cache")
+    parquet = cache.cached_file(conn, csv_path, source)
+    cached_mtime = parquet.stat().st_mtime_ns
+
+    assert (
+        ImportCache(tmp_path / "cache").cached_file(conn, csv_path, source) == parquet
+    )
+    assert parquet.stat().st_mtime_ns == cached_mtime
+
+    csv_path.write_text("n\n1\n2\n3\n")
+    parquet = cache.cached_file(conn, csv_path, source)
+
+    assert conn.sql(f"SELECT count(*) FROM '{parquet}'").fetchone() == (3,)
+
+
+def test_caches_files_per_way_of_reading_them(tmp_path):
+    conn = duckdb.connect()
+    csv_path = tmp_path / "numbers.csv"
+    csv_path.write_text("a,b\n1,2\n")
+    cache = ImportCache(tmp_path / "cache")
+
+    with_header = cache.cached_file(conn, csv_path, f"read_csv('{csv_path}')")
+    without_header = cache.cached_file(
+        conn, csv_path, f"read_csv('{csv_path}', header = false, all_varchar = true)"
+    )
+
+    assert conn.sql(f"SELECT * FROM '{with_header}'").fetchall() == [(1, 2)]
+    assert conn.sql(f"SELECT * FROM '{without_header}'").fetchall() == [
+        ("a", "b"),
+        ("1", "2"),
+    ]
@@ -1,10 +1,14 @@
+import io
 from pathlib import Path
 from unittest import mock
 
 import pytest
+from qtpy.QtCore import Qt
 from qtpy.QtWidgets import QFileDialog
 
-from main import MainWindow
+from db import Sample
+from gui.mainwindow import MainWindow
+from main import StartupProfile, is_headless, parse_args
 
 
 def test_adding_a_directory_data_source_and_selecting_data(
@@ -43,10 +47,33 @@ def test_plot_results(app_window_driver: "AppWindowDriver", datadir):
     app_window_driver.add_dir_data_source(datadir)
 
     app_window_driver.run_query("select * from people")
-    with mock.patch("main.plot_result") as plot_result_mock:
+    with mock.patch("gui.plotter.plot_result") as plot_result_mock:
         app_window_driver.plot_result()
 
-    plot_result_mock.assert_called_with(app_window_driver.results.result)
+    (source,) = plot_result_mock.call_args.args
+    assert source.columns == ["age"]
+
+
+def test_sort_and_filter_results(app_window_driver: "AppWindowDriver", datadir):
+    app_window_driver.add_dir_data_source(datadir)
+    app_window_driver.run_query("select name, age from people")
+
+    app_window_driver.sort_results("age", Qt.SortOrder.DescendingOrder)
+    app_window_driver.assert_result_column("name", ["Bob", "Alice"])
+
+    app_window_driver.filter_results("age", "< 30")
+    app_window_driver.assert_result_column("name", ["Alice"])
+
+
+def test_import_samples(app_window_driver: "AppWindowDriver", datadir):
+    window = app_window_driver.app_window
+    window.set_import_sample(Sample.parse("first:1"))
+    app_window_driver.add_dir_data_source(datadir)
+
+    app_window_driver.run_query("select * from people")
+
+    app_window_driver.assert_has_results(1)
+    assert window.db.table("people").sample == "first 1 rows"
 
 
 def test_error_logging(app_window_driver: "AppWindowDriver"):
@@ -57,10 +84,67 @@ def test_error_logging(app_window_driver: "AppWindowDriver"):
     )
 
 
+def test_cancel_running_query(app_window_driver: "AppWindowDriver"):
+    app_window_driver.start_query(
+        "SELECT sum(a.range * b.range) FROM range(1000000) a, range(1000000) b"
+    )
+    app_window_driver.assert_query_running()
+
+    app_window_driver.cancel_query()
+
+    app_window_driver.assert_log_contains("Interrupted")
+
+
+def test_query_tabs_run_queries_concurrently(
+    app_window_driver: "AppWindowDriver", datadir, qtbot
+):
+    app_window_driver.add_dir_data_source(datadir)
+    window = app_window_driver.app_window
+    first = window.query_view
+    app_window_driver.start_query(
+        "SELECT sum(a.range * b.range) FROM range(1000000) a, range(1000000) b"
+    )
+
+    second = window.new_query_tab()
+    assert window.query_view is second and second.db is not window.db
+    app_window_driver.run_query_in(second, "SELECT * FROM people")
+    assert second.db.result_model.rowCount() == 2
+    assert window.query_tabs.tabText(0) == "Query 1 *"
+    assert first.query_input.cancel.isEnabled()
+    assert not second.query_input.cancel.isEnabled()
+
+    window.close_query_tab(0)
+    window.close_query_tab(1)
+    assert window.query_tabs.count() == 1
+    with qtbot.waitSignal(window.db.query_finished):
+        first.query_input.cancel.click()
+
+
+def test_startup_profile_reports_each_phase():
+    profile = StartupProfile()
+    profile.mark("imports")
+    profile.mark("window")
+    output = io.StringIO()
+
+    profile.report(output)
+
+    lines = output.getvalue().splitlines()
+    assert [line.split()[0] for line in lines] == ["imports", "window", "total"]
+    assert profile.total == pytest.approx(sum(s for _, s in profile.phases))
+    assert parse_args(["--profile-startup"]).profile_startup
+
+
+def test_tells_headless_runs_apart():
+    assert is_headless(["--datadir", "data", "--query", "SELECT 1"])
+    assert is_headless(["--script=report.sql"])
+    assert not is_headless(["--datadir", "data", "--watch"])
+
+
 class AppWindowDriver:
-    def __init__(self, app_window: MainWindow, monkeypatch):
+    def __init__(self, app_window: MainWindow, monkeypatch, qtbot):
         self.app_window = app_window
         self.monkeypatch = monkeypatch
+        self.qtbot = qtbot
 
     @property
     def results(self):
@@ -74,6 +158,10 @@ class AppWindowDriver:
     def submit_query_button(self):
         return self.app_window.query_view.query_input.submit
 
+    @property
+    def cancel_query_button(self):
+        return self.app_window.query_view.query_input.cancel
+
     @property
     def log_panel(self):
         return self.app_window.query_view.log_panel
@@ -83,7 +171,8 @@ class AppWindowDriver:
             QFileDialog, "getExistingDirectory", classmethod(lambda *_: str(path))
         )
 
-        self.app_window.add_dir_data_source_action.trigger()
+        with self.qtbot.waitSignal(self.app_window.db.import_finished):
+            self.app_window.add_dir_data_source_action.trigger()
 
     def load_files(self, paths: list[Path]):
         open_file_dialog_result = (list(map(str, paths)), "")
@@ -93,18 +182,52 @@ class AppWindowDriver:
             classmethod(lambda *_: open_file_dialog_result),
         )
 
-        self.app_window.load_files_action.trigger()
+        with self.qtbot.waitSignal(self.app_window.db.import_finished):
+            self.app_window.load_files_action.trigger()
 
     def run_query(self, query):
+        with self.qtbot.waitSignal(self.app_window.db.query_finished):
+            self.start_query(query)
+
+    def run_query_in(self, view, query):
+        with self.qtbot.waitSignal(view.db.query_finished):
+            view.query_input.query.setPlainText(query)
+            view.query_input.submit.click()
+
+    def start_query(self, query):
         self.query_line_edit.setPlainText(query)
         self.submit_query_button.click()
 
+    def cancel_query(self):
+        with self.qtbot.waitSignal(self.app_window.db.query_finished):
+            self.qtbot.wait(100)
+            self.cancel_query_button.click()
+
+    def sort_results(self, column, order):
+        header = self.app_window.query_view.results_table.horizontalHeader()
+        with self.qtbot.waitSignal(self.app_window.db.query_finished):
+            header.setSortIndicator(self.results.column_names.index(column), order)
+
+    def filter_results(self, column, text):
+        edit = self.app_window.query_view.result_filters.edit(column)
+        with self.qtbot.waitSignal(self.app_window.db.query_finished):
+            self.qtbot.keyClicks(edit, text)
+            self.qtbot.keyClick(edit, Qt.Key.Key_Return)
+
     def plot_result(self):
         self.app_window.plot_result_button.click()
 
     def assert_has_results(self, n):
         assert self.app_window.db.result_model.rowCount() == n
 
+    def assert_result_column(self, column, values):
+        assert self.results.result[column].to_list() == values
+
+    def assert_query_running(self):
+        assert self.app_window.db.query_running
+        assert not self.submit_query_button.isEnabled()
+        assert self.cancel_query_button.isEnabled()
+
     def assert_has_tables(self, n):
         assert self.app_window.tables_tree.topLevelItemCount() >= n
 
@@ -116,4 +239,4 @@ class AppWindowDriver:
 def app_window_driver(qtbot, monkeypatch):
     app_window = MainWindow()
     qtbot.addWidget(app_window)
-    return AppWindowDriver(app_window, monkeypatch)
+    return AppWindowDriver(app_window, monkeypatch, qtbot)
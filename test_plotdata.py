@@ -0,0 +1,92 @@
+import duckdb
+import polars
+import pytest
+
+from plotdata import PlotSource
+
+
+@pytest.fixture
+def source():
+    return PlotSource.from_query(
+        duckdb.connect(),
+        "SELECT range AS x, range % 10 AS y, 'label' AS name, "
+        "DATE '2024-01-01' + range::INTEGER AS day "
+        "FROM range(10000)",
+    )
+
+
+def test_only_numeric_and_temporal_columns_are_plottable(source):
+    assert source.columns == ["x", "y", "day"]
+
+
+def test_extent(source):
+    assert source.extent("x", "y") == ((0, 9999), (0, 9))
+
+
+def test_line_keeps_min_and_max_per_bucket(source):
+    points = source.line("x", "y", (0, 9999), buckets=100)
+
+    assert len(points.x) == 200
+    assert points.total == 10000
+    assert points.ratio == 50
+    assert set(points.y) == {0, 9}
+    assert list(points.x) == sorted(points.x)
+
+
+def test_scatter_samples_the_visible_range(source):
+    points = source.scatter("x", "y", (0, 999), (0, 4), max_points=100)
+
+    assert len(points.x) == 100
+    assert points.total == 500
+    assert points.x.max() <= 999
+    assert points.y.max() <= 4
+    # Views of the Arrow result rather than copies of it.
+    assert not points.x.flags.owndata and not points.x.flags.writeable
+
+
+def test_from_arrow():
+    df = polars.DataFrame({"a": [1, 2, 3], "b": [4.0, 5.0, 6.0]})
+    source = PlotSource.from_arrow(duckdb.connect(), df.to_arrow())
+
+    points = source.scatter("a", "b", (0, 10), (0, 10), max_points=10)
+
+    assert sorted(points.y) == [4.0, 5.0, 6.0]
+    # The Arrow table is scanned in place, not copied into a table.
+    assert source._cursor.sql("SELECT count(*) FROM duckdb_tables()").fetchone() == (0,)
+
+
+def test_from_query_runs_it_when_plotted(conn):
+    conn.sql("CREATE TABLE t AS SELECT 1 AS a, 2 AS b")
+    source = PlotSource.from_query(conn.cursor(), "SELECT * FROM t")
+
+    conn.sql("INSERT INTO t VALUES (3, 4)")
+
+    assert source.extent("a", "b") == ((1, 3), (2, 4))
+
+
+def test_histogram(source):
+    histogram = source.histogram("y", bins=10)
+
+    assert list(histogram.counts) == [1000] * 10
+    assert histogram.edges[0] == 0
+    assert histogram.edges[-1] == 9
+
+
+def test_density(source):
+    density = source.density("x", "y", bins=10)
+
+    assert density.counts.shape == (10, 10)
+    assert density.counts.sum() == 10000
+    assert density.x_range == (0, 9999)
+
+
+def test_bars(source):
+    bars = source.bars("y", "x", "count", limit=3)
+
+    assert len(bars.categories) == 3
+    assert list(bars.values) == [1000, 1000, 1000]
+
+    bars = source.bars("name", "x", "max", limit=3)
+
+    assert bars.categories == ["label"]
+    assert list(bars.values) == [9999]
@@ -0,0 +1,26 @@
+import duckdb
+
+from profiling import explain_analyze
+
+
+def test_explain_analyze_returns_operator_tree():
+    conn = duckdb.connect()
+    conn.sql("CREATE TABLE numbers AS SELECT range % 7 AS n FROM range(1000)")
+
+    plan = explain_analyze(conn.cursor(), "SELECT n, count(*) FROM numbers GROUP BY n")
+
+    operators = {operator.name: operator for _, operator in plan.walk()}
+    assert "TABLE_SCAN" in operators
+    assert operators["TABLE_SCAN"].rows == 1000
+    assert all(operator.seconds >= 0 for operator in operators.values())
+    assert max(depth for depth, _ in plan.walk()) >= 2
+
+
+def test_explain_analyze_leaves_other_cursors_unprofiled():
+    conn = duckdb.connect()
+
+    explain_analyze(conn.cursor(), "SELECT 42")
+
+    assert conn.sql("SELECT current_setting('enable_profiling')").fetchone() != (
+        "json",
+    )
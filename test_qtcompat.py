@@ -0,0 +1,44 @@
+import importlib.util
+import sys
+
+import qtcompat
+
+
+def load_qtcompat():
+    spec = importlib.util.spec_from_file_location(
+        "qtcompat_without_qt", qtcompat.__file__
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_without_qt(monkeypatch):
+    for name in ["qtpy", "qtpy.QtCore"]:
+        monkeypatch.setitem(sys.modules, name, None)
+    return load_qtcompat()
+
+
+def test_skips_qt_when_asked_to(monkeypatch):
+    monkeypatch.setenv("DATAPOND_NO_QT", "1")
+
+    assert not load_qtcompat().HAS_QT
+
+
+def test_signals_without_qt(monkeypatch):
+    compat = load_without_qt(monkeypatch)
+
+    class Source(compat.QObject):
+        changed = compat.Signal(str)
+        forwarded = compat.Signal(str)
+
+    source, other = Source(), Source()
+    received = []
+    source.changed.connect(source.forwarded)
+    source.forwarded.connect(received.append)
+    other.changed.connect(lambda value: received.append(f"other {value}"))
+
+    source.changed.emit("a")
+
+    assert not compat.HAS_QT
+    assert received == ["a"]
@@ -0,0 +1,52 @@
+import pyarrow as pa
+
+from resultcache import ResultCache
+
+
+def numbers(n):
+    return pa.table({"n": pa.array(range(n), pa.int64())})
+
+
+def test_normalizes_queries():
+    cache = ResultCache(1024)
+    cache.put("SELECT *\n  FROM t;", numbers(3), frozenset({"t"}))
+
+    assert cache.get("SELECT * FROM t") == numbers(3)
+    assert cache.get("SELECT * FROM u") is None
+
+
+def test_keeps_whitespace_in_literals_and_identifiers():
+    cache = ResultCache(1024)
+    cache.put("SELECT * FROM t WHERE s = 'a  b'", numbers(1), frozenset({"t"}))
+    cache.put('SELECT "x  y" FROM t', numbers(2), frozenset({"t"}))
+
+    assert cache.get("SELECT * FROM t WHERE s = 'a b'") is None
+    assert cache.get("SELECT *  FROM t\nWHERE s = 'a  b'") == numbers(1)
+    assert cache.get('SELECT "x y" FROM t') is None
+    assert cache.get('SELECT  "x  y" FROM t;') == numbers(2)
+
+
+def test_evicts_least_recently_used_results():
+    cache = ResultCache(numbers(10).nbytes * 2)
+    cache.put("a", numbers(10), frozenset({"t"}))
+    cache.put("b", numbers(10), frozenset({"t"}))
+    cache.get("a")
+
+    cache.put("c", numbers(10), frozenset({"t"}))
+
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.nbytes == numbers(10).nbytes * 2
+    assert not cache.put("d", numbers(100), frozenset({"t"}))
+
+
+def test_invalidates_results_reading_a_table():
+    cache = ResultCache(1024)
+    cache.put("a", numbers(1), frozenset({"t"}))
+    cache.put("b", numbers(1), frozenset({"t", "u"}))
+    cache.put("c", numbers(1), frozenset({"u"}))
+    version = cache.version
+
+    cache.invalidate("t")
+
+    assert len(cache) == 1 and "c" in cache
+    assert cache.version > version
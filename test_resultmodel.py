@@ -0,0 +1,61 @@
+from qtpy.QtCore import Qt
+
+from db import ResultStream
+from resultmodel import QueryResultModel
+
+
+class TestQueryResultModel:
+    def test_query_result_model(self, duck_relation):
+        result = duck_relation("people").pl()
+        model = QueryResultModel()
+        model.set_result(result)
+
+        assert model.rowCount() == 2
+        assert model.columnCount() == 2
+
+        assert model.headerData(0, Qt.Orientation.Horizontal) == "name"
+        assert model.headerData(1, Qt.Orientation.Horizontal) == "age"
+
+        assert model.data(model.index(0, 0)) == "Alice"
+        assert model.data(model.index(0, 1)) == "25"
+
+        assert model.data(model.index(1, 0)) == "Bob"
+        assert model.data(model.index(1, 1)) == "30"
+
+    def test_raw_values_and_alignment(self, duck_relation):
+        model = QueryResultModel()
+        model.set_result(duck_relation("people").pl())
+
+        name, age = model.index(0, 0), model.index(0, 1)
+        align_right = Qt.AlignmentFlag.AlignRight
+
+        assert model.data(age, Qt.ItemDataRole.UserRole) == 25
+        assert model.data(age, Qt.ItemDataRole.TextAlignmentRole) & align_right
+        assert not model.data(name, Qt.ItemDataRole.TextAlignmentRole) & align_right
+
+    def test_formats_nulls_and_nested_values(self, conn):
+        model = QueryResultModel()
+        model.set_result(
+            ResultStream.from_query(
+                conn.cursor(), "SELECT NULL::INTEGER AS n, [1, 2] AS l"
+            )
+        )
+
+        assert model.data(model.index(0, 0)) is None
+        assert model.data(model.index(0, 1)) == "[1, 2]"
+
+    def test_fetches_more_rows_on_demand(self, conn, monkeypatch):
+        monkeypatch.setattr(ResultStream, "BATCH_SIZE", 10)
+        model = QueryResultModel()
+        model.set_result(
+            ResultStream.from_query(conn.cursor(), "SELECT * FROM range(25)")
+        )
+
+        assert model.rowCount() == 10
+        assert model.canFetchMore()
+
+        while model.canFetchMore():
+            model.fetchMore()
+
+        assert model.rowCount() == 25
+        assert model.data(model.index(24, 0)) == "24"
@@ -0,0 +1,29 @@
+import duckdb
+import pytest
+
+from resultview import ResultView, filter_condition
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("> 10", '"age" > 10'),
+        ("is not null", '"age" is not null'),
+        ("NOT LIKE 'A%'", "\"age\" NOT LIKE 'A%'"),
+        ("O'Brien", "contains(lower(CAST(\"age\" AS VARCHAR)), 'o''brien')"),
+        ("inside", "contains(lower(CAST(\"age\" AS VARCHAR)), 'inside')"),
+    ],
+)
+def test_filter_condition(text, expected):
+    assert filter_condition("age", text) == expected
+
+
+def test_wraps_query_with_filters_and_order():
+    view = ResultView('SELECT range AS n, range % 2 AS "odd ""n""" FROM range(10) -- c')
+    assert view.to_sql() == view.query
+
+    view.order_by = "n"
+    view.descending = True
+    view.filters = {"n": "< 5", 'odd "n"': "= 1"}
+
+    assert duckdb.sql(view.to_sql()).fetchall() == [(3, 1), (1, 1)]
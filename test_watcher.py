@@ -0,0 +1,123 @@
+import json
+
+import pytest
+
+from csvdialect import OPTIONS_FILE, CsvOptions
+from db import DB
+from watcher import DataDirWatcher
+
+
+@pytest.fixture
+def db():
+    return DB.from_connection()
+
+
+@pytest.fixture
+def watcher(db, datadir, qtbot):
+    db.create_tables_from_data_dir(datadir)
+    watcher = DataDirWatcher(db)
+    watcher.watch(datadir)
+    return watcher
+
+
+def rows(db, table):
+    cursor = db.cursor()
+    return cursor.sql(f"SELECT * FROM {table} ORDER BY ALL").fetchall()
+
+
+def test_appends_rows_added_to_a_file(db, datadir, watcher):
+    with open(datadir / "people.csv", "a") as f:
+        f.write("Carol,35\n")
+
+    watcher.sync(datadir)
+
+    assert rows(db, "people") == [("Alice", 25), ("Bob", 30), ("Carol", 35)]
+
+
+def test_appends_only_complete_lines(db, datadir, watcher):
+    with open(datadir / "people.csv", "a") as f:
+        f.write("Carol,35\nDa")
+    watcher.sync(datadir)
+
+    with open(datadir / "people.csv", "a") as f:
+        f.write("ve,40\n")
+    watcher.sync(datadir)
+
+    assert rows(db, "people") == [
+        ("Alice", 25),
+        ("Bob", 30),
+        ("Carol", 35),
+        ("Dave", 40),
+    ]
+
+
+def test_appends_rows_added_while_importing_once(db, datadir, qtbot):
+    watcher = DataDirWatcher(db)
+    watcher.watch(datadir)
+    with open(datadir / "people.csv", "a") as f:
+        f.write("Carol,35\n")
+    watcher.sync(datadir)
+    with open(datadir / "people.csv", "a") as f:
+        f.write("Dave,40\n")
+
+    db.create_tables_from_data_dir(datadir)
+    watcher.sync(datadir)
+
+    assert rows(db, "people") == [
+        ("Alice", 25),
+        ("Bob", 30),
+        ("Carol", 35),
+        ("Dave", 40),
+    ]
+
+
+def test_appends_to_files_without_header(db, tmp_path, qtbot):
+    (tmp_path / OPTIONS_FILE).write_text(json.dumps({"*": {"header": False}}))
+    (tmp_path / "pairs.csv").write_text("a;1\nb;2\n")
+    db.create_tables_from_data_dir(tmp_path)
+    watcher = DataDirWatcher(db)
+    watcher.watch(tmp_path)
+
+    with open(tmp_path / "pairs.csv", "a") as f:
+        f.write("c;3\n")
+    watcher.sync(tmp_path)
+
+    assert rows(db, "pairs") == [("a", 1), ("b", 2), ("c", 3)]
+
+
+def test_reimports_rewritten_files(db, datadir, watcher, qtbot):
+    (datadir / "people.csv").write_text("name,age\nZoe,9\n")
+
+    with qtbot.waitSignal(db.import_finished):
+        watcher.sync(datadir)
+
+    assert rows(db, "people") == [("Zoe", 9)]
+
+
+def test_keeps_tables_whose_file_fails_to_import_again(db, datadir, watcher, qtbot):
+    db.import_options.csv = CsvOptions(types={"age": "INTEGER"})
+    (datadir / "people.csv").write_text("name,age\nZoe,unknown\n")
+
+    with qtbot.waitSignal(db.import_finished):
+        watcher.sync(datadir)
+
+    assert rows(db, "people") == [("Alice", 25), ("Bob", 30)]
+
+
+def test_imports_new_files_and_drops_deleted_ones(db, datadir, watcher, qtbot):
+    (datadir / "animals.csv").unlink()
+    (datadir / "plants.csv").write_text("name,color\nrose,red\n")
+
+    with qtbot.waitSignal(db.import_finished):
+        watcher.sync(datadir)
+
+    assert db.table("animals") is None
+    assert db.table("plants") is not None
+
+
+def test_syncs_when_files_change_on_disk(db, datadir, watcher, qtbot):
+    with qtbot.waitSignal(watcher.rows_appended, timeout=5000):
+        with open(datadir / "people.csv", "a") as f:
+            f.write("Carol,35\n")
+
+    assert ("Carol", 35) in rows(db, "people")
@@ -0,0 +1,183 @@
+import tempfile
+from dataclasses import replace
+from pathlib import Path
+from typing import Optional
+
+import duckdb
+from qtpy.QtCore import QFileSystemWatcher, QObject, QTimer, Signal, Slot
+
+from csvdialect import Dialect, options_for
+from datafiles import data_sources, suffix, table_name
+from db import DB, Table
+from importcache import Fingerprint
+
+
+class DataDirWatcher(QObject):
+    """Keeps the tables of watched data directories in sync with their files.
+
+    New files are imported, tables of deleted files are dropped and files
+    that were rewritten are imported again. Files that only grew are
+    treated as appended to, and just the rows after the previously seen
+    end of the file are inserted into their table. Views need no work,
+    since they read their file on every query.
+    """
+
+    DEBOUNCE_MS = 500
+
+    rows_appended = Signal(str)
+
+    def __init__(self, db: DB, parent=None):
+        super().__init__(parent)
+        self._db = db
+        self._files: dict[Path, Fingerprint] = {}
+        self._changed_dirs: set[Path] = set()
+        db.file_imported.connect(self._file_imported)
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._schedule_sync)
+        self._watcher.fileChanged.connect(self._schedule_sync)
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(self.DEBOUNCE_MS)
+        self._debounce.timeout.connect(self._sync_changed_dirs)
+
+    def watch(self, data_dir: Path):
+        data_dir = data_dir.resolve()
+        self._watcher.addPath(str(data_dir))
+        for path in self._data_files(data_dir):
+            self._track(path)
+
+    def unwatch_all(self):
+        if paths := self._watcher.files() + self._watcher.directories():
+            self._watcher.removePaths(paths)
+        self._files.clear()
+
+    def sync(self, data_dir: Path):
+        data_dir = data_dir.resolve()
+        on_disk = {path: Fingerprint.of(path) for path in self._data_files(data_dir)}
+        tracked = [path for path in self._files if path.parent == data_dir]
+
+        rewritten = []
+        cursor = self._db.cursor()
+        try:
+            for path in tracked:
+                if path not in on_disk:
+                    self._drop(cursor, path)
+                elif on_disk[path] != self._files[path]:
+                    if self._update(cursor, path, on_disk[path]):
+                        rewritten.append(path)
+        except duckdb.Error as e:
+            self._db.error_occurred.emit(e)
+        finally:
+            cursor.close()
+
+        if rewritten:
+            self._db.reimport_files(rewritten)
+        if new_files := [path for path in on_disk if path not in self._files]:
+            for path in new_files:
+                self._track(path)
+            self._db.create_tables_from_files(new_files, background=True)
+        elif not rewritten:
+            self._db.schema_tracker.refresh()
+
+    def _data_files(self, data_dir: Path) -> list[Path]:
+        """The files of ``data_dir`` imported as tables of their own. Groups
+        of files are left alone: as views they see new files by
+        themselves, and as tables they are only imported once."""
+        group = self._db.import_options.group_files
+        return [s for s in data_sources(data_dir, group) if isinstance(s, Path)]
+
+    def _track(self, path: Path):
+        # A guess until the file is imported, if it's still being imported.
+        # Its table doesn't exist until then, so the file is left alone.
+        self._files[path] = Fingerprint.of(path)
+        self._watcher.addPath(str(path))
+
+    def _drop(self, cursor: duckdb.DuckDBPyConnection, path: Path):
+        del self._files[path]
+        if table := self._db.table(table_name(path)):
+            cursor.sql(f"DROP {'VIEW' if table.is_view else 'TABLE'} {table.name}")
+
+    def _update(
+        self, cursor: duckdb.DuckDBPyConnection, path: Path, now: Fingerprint
+    ) -> bool:
+        """Appends the rows added to ``path``, or returns True if it needs
+        to be imported again instead."""
+        self._watcher.addPath(str(path))
+        if (table := self._db.table(table_name(path))) is None:
+            return False
+        seen = self._files[path]
+        self._files[path] = now
+        if table.is_view:
+            return False
+
+        self._db.result_cache.invalidate(table.name.lower())
+        # Appending to a sample would leave it no longer one, so sampled
+        # tables are sampled again instead. Only plain CSV files can be
+        # read from the middle.
+        if now.size <= seen.size or table.sample is not None or suffix(path) != ".csv":
+            return True
+        end = self._append_tail(
+            cursor, table, path, seen.size, self._dialect(cursor, path)
+        )
+        self._files[path] = Fingerprint(end, now.mtime_ns)
+        self.rows_appended.emit(table.name)
+        return False
+
+    def _dialect(self, cursor: duckdb.DuckDBPyConnection, path: Path) -> Dialect:
+        options = self._db.import_options
+        csv = options_for(path, options.csv)
+        if options.dialects is not None and (
+            dialect := options.dialects.get(path, csv)
+        ):
+            return dialect
+        return Dialect.sniff(cursor, path, csv)
+
+    @staticmethod
+    def _append_tail(
+        cursor: duckdb.DuckDBPyConnection,
+        table: Table,
+        path: Path,
+        offset: int,
+        dialect: Dialect,
+    ) -> int:
+        """Inserts the complete lines after ``offset`` and returns the offset
+        right after the last one. They are read in the dialect of the file,
+        as the columns of ``table``."""
+        with open(path, "rb") as f:
+            f.seek(offset)
+            tail = f.read()
+
+        tail = tail[: tail.rfind(b"\n") + 1]
+        if not tail.strip():
+            return offset + len(tail)
+
+        tail_dialect = replace(
+            dialect, skip=0, header=False, columns=tuple(table.columns)
+        )
+        arguments = ", ".join(tail_dialect.arguments())
+        with tempfile.NamedTemporaryFile(suffix=".csv") as tail_file:
+            tail_file.write(tail.lstrip(b"\r\n"))
+            tail_file.flush()
+            cursor.sql(
+                f"INSERT INTO {table.name} BY NAME SELECT * FROM read_csv("
+                f"'{tail_file.name}', {arguments})"
+            )
+        return offset + len(tail)
+
+    @Slot(object, object)
+    def _file_imported(self, source, fingerprint: Optional[Fingerprint]):
+        if fingerprint is not None and (path := source.resolve()) in self._files:
+            self._files[path] = fingerprint
+
+    @Slot(str)
+    def _schedule_sync(self, path):
+        path = Path(path)
+        self._changed_dirs.add(path if path.is_dir() else path.parent)
+        self._debounce.start()
+
+    def _sync_changed_dirs(self):
+        changed_dirs, self._changed_dirs = self._changed_dirs, set()
+        for data_dir in changed_dirs:
+            self.sync(data_dir)